@@ -0,0 +1,31 @@
+"""
+Fee-deadline alerts for the navigation badge.
+
+``/api/alerts/`` lists active athletes whose fee deadline is at most
+``ALERT_WINDOW_DAYS`` away (or already passed), most urgent first. It is a
+single range scan on the (is_active, fee_deadline_date) index reading a few
+narrow columns -- none of the dashboard's counts, trends or nested payments.
+
+Clients poll it cheaply: each response carries a ``version`` (the athletes
+resource version plus today's date, since days_left changes at midnight),
+and a request with ``?since=<version>`` that is still current is answered
+with ``{"changed": false}`` without touching the athlete table. Plain HTTP
+revalidation (ETag / If-None-Match) works as well.
+"""
+from datetime import date, timedelta
+
+from .models import Athlete
+
+ALERT_WINDOW_DAYS = 3
+ALERT_FIELDS = ('id', 'full_name', 'fee_deadline_date', 'photo', 'photo_thumbnails', 'gym_type', 'contact_number')
+
+
+def alerts_version(athletes_version, today=None):
+    return f'{athletes_version}.{(today or date.today()).isoformat()}'
+
+
+def alert_athletes(today=None):
+    today = today or date.today()
+    return Athlete.objects.filter(
+        is_active=True, fee_deadline_date__lte=today + timedelta(days=ALERT_WINDOW_DAYS),
+    ).order_by('fee_deadline_date', 'pk').only(*ALERT_FIELDS)
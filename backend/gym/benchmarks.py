@@ -0,0 +1,152 @@
+"""
+Benchmark flows for ``manage.py benchmark``.
+
+Each flow is one front-desk action performed through the API client, timed
+over many runs together with the number of queries it issued. Results are
+plain dicts so they can be written as JSON and compared across commits with
+``compare_results``. ``throwaway_database`` gives the benchmark and load
+test commands a scratch database to seed.
+"""
+from contextlib import contextmanager
+import os
+from pathlib import Path
+import random
+import statistics
+import tempfile
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from .dashboard import invalidate_dashboard_snapshot
+from .models import Athlete, Shelf
+
+SEARCH_TERMS = ['ahmad', 'kar', 'azizi', '0790', 'rah']
+
+
+@contextmanager
+def throwaway_database(on_disk=False):
+    """
+    Run the block against a freshly created test database, destroyed afterwards.
+
+    The default SQLite test database lives in memory, which has neither WAL
+    nor file locking; ``on_disk`` puts it in a temporary file instead.
+    """
+    setup_test_environment()
+    path = None
+    if on_disk and connection.vendor == 'sqlite':
+        path = os.path.join(tempfile.gettempdir(), f'gym_loadtest_{os.getpid()}.sqlite3')
+        connection.settings_dict['TEST']['NAME'] = path
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if path:
+            for suffix in ('', '-wal', '-shm'):
+                Path(f'{path}{suffix}').unlink(missing_ok=True)
+
+
+def percentiles(timings):
+    if len(timings) < 2:
+        value = round(timings[0], 2) if timings else 0
+        return {'p50': value, 'p95': value, 'p99': value}
+    cuts = statistics.quantiles(timings, n=100)
+    return {'p50': round(cuts[49], 2), 'p95': round(cuts[94], 2), 'p99': round(cuts[98], 2)}
+
+
+def _free_shelf(data, rng):
+    if not data['free_shelves']:
+        shelf = Shelf.objects.create(shelf_number=f'B{rng.randrange(10**8):08d}')
+        data['free_shelves'].append(shelf.pk)
+    return data['free_shelves'].pop()
+
+
+def _new_athlete(data, rng):
+    return {
+        'full_name': f'Benchmark {rng.randrange(10**6)}',
+        'gym_type': rng.choice(['fitness', 'bodybuilding']),
+        'gym_time': rng.choice(['morning', 'afternoon', 'night']),
+        'final_fee': 1000,
+        'shelf': _free_shelf(data, rng),
+        'locker_duration_months': 3,
+        'locker_price': 300,
+    }
+
+
+def _stale_dashboard(data, rng):
+    # Time the snapshot being computed, not served from cache
+    invalidate_dashboard_snapshot()
+
+
+# (name, setup(data, rng) -> argument, untimed; perform(client, argument) -> response)
+FLOWS = [
+    ('athlete list', None, lambda client, _: client.get('/api/athletes/')),
+    ('athlete search', lambda data, rng: rng.choice(SEARCH_TERMS),
+     lambda client, term: client.get('/api/athletes/', {'search': term})),
+    ('fee_status filter', lambda data, rng: rng.choice(['critical', 'warning', 'overdue']),
+     lambda client, bucket: client.get('/api/athletes/', {'fee_status': bucket})),
+    ('dashboard', _stale_dashboard, lambda client, _: client.get('/api/dashboard/')),
+    ('renew', lambda data, rng: rng.choice(data['athlete_ids']),
+     lambda client, pk: client.post(f'/api/athletes/{pk}/renew/', {'duration': 30}, format='json')),
+    ('create with locker', _new_athlete, lambda client, payload: client.post('/api/athletes/', payload, format='json')),
+    ('shelf list', None, lambda client, _: client.get('/api/shelves/')),
+]
+
+
+def benchmark_data():
+    """Ids the flows pick from, loaded once up front."""
+    return {
+        'athlete_ids': list(Athlete.objects.values_list('pk', flat=True)),
+        'free_shelves': list(Shelf.objects.filter(status='available').values_list('pk', flat=True)),
+    }
+
+
+def run_flows(client, repeat=20, warmup=2, names=None, seed=42):
+    """Time every flow ``repeat`` times (after ``warmup`` untimed runs) and return the results by name."""
+    rng = random.Random(seed)
+    data = benchmark_data()
+    results = {}
+    for name, setup, perform in FLOWS:
+        if names and name not in names:
+            continue
+        timings, queries, errors = [], [], 0
+        for run in range(warmup + repeat):
+            argument = setup(data, rng) if setup else None
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = perform(client, argument)
+                elapsed = (time.perf_counter() - started) * 1000
+            if run < warmup:
+                continue
+            errors += response.status_code >= 400
+            timings.append(elapsed)
+            queries.append(len(captured))
+        results[name] = {
+            'runs': repeat,
+            'errors': errors,
+            'mean': round(statistics.fmean(timings), 2) if timings else 0,
+            **percentiles(timings),
+            'queries': round(statistics.median(queries)) if queries else 0,
+            'max_queries': max(queries, default=0),
+        }
+    return results
+
+
+def compare_results(current, baseline, tolerance=0.2, min_ms=1.0):
+    """
+    Regressions of ``current`` against ``baseline`` (both ``run_flows``
+    results): p50 slower by more than ``tolerance`` and ``min_ms``, or more
+    queries than before.
+    """
+    regressions = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if now['p50'] > before['p50'] * (1 + tolerance) and now['p50'] - before['p50'] > min_ms:
+            regressions.append(f'{name}: p50 {before["p50"]} -> {now["p50"]} ms')
+        if now['queries'] > before['queries']:
+            regressions.append(f'{name}: {before["queries"]} -> {now["queries"]} queries')
+    return regressions
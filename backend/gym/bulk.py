@@ -0,0 +1,263 @@
+"""
+Bulk athlete import and export.
+
+Imports read rows lazily from any iterable of byte lines (an uploaded file,
+the raw request body, a file on disk), validate them in fixed-size chunks and
+write each chunk with two ``bulk_create`` calls -- athletes, then their
+registration payments -- inside one transaction. ``bulk_create`` bypasses
+``save()`` and the model signals, so the derived state those normally
+maintain (revenue rollup, search index, dashboard snapshot, resource
+versions, athlete payment summaries) is updated here once per chunk.
+
+Batch renewals follow the same pattern: one ``bulk_update`` of the fee
+dates and one ``bulk_create`` of renewal payments per request.
+
+Exports (the athlete roster, the payment ledger) stream CSV straight from a
+server-side cursor.
+"""
+import codecs
+import csv
+import json
+from datetime import date, timedelta
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .dashboard import invalidate_dashboard_snapshot
+from .models import Athlete, Payment
+from .rollups import record_payments
+from .search import index_athletes
+from .serializers import AthleteImportSerializer
+from .versions import ATHLETES, PAYMENTS, bump_versions
+
+MAX_RENEWALS = 1000
+
+EXPORT_FIELDS = [
+    'id', 'full_name', 'father_name', 'gym_type', 'gym_time', 'discount', 'debt', 'final_fee',
+    'contact_number', 'notes', 'registration_date', 'fee_start_date', 'fee_deadline_date', 'is_active',
+]
+
+PAYMENT_EXPORT_FIELDS = ['id', 'payment_date', 'payment_type', 'amount', 'athlete_id', 'athlete__full_name',
+                         'gym_type', 'notes']
+PAYMENT_EXPORT_HEADER = ['id', 'payment_date', 'payment_type', 'amount', 'athlete_id', 'athlete_name',
+                         'gym_type', 'notes']
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+
+
+def detect_format(content_type='', filename=''):
+    if 'json' in (content_type or '') or (filename or '').lower().endswith(('.json', '.jsonl', '.ndjson')):
+        return NDJSON
+    return CSV
+
+
+def iter_rows(lines, fmt=CSV):
+    """Yield one dict per record from an iterable of byte lines."""
+    text = codecs.iterdecode(lines, 'utf-8-sig')
+    if fmt == NDJSON:
+        for line in text:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(text)
+
+
+def _clean(row):
+    # Empty CSV cells mean "use the default", not "blank value"
+    return {key: value for key, value in row.items() if key and value not in ('', None)}
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_athletes(rows, batch_size=500):
+    """
+    Validate and insert ``rows`` (dicts) in batches of ``batch_size``.
+    Invalid rows are skipped and reported; valid rows in the same batch are
+    still imported. Returns ``{'created': n, 'errors': [{'row': i, 'errors': ...}]}``.
+    """
+    created = 0
+    errors = []
+    row_number = 0
+    chunks = _chunks(rows, batch_size)
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            break
+        except (ValueError, csv.Error) as exc:
+            # Malformed input (bad JSON line, undecodable bytes): stop here,
+            # keeping the batches already committed
+            errors.append({'row': row_number + 1, 'errors': {'non_field_errors': [f'Could not parse input: {exc}']}})
+            break
+
+        today = date.today()
+        athletes = []
+        for row in chunk:
+            row_number += 1
+            if not isinstance(row, dict):
+                errors.append({'row': row_number, 'errors': {'non_field_errors': ['Expected an object']}})
+                continue
+            serializer = AthleteImportSerializer(data=_clean(row))
+            if not serializer.is_valid():
+                errors.append({'row': row_number, 'errors': serializer.errors})
+                continue
+            data = serializer.validated_data
+            data.setdefault('fee_deadline_date', today + timedelta(days=30))
+            data['final_fee'] = Athlete.calculate_final_fee(
+                data['gym_type'], data.get('discount', 0), data.get('debt', 0))
+            data['fee_status'] = Athlete.fee_status_for(data['fee_deadline_date'], today)
+            athletes.append(Athlete(**data))
+
+        if athletes:
+            _write_batch(athletes)
+            created += len(athletes)
+
+    return {'created': created, 'errors': errors}
+
+
+def _write_batch(athletes):
+    today = date.today()
+    for athlete in athletes:
+        # Each imported athlete starts with exactly its registration payment
+        athlete.payment_count = 1
+        athlete.total_paid = athlete.final_fee
+        athlete.last_payment_date = today
+    with transaction.atomic():
+        Athlete.objects.bulk_create(athletes)
+        payments = Payment.objects.bulk_create([
+            Payment(
+                athlete=athlete,
+                amount=athlete.final_fee,
+                payment_type='registration',
+                gym_type=athlete.gym_type,
+                notes='Initial registration fee',
+            )
+            for athlete in athletes
+        ])
+        record_payments(payments)
+        index_athletes(athletes)
+        transaction.on_commit(invalidate_dashboard_snapshot)
+        bump_versions(ATHLETES, PAYMENTS)
+
+
+def renewal_amount(final_fee, duration_days):
+    """Amount charged for a renewal; final_fee is monthly."""
+    months = max(1, round(duration_days / 30))
+    return final_fee * months
+
+
+def _parse_renewal(item):
+    if not isinstance(item, dict):
+        raise ValueError('Expected an object with "id" and optional "duration"')
+    try:
+        athlete_id = int(item['id'])
+        duration = int(item.get('duration', 30))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('"id" and "duration" must be integers')
+    if duration <= 0:
+        raise ValueError('"duration" must be a positive number of days')
+    return athlete_id, duration
+
+
+def renew_athletes(items):
+    """
+    Renew many memberships at once. ``items`` is a list of
+    ``{'id': ..., 'duration': days}``; returns one result dict per item, in
+    order, with ``status`` "renewed" or "error".
+    """
+    today = date.today()
+    now = timezone.now()
+    results = [None] * len(items)
+    requested = {}
+    for index, item in enumerate(items):
+        try:
+            athlete_id, duration = _parse_renewal(item)
+        except ValueError as exc:
+            results[index] = {'id': item.get('id') if isinstance(item, dict) else None,
+                              'status': 'error', 'error': str(exc)}
+            continue
+        if athlete_id in requested:
+            results[index] = {'id': athlete_id, 'status': 'error', 'error': 'Duplicate athlete in request'}
+            continue
+        requested[athlete_id] = (index, duration)
+
+    with transaction.atomic():
+        athletes = Athlete.objects.filter(pk__in=requested).only('pk', 'gym_type', 'final_fee')
+        if connection.features.has_select_for_update:
+            athletes = athletes.select_for_update()
+        athletes = {athlete.pk: athlete for athlete in athletes}
+
+        payments = []
+        for athlete_id, (index, duration) in requested.items():
+            athlete = athletes.get(athlete_id)
+            if athlete is None:
+                results[index] = {'id': athlete_id, 'status': 'error', 'error': 'Athlete not found'}
+                continue
+            athlete.fee_start_date = today
+            athlete.fee_deadline_date = today + timedelta(days=duration)
+            athlete.fee_status = Athlete.fee_status_for(athlete.fee_deadline_date, today)
+            athlete.updated_at = now
+            amount = renewal_amount(athlete.final_fee, duration)
+            athlete.payment_count = F('payment_count') + 1
+            athlete.total_paid = F('total_paid') + amount
+            athlete.last_payment_date = today
+            payments.append(Payment(
+                athlete=athlete,
+                amount=amount,
+                payment_type='renewal',
+                gym_type=athlete.gym_type,
+                notes=f'Renewed for {duration} days',
+            ))
+
+        renewed = [payment.athlete for payment in payments]
+        if renewed:
+            Athlete.objects.bulk_update(
+                renewed, ['fee_start_date', 'fee_deadline_date', 'fee_status', 'updated_at',
+                          'payment_count', 'total_paid', 'last_payment_date'])
+            Payment.objects.bulk_create(payments)
+            record_payments(payments)
+            transaction.on_commit(invalidate_dashboard_snapshot)
+            bump_versions(ATHLETES, PAYMENTS)
+
+    for payment in payments:
+        athlete = payment.athlete
+        results[requested[athlete.pk][0]] = {
+            'id': athlete.pk,
+            'status': 'renewed',
+            'fee_deadline_date': athlete.fee_deadline_date,
+            'amount': payment.amount,
+            'payment_id': payment.pk,
+        }
+    return results
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer streaming"""
+
+    def write(self, value):
+        return value
+
+
+def iter_athlete_csv(queryset, chunk_size=2000):
+    """Yield the CSV export of ``queryset`` line by line."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for values in queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+        yield writer.writerow(values)
+
+
+def iter_payment_csv(queryset, chunk_size=2000):
+    """Yield the CSV export of a payment ``queryset`` line by line, oldest first."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(PAYMENT_EXPORT_HEADER)
+    rows = queryset.order_by('payment_date', 'pk').values_list(*PAYMENT_EXPORT_FIELDS)
+    for values in rows.iterator(chunk_size=chunk_size):
+        yield writer.writerow(values)
@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from .models import Athlete, RevenueRollup, Shelf
+from .serializers import AthleteAlertSerializer
+
+DASHBOARD_CACHE_KEY = 'gym:dashboard:{day}'
+
+
+def _cache_key(today):
+    # Keyed by day so days_left and the alert window roll over at midnight
+    return DASHBOARD_CACHE_KEY.format(day=today.isoformat())
+
+
+def build_dashboard_snapshot(today=None):
+    """Compute the dashboard payload with one conditional aggregate per table."""
+    today = today or date.today()
+
+    active = Q(is_active=True)
+    athletes = Athlete.objects.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=active),
+        fitness=Count('pk', filter=active & Q(gym_type='fitness')),
+        bodybuilding=Count('pk', filter=active & Q(gym_type='bodybuilding')),
+        morning=Count('pk', filter=active & Q(gym_time='morning')),
+        afternoon=Count('pk', filter=active & Q(gym_time='afternoon')),
+        night=Count('pk', filter=active & Q(gym_time='night')),
+    )
+    shelves = Shelf.objects.aggregate(
+        total=Count('pk'),
+        available=Count('pk', filter=Q(status='available')),
+    )
+    total_income = RevenueRollup.objects.filter(granularity='month').aggregate(Sum('total'))['total__sum'] or 0
+    inactive_count = athletes['total'] - athletes['active']
+
+    # Revenue Trend (Last 6 Months), from the monthly rollup
+    six_months_ago = (today - timedelta(days=180)).replace(day=1)
+    revenue_trend = RevenueRollup.objects.filter(granularity='month', period_start__gte=six_months_ago)\
+        .values('period_start')\
+        .annotate(amount=Sum('total'))\
+        .order_by('period_start')
+    trend_data = [
+        {'name': entry['period_start'].strftime('%b'), 'amount': float(entry['amount'])}
+        for entry in revenue_trend
+    ]
+
+    # Critical Alerts (Expiring or Overdue), most urgent first
+    critical_athletes = Athlete.objects.filter(
+        fee_deadline_date__lte=today + timedelta(days=3),
+        is_active=True
+    ).order_by('fee_deadline_date', 'pk')
+    critical_data = [dict(row) for row in AthleteAlertSerializer(critical_athletes, many=True).data]
+
+    return {
+        'stats': {
+            'total': athletes['total'],
+            'active': athletes['active'],
+            'inactive': inactive_count,
+            'income': total_income,
+            'shelves_total': shelves['total'],
+            'shelves_available': shelves['available'],
+        },
+        'trends': {
+            'revenue': trend_data,
+        },
+        'distributions': {
+            'type': [
+                {'name': 'Fitness', 'value': athletes['fitness']},
+                {'name': 'Bodybuilding', 'value': athletes['bodybuilding']},
+            ],
+            'time': [
+                {'name': 'Morning', 'value': athletes['morning']},
+                {'name': 'Afternoon', 'value': athletes['afternoon']},
+                {'name': 'Night', 'value': athletes['night']},
+            ],
+            'status': [
+                {'name': 'Active', 'value': athletes['active']},
+                {'name': 'Inactive', 'value': inactive_count},
+            ],
+        },
+        'alerts': critical_data,
+    }
+
+
+def get_dashboard_snapshot():
+    """Return the cached dashboard payload, rebuilding it on a miss."""
+    today = date.today()
+    key = _cache_key(today)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_dashboard_snapshot(today)
+        cache.set(key, snapshot, settings.GYM_DASHBOARD_CACHE_TIMEOUT)
+    return snapshot
+
+
+def invalidate_dashboard_snapshot():
+    cache.delete(_cache_key(date.today()))
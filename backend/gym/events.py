@@ -0,0 +1,222 @@
+"""
+Live change events for terminals.
+
+Instead of polling the dashboard and shelf list, clients keep one
+server-sent events stream open on ``GET /api/events/`` and refetch only
+when something they show has changed. Every committed write to athletes,
+payments or shelves produces one compact event per resource::
+
+    event: change
+    data: {"resource":"shelves","saved":[12],"deleted":[]}
+
+``saved``/``deleted`` list the ids touched through ``save()``/``delete()``;
+bulk and queryset-update paths (bulk import/renew, the locker service, ...)
+publish the resource without ids, meaning "reload it". Events ride on the
+resource version flush (``gym.versions``), so they are sent after commit,
+once per transaction rather than once per row.
+
+The broker fans events out to subscribers in this process. Publishing goes
+through ``GYM_EVENTS_BACKEND``: the default in-process backend hands events
+straight back to the local broker, which is enough for a single ASGI worker.
+With several workers, plug in a backend that forwards ``publish()`` to a
+shared channel (Redis pub/sub, PostgreSQL NOTIFY, ...) and calls ``deliver``
+for every message it receives.
+
+Each subscriber has a bounded queue; a client too slow to keep up gets a
+single ``resync`` event in place of what it missed and should refetch
+everything it shows. The stream needs an ASGI server (``gymsystem.asgi``).
+
+EventSource cannot send an Authorization header, and a query string ends up
+in access logs, so browsers first trade their access token for a stream
+ticket (``POST /api/events/ticket/``) and open the stream with ``?ticket=``.
+A ticket names the user, is signed, is good for ``GYM_EVENTS_TICKET_TTL``
+seconds and opens a single stream.
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+SAVED = 'saved'
+DELETED = 'deleted'
+# Past this many ids an event just says "reload"
+MAX_EVENT_IDS = 100
+RESYNC_FRAME = b'event: resync\ndata: {}\n\n'
+TICKET_SALT = 'gym.events.ticket'
+
+_recorded = threading.local()
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def record_change(resource, action, pk):
+    """Remember that ``pk`` was saved or deleted; published with the next version flush."""
+    changes = getattr(_recorded, 'changes', None)
+    if changes is None:
+        changes = _recorded.changes = {}
+    changes.setdefault((resource, action), set()).add(pk)
+
+
+def publish_changes(resources):
+    """Publish one event for each resource in ``resources``; called once its changes are committed."""
+    changes = getattr(_recorded, 'changes', None) or {}
+    _recorded.changes = {}
+    broker = get_broker()
+    for resource in sorted(resources):
+        event = {'resource': resource}
+        saved = changes.get((resource, SAVED), ())
+        deleted = changes.get((resource, DELETED), ())
+        if (saved or deleted) and len(saved) + len(deleted) <= MAX_EVENT_IDS:
+            event[SAVED] = sorted(saved)
+            event[DELETED] = sorted(deleted)
+        broker.publish(event)
+
+
+def encode_event(event):
+    data = json.dumps(event, separators=(',', ':'))
+    return f'event: change\ndata: {data}\n\n'.encode()
+
+
+def issue_ticket(user):
+    """A signed, short-lived ticket that opens one event stream as ``user``."""
+    return signing.TimestampSigner(salt=TICKET_SALT).sign(str(user.pk))
+
+
+def redeem_ticket(ticket):
+    """The active user a valid, unused ``ticket`` was issued to, or None."""
+    try:
+        pk = signing.TimestampSigner(salt=TICKET_SALT).unsign(ticket, max_age=settings.GYM_EVENTS_TICKET_TTL)
+    except signing.BadSignature:
+        return None
+    # A ticket read back from a log has been used already
+    if not cache.add(f'gym:events:ticket:{ticket}', True, settings.GYM_EVENTS_TICKET_TTL + 1):
+        return None
+    return get_user_model().objects.filter(pk=pk, is_active=True).first()
+
+
+class InProcessBackend:
+    """Deliver events to the subscribers of this process only."""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, event):
+        self.deliver(event)
+
+
+class Subscription:
+    """One client's queue of encoded event frames."""
+
+    def __init__(self, broker, resources, loop, max_queue):
+        self.broker = broker
+        self.resources = resources
+        self.loop = loop
+        self.queue = asyncio.Queue(max_queue)
+        self.overflowed = False
+
+    def wants(self, resource):
+        return self.resources is None or resource in self.resources
+
+    def offer(self, frame):
+        # Runs on the subscriber's event loop. Once the queue overflows,
+        # everything up to the client's refetch is covered by the resync.
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_FRAME)
+            self.overflowed = True
+
+    async def get(self):
+        frame = await self.queue.get()
+        if frame is RESYNC_FRAME:
+            self.overflowed = False
+        return frame
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Fans published events out to the subscriptions of this process."""
+
+    def __init__(self, backend_class=InProcessBackend, max_queue=100):
+        self.max_queue = max_queue
+        self._loops = {}
+        self._lock = threading.Lock()
+        self.backend = backend_class(self.deliver)
+
+    def publish(self, event):
+        self.backend.publish(event)
+
+    def subscribe(self, resources=None):
+        """Subscribe the running event loop to ``resources`` (None for all)."""
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(self, frozenset(resources) if resources else None, loop, self.max_queue)
+        with self._lock:
+            self._loops.setdefault(loop, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._loops.get(subscription.loop)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._loops[subscription.loop]
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._loops.values())
+
+    def deliver(self, event):
+        """Hand ``event`` to every interested subscriber; safe to call from any thread."""
+        frame = encode_event(event)
+        resource = event.get('resource')
+        with self._lock:
+            targets = [(loop, list(subscriptions)) for loop, subscriptions in self._loops.items()]
+        for loop, subscriptions in targets:
+            # One wake-up per event loop, however many clients it serves
+            try:
+                loop.call_soon_threadsafe(self._fan_out, subscriptions, resource, frame)
+            except RuntimeError:
+                # The loop has shut down; its subscriptions are gone
+                with self._lock:
+                    self._loops.pop(loop, None)
+
+    @staticmethod
+    def _fan_out(subscriptions, resource, frame):
+        for subscription in subscriptions:
+            if subscription.wants(resource):
+                subscription.offer(frame)
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = Broker(import_string(settings.GYM_EVENTS_BACKEND), settings.GYM_EVENTS_MAX_QUEUE)
+    return _broker
+
+
+async def event_stream(subscription, keepalive):
+    """Encoded SSE frames for ``subscription``, with a comment line every ``keepalive`` seconds of quiet."""
+    try:
+        yield b'retry: 5000\n: connected\n\n'
+        while True:
+            try:
+                yield await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield b': keepalive\n\n'
+    finally:
+        subscription.close()
@@ -0,0 +1,93 @@
+"""
+Fee status buckets (safe / warning / critical / overdue).
+
+``Athlete.fee_status`` stores each athlete's bucket so lists can filter,
+order and count by it with an index. It is set from ``fee_deadline_date``
+whenever an athlete is saved, but it also goes stale as the calendar moves
+on: an athlete with 16 days left becomes "warning" tomorrow without being
+touched.
+
+``advance_fee_statuses`` fixes that incrementally. For each bucket it
+looks only at rows whose deadline has left that bucket's date range -- an
+index range scan on (fee_status, fee_deadline_date) -- and rewrites just
+those, so a daily run touches the few athletes that crossed a boundary
+overnight and a late run still catches up. It runs from the daily
+``advance_fee_status`` command. As a safety net for days the command did
+not run, the first athlete list or ``fee_status_counts`` request of a day
+(per cache) also runs it, so that one GET may write.
+"""
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from .models import Athlete
+from .versions import ATHLETES, bump_versions
+
+CHECKPOINT_CACHE_KEY = 'gym:fee_status:{day}'
+
+
+def bucket_ranges(today):
+    """``{status: (first_deadline, last_deadline)}``, None meaning unbounded."""
+    ranges = {}
+    upper = None
+    for code, lowest in Athlete.FEE_STATUS_THRESHOLDS:
+        first = today + timedelta(days=lowest)
+        ranges[code] = (first, upper)
+        upper = first - timedelta(days=1)
+    ranges[Athlete.FEE_OVERDUE] = (None, upper)
+    return ranges
+
+
+def fee_status_expression(today=None):
+    """The bucket of ``fee_deadline_date`` as a database expression."""
+    today = today or date.today()
+    whens = [
+        When(fee_deadline_date__gte=today + timedelta(days=lowest), then=Value(code))
+        for code, lowest in Athlete.FEE_STATUS_THRESHOLDS
+    ]
+    return Case(*whens, default=Value(Athlete.FEE_OVERDUE), output_field=IntegerField())
+
+
+def stale_fee_statuses(today=None):
+    """Athletes whose stored bucket no longer matches their deadline."""
+    stale = Q()
+    for code, (first, last) in bucket_ranges(today or date.today()).items():
+        outside = Q()
+        if first is not None:
+            outside |= Q(fee_deadline_date__lt=first)
+        if last is not None:
+            outside |= Q(fee_deadline_date__gt=last)
+        stale |= Q(fee_status=code) & outside
+    return Athlete.objects.filter(stale)
+
+
+def advance_fee_statuses(today=None):
+    """Move stale athletes into their current bucket; returns the number of rows updated."""
+    today = today or date.today()
+    moved = stale_fee_statuses(today).update(fee_status=fee_status_expression(today), updated_at=timezone.now())
+    if moved:
+        bump_versions(ATHLETES)
+    return moved
+
+
+def ensure_fee_statuses_current():
+    """Advance the buckets once per day per cache, before the first read that relies on them."""
+    today = date.today()
+    key = CHECKPOINT_CACHE_KEY.format(day=today.isoformat())
+    if cache.add(key, True, 60 * 60 * 24):
+        try:
+            advance_fee_statuses(today)
+        except Exception:
+            cache.delete(key)
+            raise
+
+
+def fee_status_counts(queryset):
+    """Size of every bucket in ``queryset``, from one grouped query."""
+    counts = dict.fromkeys(Athlete.FEE_STATUS_NAMES.values(), 0)
+    rows = queryset.order_by().values_list('fee_status').annotate(n=Count('pk'))
+    for code, n in rows:
+        counts[Athlete.FEE_STATUS_NAMES[code]] = n
+    return counts
@@ -1,6 +1,5 @@
 from django_filters import rest_framework as filters
-from datetime import date, timedelta
-from .models import Athlete
+from .models import Athlete, Payment
 
 
 class AthleteFilter(filters.FilterSet):
@@ -21,25 +20,28 @@ class AthleteFilter(filters.FilterSet):
         - 'warning': 6-15 days remaining
         - 'critical': 1-5 days remaining
         - 'overdue': 0 or negative days remaining
+
+        Uses the stored fee_status bucket, which the view brings up to date
+        (see gym.fee_status) before filtering.
         """
-        today = date.today()
-        
-        if value == 'safe':
-            # 16+ days remaining
-            target_date = today + timedelta(days=16)
-            return queryset.filter(fee_deadline_date__gte=target_date)
-        elif value == 'warning':
-            # 6-15 days remaining
-            start_date = today + timedelta(days=6)
-            end_date = today + timedelta(days=15)
-            return queryset.filter(fee_deadline_date__gte=start_date, fee_deadline_date__lte=end_date)
-        elif value == 'critical':
-            # 1-5 days remaining
-            start_date = today + timedelta(days=1)
-            end_date = today + timedelta(days=5)
-            return queryset.filter(fee_deadline_date__gte=start_date, fee_deadline_date__lte=end_date)
-        elif value == 'overdue':
-            # 0 or negative days (overdue)
-            return queryset.filter(fee_deadline_date__lt=today)
-        
+        codes = {label: code for code, label in Athlete.FEE_STATUS_NAMES.items()}
+        if value in codes:
+            return queryset.filter(fee_status=codes[value])
         return queryset
+
+
+class PaymentFilter(filters.FilterSet):
+    """
+    Payment ledger filters:
+    - payment_date_after / payment_date_before: inclusive date range
+    - payment_type, athlete (id), gym_type (recorded with the payment)
+    """
+
+    payment_date = filters.DateFromToRangeFilter()
+    payment_type = filters.ChoiceFilter(choices=Payment.PAYMENT_TYPES)
+    athlete = filters.NumberFilter(field_name='athlete_id')
+    gym_type = filters.ChoiceFilter(choices=Athlete.GYM_TYPE_CHOICES)
+
+    class Meta:
+        model = Payment
+        fields = ['payment_date', 'payment_type', 'athlete', 'gym_type']
@@ -0,0 +1,141 @@
+"""
+Athlete photo pipeline.
+
+Uploaded photos are processed off the request thread, in a small local
+worker pool, once the saving transaction commits:
+
+* EXIF orientation is applied and all metadata (GPS, camera, ...) dropped;
+* the image is scaled down to ``MAX_SIZE`` and re-encoded as WebP (JPEG if
+  this Pillow build lacks WebP), replacing the original upload;
+* a fixed set of square thumbnails is written next to it.
+
+The resulting file names are stored in ``Athlete.photo_thumbnails`` together
+with the processed photo name, which makes processing idempotent. Until the
+job finishes the serializer simply has no thumbnails to offer and clients
+keep using ``photo``. ``manage.py process_photos`` backfills existing photos.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .models import Athlete
+from .versions import ATHLETES, bump_versions
+
+logger = logging.getLogger(__name__)
+
+MAX_SIZE = 1600
+THUMBNAIL_SIZES = {'sm': 96, 'md': 480}
+QUALITY = 82
+
+if features.check('webp'):
+    FORMAT, EXTENSION = 'WEBP', '.webp'
+else:
+    FORMAT, EXTENSION = 'JPEG', '.jpg'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.GYM_IMAGE_WORKERS, thread_name_prefix='athlete-photos')
+    return _executor
+
+
+def schedule_photo_processing(athlete_id):
+    """Queue processing of the athlete's current photo (runs inline when GYM_IMAGE_WORKERS is 0)."""
+    if not settings.GYM_IMAGE_WORKERS:
+        return process_athlete_photo(athlete_id)
+    return _get_executor().submit(_run_in_worker, athlete_id)
+
+
+def _run_in_worker(athlete_id):
+    close_old_connections()
+    try:
+        return process_athlete_photo(athlete_id)
+    except Exception:
+        logger.exception('Processing photo of athlete %s failed', athlete_id)
+    finally:
+        connection.close()
+
+
+def _encode(image, size=None, square=False):
+    if square:
+        image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    elif size:
+        image = image.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    # No exif= argument: the encoded file carries no metadata
+    if FORMAT == 'WEBP':
+        image.save(buffer, FORMAT, quality=QUALITY, method=4)
+    else:
+        image.save(buffer, FORMAT, quality=QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _load(name):
+    with default_storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if FORMAT == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if FORMAT == 'WEBP' and 'A' in image.getbands() else 'RGB')
+    return image
+
+
+def process_athlete_photo(athlete_id):
+    """Process the athlete's current photo; returns the stored variants or None."""
+    row = Athlete.objects.filter(pk=athlete_id).values('photo', 'photo_thumbnails').first()
+    if not row or not row['photo']:
+        return None
+    original = row['photo']
+    previous = row['photo_thumbnails'] or {}
+    if previous.get('photo') == original:
+        return previous
+
+    try:
+        image = _load(original)
+    except (OSError, Image.DecompressionBombError) as exc:
+        logger.warning('Cannot process photo %s of athlete %s: %s', original, athlete_id, exc)
+        return None
+
+    stem = os.path.splitext(os.path.basename(original))[0]
+    variants = {'photo': default_storage.save(f'athletes/{stem}{EXTENSION}', ContentFile(_encode(image, MAX_SIZE)))}
+    for label, size in THUMBNAIL_SIZES.items():
+        variants[label] = default_storage.save(
+            f'athletes/thumbs/{stem}_{label}{EXTENSION}', ContentFile(_encode(image, size, square=True)))
+
+    # Only swap in the result if the photo was not replaced meanwhile
+    if not Athlete.objects.filter(pk=athlete_id, photo=original).update(
+            photo=variants['photo'], photo_thumbnails=variants, updated_at=timezone.now()):
+        _delete(variants.values())
+        return None
+    bump_versions(ATHLETES)
+    from .dashboard import invalidate_dashboard_snapshot
+    invalidate_dashboard_snapshot()
+
+    _delete([original] if original != variants['photo'] else [])
+    _delete(name for key, name in previous.items() if name not in variants.values())
+    return variants
+
+
+def _delete(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning('Could not delete %s', name)
@@ -0,0 +1,175 @@
+"""
+Locker (Shelf) assignment service.
+
+Every change to who holds a locker goes through here so that
+``Shelf.assigned_athlete``/``Shelf.status`` and ``Athlete.shelf`` are always
+updated together, inside one transaction.
+
+The claim itself is a conditional UPDATE guarded on the shelf being free (or
+already held by the same athlete), so two clerks racing for one locker cannot
+both win even without row locks. Where the backend supports it, the shelf and
+athlete rows are additionally locked with SELECT ... FOR UPDATE. SQLite has no
+row locks; its writers serialize on the database lock instead, and a claim that
+hits "database is locked" is retried with a short backoff.
+"""
+from datetime import date
+
+from django.db import connection, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from gymsystem.database import retry_when_locked
+
+from .models import Athlete, Shelf
+
+LOCKER_TERMS = ('locker_duration_months', 'locker_price', 'locker_end_date')
+CLEARED_TERMS = {
+    'locker_duration_months': None,
+    'locker_price': None,
+    'locker_end_date': None,
+    'locker_start_date': None,
+}
+
+
+class LockerUnavailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'This locker is already assigned to another athlete.'
+    default_code = 'locker_unavailable'
+
+
+def _lock_rows(*querysets):
+    if connection.features.has_select_for_update:
+        for queryset in querysets:
+            list(queryset.select_for_update().values_list('pk', flat=True))
+
+
+def _changed():
+    from .dashboard import invalidate_dashboard_snapshot
+    from .versions import ATHLETES, SHELVES, bump_versions
+    transaction.on_commit(invalidate_dashboard_snapshot)
+    bump_versions(ATHLETES, SHELVES)
+
+
+def parse_terms(data):
+    """Pick locker terms out of request data, ignoring blanks"""
+    terms = {}
+    if data.get('locker_duration_months'):
+        terms['locker_duration_months'] = int(data.get('locker_duration_months'))
+    if data.get('locker_price'):
+        terms['locker_price'] = float(data.get('locker_price'))
+    if data.get('locker_end_date'):
+        terms['locker_end_date'] = data.get('locker_end_date')
+    return terms
+
+
+def assign_locker(athlete, shelf_id, terms=None):
+    """
+    Give ``shelf_id`` to ``athlete``, releasing any other locker the athlete
+    holds. Raises Shelf.DoesNotExist or LockerUnavailable; on failure nothing
+    is changed.
+    """
+    terms = {key: value for key, value in (terms or {}).items() if key in LOCKER_TERMS}
+
+    def claim():
+        with transaction.atomic():
+            _lock_rows(Shelf.objects.filter(pk=shelf_id), Athlete.objects.filter(pk=athlete.pk))
+
+            current = Athlete.objects.filter(pk=athlete.pk).values_list('shelf_id', flat=True).first()
+            if current and current != shelf_id:
+                _release(current)
+
+            claimed = Shelf.objects.filter(pk=shelf_id).filter(
+                Q(status='available', assigned_athlete__isnull=True) | Q(assigned_athlete=athlete)
+            ).update(
+                status='assigned',
+                assigned_athlete=athlete,
+                locker_start_date=Coalesce(F('locker_start_date'), Value(date.today())),
+                updated_at=timezone.now(),
+                **terms,
+            )
+            if not claimed:
+                if not Shelf.objects.filter(pk=shelf_id).exists():
+                    raise Shelf.DoesNotExist(f'Shelf {shelf_id} does not exist')
+                raise LockerUnavailable()
+
+            if current != shelf_id:
+                Athlete.objects.filter(pk=athlete.pk).update(shelf_id=shelf_id, updated_at=timezone.now())
+            _changed()
+            return Shelf.objects.select_related('assigned_athlete').get(pk=shelf_id)
+
+    shelf = retry_when_locked(claim)
+    _sync_instance(athlete, shelf_id)
+    return shelf
+
+
+def release_locker(shelf_id, athlete=None):
+    """Free ``shelf_id`` and detach it from whoever holds it."""
+    def release():
+        with transaction.atomic():
+            _lock_rows(Shelf.objects.filter(pk=shelf_id))
+            _release(shelf_id)
+            _changed()
+
+    retry_when_locked(release)
+    if athlete is not None:
+        _sync_instance(athlete, None)
+
+
+def release_expired_lockers(shelf_ids, today=None):
+    """
+    Free those of ``shelf_ids`` whose ``locker_end_date`` is before ``today``,
+    with one UPDATE per table. Returns the ids actually released; a locker
+    renewed since it was picked is left alone.
+    """
+    today = today or date.today()
+
+    def release():
+        with transaction.atomic():
+            expired = Shelf.objects.filter(pk__in=shelf_ids, status='assigned', locker_end_date__lt=today)
+            _lock_rows(expired)
+            # Inside the transaction (IMMEDIATE on SQLite) this is what gets updated
+            released = list(expired.values_list('pk', flat=True))
+            if released:
+                now = timezone.now()
+                Shelf.objects.filter(pk__in=released).update(
+                    status='available', assigned_athlete=None, updated_at=now, **CLEARED_TERMS)
+                Athlete.objects.filter(shelf_id__in=released).update(shelf=None, updated_at=now)
+                _changed()
+            return released
+
+    return retry_when_locked(release)
+
+
+def _release(shelf_id):
+    now = timezone.now()
+    Shelf.objects.filter(pk=shelf_id).update(
+        status='available', assigned_athlete=None, updated_at=now, **CLEARED_TERMS)
+    Athlete.objects.filter(shelf_id=shelf_id).update(shelf=None, updated_at=now)
+
+
+def _sync_instance(athlete, shelf_id):
+    # Keep the in-memory athlete (and its change-tracking snapshot) in step
+    athlete.shelf_id = shelf_id
+    loaded = getattr(athlete, '_loaded_values', None)
+    if loaded is not None:
+        loaded['shelf_id'] = shelf_id
+
+
+def mirror_athlete_shelf(athlete, old_shelf_id):
+    """
+    Bring the Shelf side in line after ``athlete.shelf`` was changed and saved
+    directly (admin, scripts). The OneToOne constraint on Athlete.shelf has
+    already ruled out double assignment at this point.
+    """
+    if old_shelf_id:
+        Shelf.objects.filter(pk=old_shelf_id, assigned_athlete=athlete).update(
+            status='available', assigned_athlete=None, updated_at=timezone.now(), **CLEARED_TERMS)
+    if athlete.shelf_id:
+        Shelf.objects.filter(pk=athlete.shelf_id).update(
+            status='assigned', assigned_athlete=athlete, updated_at=timezone.now())
+        if Athlete._meta.get_field('shelf').is_cached(athlete) and athlete.shelf:
+            athlete.shelf.status = 'assigned'
+            athlete.shelf.assigned_athlete = athlete
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from gym.fee_status import advance_fee_statuses, fee_status_counts
+from gym.models import Athlete
+
+
+class Command(BaseCommand):
+    help = (
+        'Move athletes whose fee deadline crossed a bucket boundary into their '
+        'current fee status. Run daily (e.g. from cron shortly after midnight).'
+    )
+
+    def handle(self, *args, **options):
+        moved = advance_fee_statuses()
+        counts = fee_status_counts(Athlete.objects.all())
+        summary = ', '.join(f'{name} {n}' for name, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Updated {moved} athletes ({summary})'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from gym.rollups import rebuild_revenue_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily/monthly RevenueRollup table from the Payment history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild_revenue_rollups(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} revenue rollup rows'))
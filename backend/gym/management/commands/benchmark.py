@@ -0,0 +1,112 @@
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from gym.benchmarks import FLOWS, compare_results, run_flows, throwaway_database
+from gym.management.commands.loadtest import Command as LoadTestCommand
+from gym.rollups import rebuild_revenue_rollups
+from gym.search import rebuild_search_index
+from gym.seed import seed_gym
+
+
+class Command(LoadTestCommand):
+    help = (
+        'Seed a throwaway database and time the key front-desk flows. Prints JSON '
+        '(p50/p95/p99 ms and queries per flow) to stdout; pass --baseline with an '
+        'earlier result to fail on regressions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--athletes', type=int, default=5000)
+        parser.add_argument('--payments-per-athlete', type=float, default=10)
+        parser.add_argument('--shelves', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--flows', help=f'Comma-separated subset of: {", ".join(name for name, _, _ in FLOWS)}')
+        parser.add_argument('--output', help='Also write the JSON result to this file')
+        parser.add_argument('--baseline', help='JSON result of an earlier run to compare against')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed p50 slowdown against the baseline (0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['flows'].split(',')] if options['flows'] else None
+        unknown = set(names or ()) - {name for name, _, _ in FLOWS}
+        if unknown:
+            raise CommandError(f'Unknown flows: {", ".join(sorted(unknown))}')
+        baseline = json.loads(Path(options['baseline']).read_text()) if options['baseline'] else None
+
+        with throwaway_database(on_disk=True):
+            result = self.run(options, names)
+
+        output = json.dumps(result, indent=2)
+        self.stdout.write(output)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n')
+        self.report(result)
+
+        if baseline:
+            regressions = compare_results(result['flows'], baseline['flows'], options['tolerance'])
+            for regression in regressions:
+                self.stderr.write(f'regression: {regression}')
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+            self.stderr.write(self.style.SUCCESS(f'No regressions against {options["baseline"]}'))
+
+    def run(self, options, names):
+        self.stderr.write(f'Seeding {options["athletes"]} athletes...')
+        started = time.perf_counter()
+        seeded = seed_gym(
+            options['athletes'], payments_per_athlete=options['payments_per_athlete'],
+            shelves=options['shelves'], seed=options['seed'],
+        )
+        rebuild_revenue_rollups()
+        rebuild_search_index()
+        seed_seconds = time.perf_counter() - started
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('benchmark'))
+        self.stderr.write('Running flows...')
+        flows = run_flows(client, options['repeat'], options['warmup'], names, options['seed'])
+        return {
+            'meta': {
+                'commit': self.commit(),
+                'when': timezone.now().isoformat(timespec='seconds'),
+                'database': settings.DATABASES['default'].get('PROFILE', connection.vendor),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'seeded': seeded,
+                'seed_seconds': round(seed_seconds, 1),
+                'repeat': options['repeat'],
+            },
+            'flows': flows,
+        }
+
+    @staticmethod
+    def commit():
+        try:
+            completed = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return completed.stdout.strip() or None
+
+    def report(self, result):
+        self.stderr.write('')
+        self.stderr.write(f'{"flow":<20}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}{"errors":>8}')
+        for name, flow in result['flows'].items():
+            self.stderr.write(
+                f'{name:<20}{flow["p50"]:>9.1f}{flow["p95"]:>9.1f}{flow["p99"]:>9.1f}'
+                f'{flow["queries"]:>9}{flow["errors"]:>8}'
+            )
+
@@ -0,0 +1,120 @@
+from importlib import import_module
+import statistics
+import time
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, migrations
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from gym.benchmarks import throwaway_database
+from gym.rollups import rebuild_revenue_rollups
+from gym.seed import seed_gym
+
+ENDPOINTS = [
+    ('athlete list', '/api/athletes/'),
+    ('athlete list by name', '/api/athletes/?ordering=full_name'),
+    ('fee_status=critical', '/api/athletes/?fee_status=critical'),
+    ('gym_type + gym_time', '/api/athletes/?gym_type=bodybuilding&gym_time=night'),
+    ('dashboard', '/api/dashboard/'),
+    ('revenue report', '/api/reports/revenue/?granularity=day'),
+    ('shelf list', '/api/shelves/'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database and time the hot endpoints with and without '
+        'the hot-path indexes (migration 0009), printing query plans for each.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--athletes', type=int, default=100_000)
+        parser.add_argument('--payments', type=int, default=1_000_000,
+                            help='Approximate total number of payments')
+        parser.add_argument('--shelves', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--explain', action='store_true', help='Print query plans')
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.run(options)
+
+    def run(self, options):
+        athletes = options['athletes']
+        self.stdout.write(f'Seeding {athletes} athletes / ~{options["payments"]} payments...')
+        started = time.perf_counter()
+        seed_gym(
+            athletes,
+            payments_per_athlete=options['payments'] / max(athletes, 1),
+            shelves=options['shelves'],
+        )
+        rebuild_revenue_rollups()
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('benchmark'))
+
+        # "Before" goes first; both runs warm up each endpoint untimed
+        indexes = self.hot_path_indexes()
+        self.alter_indexes(indexes, add=False)
+        before = self.measure(client, options, 'without indexes')
+        self.alter_indexes(indexes, add=True)
+        after = self.measure(client, options, 'with indexes')
+
+        self.stdout.write('')
+        self.stdout.write(f'{"endpoint":<24}{"before ms":>12}{"after ms":>12}{"speedup":>10}')
+        for label, _ in ENDPOINTS:
+            b, a = before[label], after[label]
+            self.stdout.write(f'{label:<24}{b:>12.1f}{a:>12.1f}{b / a if a else 0:>9.1f}x')
+
+    def measure(self, client, options, title):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {title} =='))
+        results = {}
+        for label, url in ENDPOINTS:
+            client.get(url)
+            timings = []
+            for _ in range(options['repeat']):
+                cache.clear()
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, (url, response.status_code)
+            results[label] = statistics.median(timings)
+            self.stdout.write(f'{label:<24}{results[label]:>9.1f} ms  {len(ctx.captured_queries)} queries')
+            if options['explain']:
+                for query in ctx.captured_queries:
+                    self.explain(query['sql'])
+        return results
+
+    def explain(self, sql):
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            plan = [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+        self.stdout.write(f'    {sql[:120]}')
+        for line in plan:
+            self.stdout.write(f'      {line}')
+
+    @staticmethod
+    def hot_path_indexes():
+        """``(model, index)`` for every index added by migration 0009."""
+        migration = import_module('gym.migrations.0009_hot_path_indexes').Migration
+        return [
+            (apps.get_model('gym', operation.model_name), operation.index)
+            for operation in migration.operations
+            if isinstance(operation, migrations.AddIndex)
+        ]
+
+    @staticmethod
+    def alter_indexes(indexes, add):
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                if add:
+                    editor.add_index(model, index)
+                else:
+                    editor.remove_index(model, index)
@@ -0,0 +1,72 @@
+import statistics
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from gym.benchmarks import throwaway_database
+from gym.dashboard import build_dashboard_snapshot
+from gym.models import Athlete, Payment, Shelf
+from gym.rollups import rebuild_revenue_rollups
+from gym.seed import seed_gym
+from gym.serializers import AthleteSerializer, PaymentSerializer, ShelfSerializer
+from gymsystem import renderers
+from gymsystem.renderers import FastJSONParser, FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway database and time rendering and parsing of large API '
+        'payloads (athlete list, shelves, payments, dashboard) with DRF\'s JSON '
+        'classes and the orjson-backed ones, checking the output is identical.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--athletes', type=int, default=5000)
+        parser.add_argument('--shelves', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            raise CommandError('orjson is not installed; both renderers would use the stdlib json module')
+        with throwaway_database():
+            self.run(options)
+
+    def run(self, options):
+        self.stdout.write(f'Seeding {options["athletes"]} athletes...')
+        seed_gym(options['athletes'], payments_per_athlete=4, shelves=options['shelves'])
+        rebuild_revenue_rollups()
+
+        payloads = [
+            ('athlete list', AthleteSerializer(Athlete.objects.all(), many=True).data),
+            ('shelf list', ShelfSerializer(Shelf.objects.select_related('assigned_athlete'), many=True).data),
+            ('payments', PaymentSerializer(Payment.objects.all()[:20000], many=True).data),
+            ('dashboard', build_dashboard_snapshot()),
+        ]
+
+        self.stdout.write('')
+        self.stdout.write(f'{"payload":<16}{"KB":>8}{"render ms":>12}{"fast ms":>10}{"parse ms":>12}{"fast ms":>10}')
+        for label, data in payloads:
+            body = JSONRenderer().render(data)
+            if FastJSONRenderer().render(data) != body:
+                raise CommandError(f'{label}: FastJSONRenderer output differs from JSONRenderer')
+            if FastJSONParser().parse(BytesIO(body)) != JSONParser().parse(BytesIO(body)):
+                raise CommandError(f'{label}: FastJSONParser result differs from JSONParser')
+
+            render = self.time(lambda: JSONRenderer().render(data), options['repeat'])
+            fast_render = self.time(lambda: FastJSONRenderer().render(data), options['repeat'])
+            parse = self.time(lambda: JSONParser().parse(BytesIO(body)), options['repeat'])
+            fast_parse = self.time(lambda: FastJSONParser().parse(BytesIO(body)), options['repeat'])
+            self.stdout.write(
+                f'{label:<16}{len(body) / 1024:>8.0f}{render:>12.1f}{fast_render:>10.1f}{parse:>12.1f}{fast_parse:>10.1f}')
+
+    @staticmethod
+    def time(call, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
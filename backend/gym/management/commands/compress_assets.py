@@ -0,0 +1,51 @@
+import gzip
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gymsystem.spa import brotli
+
+COMPRESSIBLE = ('.js', '.mjs', '.css', '.html', '.svg', '.json', '.map', '.txt', '.wasm')
+MIN_SIZE = 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Write .gz (and .br, if the brotli package is installed) siblings for the '
+        'built frontend assets so they can be served pre-compressed. Run after '
+        '"npm run build" and collectstatic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=settings.SPA_ASSETS_DIR)
+        parser.add_argument('--force', action='store_true', help='Recompress files that already have variants')
+
+    def handle(self, *args, **options):
+        root = Path(options['path'])
+        if not root.is_dir():
+            self.stderr.write(f'{root} does not exist; build the frontend first.')
+            return
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed; writing gzip variants only.'))
+
+        written = 0
+        for path in sorted(root.rglob('*')):
+            if not path.is_file() or path.suffix not in COMPRESSIBLE or path.stat().st_size < MIN_SIZE:
+                continue
+            data = None
+            for suffix, compress in (('.gz', lambda d: gzip.compress(d, 9, mtime=0)),
+                                     ('.br', brotli.compress if brotli else None)):
+                target = path.with_name(path.name + suffix)
+                if compress is None or (target.exists() and not options['force']):
+                    continue
+                data = data if data is not None else path.read_bytes()
+                compressed = compress(data)
+                if len(compressed) >= len(data):
+                    continue
+                tmp = target.with_name(target.name + '.tmp')
+                tmp.write_bytes(compressed)
+                os.replace(tmp, target)
+                written += 1
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} compressed file(s) under {root}'))
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+
+from gym.benchmarks import throwaway_database
+from gym.events import get_broker
+from gym.management.commands.loadtest import Command as LoadTestCommand
+from gym.models import Shelf
+
+
+class Command(LoadTestCommand):
+    help = (
+        'Open many /api/events/ streams against the ASGI application in this process, '
+        'write shelves while they listen, and report how long each change took to reach every subscriber.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=500)
+        parser.add_argument('--events', type=int, default=50, help='Shelf writes to publish')
+        parser.add_argument('--interval', type=float, default=0.02, help='Seconds between writes')
+        parser.add_argument('--poll-interval', type=float, default=10,
+                            help='Polling period the streams replace, for the request-rate comparison')
+        parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+
+    def handle(self, *args, **options):
+        with throwaway_database(on_disk=True):
+            token = str(AccessToken.for_user(User.objects.create_user('events-loadtest')))
+            connection.close()
+            result = asyncio.run(self.run(token, options))
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.report(result)
+
+    async def run(self, token, options):
+        application = get_asgi_application()
+        broker = get_broker()
+        sent = {}
+        # (pk, arrival) per subscriber; a change can arrive before its
+        # writer has recorded the pk, so latencies are worked out at the end
+        deliveries = []
+        resyncs = []
+        statuses = []
+        disconnect = asyncio.Event()
+
+        async def subscriber():
+            buffer = b''
+            received = set()
+
+            async def receive():
+                if not getattr(receive, 'started', False):
+                    receive.started = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                nonlocal buffer
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+                    return
+                buffer += message.get('body', b'')
+                *frames, buffer = buffer.split(b'\n\n')
+                for frame in frames:
+                    if frame.startswith(b'event: resync'):
+                        resyncs.append(frame)
+                    elif frame.startswith(b'event: change'):
+                        event = json.loads(frame.split(b'data: ', 1)[1])
+                        for pk in event.get('saved', ()):
+                            if pk not in received:
+                                received.add(pk)
+                                deliveries.append((pk, time.perf_counter()))
+
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': '/api/events/', 'raw_path': b'/api/events/',
+                'query_string': b'resources=shelves',
+                'headers': [(b'host', b'localhost'), (b'accept', b'text/event-stream'),
+                            (b'authorization', f'Bearer {token}'.encode())],
+                'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+            }
+            await application(scope, receive, send)
+
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(subscriber()) for _ in range(options['subscribers'])]
+        while broker.subscriber_count < options['subscribers']:
+            if len(statuses) == options['subscribers'] or any(task.done() for task in tasks):
+                break
+            await asyncio.sleep(0.05)
+        connect_seconds = time.perf_counter() - started
+
+        def write_shelves():
+            try:
+                for n in range(options['events']):
+                    moment = time.perf_counter()
+                    shelf = Shelf.objects.create(shelf_number=f'LT{n}')
+                    sent[shelf.pk] = moment
+                    time.sleep(options['interval'])
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(None, write_shelves)
+        expected = options['events'] * broker.subscriber_count
+        deadline = time.perf_counter() + 10
+        while len(deliveries) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        latencies = [(arrival - sent[pk]) * 1000 for pk, arrival in deliveries if pk in sent]
+
+        subscribers = broker.subscriber_count
+        disconnect.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return {
+            'subscribers': subscribers,
+            'rejected': sum(1 for status in statuses if status != 200),
+            'connect_seconds': round(connect_seconds, 2),
+            'events': options['events'],
+            'deliveries': len(latencies),
+            'missed': max(expected - len(latencies), 0),
+            'resyncs': len(resyncs),
+            'seconds': round(elapsed, 2),
+            'deliveries_per_second': round(len(latencies) / elapsed, 1),
+            'poll_interval': options['poll_interval'],
+            'polling_requests_per_second': round(subscribers / options['poll_interval'], 1),
+            **self.percentiles(latencies),
+        }
+
+    def report(self, result):
+        self.stdout.write('')
+        self.stdout.write(
+            f'{result["subscribers"]} subscribers connected in {result["connect_seconds"]}s '
+            f'({result["rejected"]} rejected)'
+        )
+        self.stdout.write(
+            f'{result["events"]} changes -> {result["deliveries"]} deliveries in {result["seconds"]}s, '
+            f'{result["missed"]} missed, {result["resyncs"]} resyncs'
+        )
+        self.stdout.write(
+            f'delivery latency  p50 {result["p50"]:.1f} ms  p95 {result["p95"]:.1f} ms  p99 {result["p99"]:.1f} ms'
+        )
+        self.stdout.write(
+            f'{result["deliveries_per_second"]} frames/s pushed; polling every {result["poll_interval"]:g}s '
+            f'would cost {result["polling_requests_per_second"]} requests/s whether or not anything changed'
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gym.bulk import CSV, NDJSON, detect_format, import_athletes, iter_rows
+
+
+class Command(BaseCommand):
+    help = 'Import athletes from a CSV or NDJSON file in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=[CSV, NDJSON], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(filename=options['path'])
+        try:
+            source = open(options['path'], 'rb')
+        except OSError as exc:
+            raise CommandError(exc)
+
+        with source:
+            result = import_athletes(iter_rows(source, fmt), batch_size=options['batch_size'])
+
+        for error in result['errors']:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['created']} athletes ({len(result['errors'])} rows rejected)"))
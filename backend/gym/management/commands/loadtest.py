@@ -0,0 +1,187 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+
+from gym.benchmarks import percentiles, throwaway_database
+from gym.models import Athlete
+from gym.rollups import rebuild_revenue_rollups
+from gym.search import rebuild_search_index
+from gym.seed import seed_gym
+from gymsystem.database import PROFILES
+
+# (name, weight, is_write)
+OPERATIONS = [
+    ('list athletes', 30, False),
+    ('search athletes', 10, False),
+    ('athlete detail', 25, False),
+    ('dashboard', 10, False),
+    ('renew fee', 15, True),
+    ('register athlete', 5, True),
+    ('edit athlete', 5, True),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure mixed read/write throughput on the athlete and payment endpoints '
+        'against a throwaway copy of the configured database. Use --profiles to '
+        'run once per GYM_DB_PROFILE and compare.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', help=f'Comma-separated profiles to compare ({", ".join(PROFILES)})')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+        parser.add_argument('--athletes', type=int, default=2000)
+        parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+
+    def handle(self, *args, **options):
+        if options['profiles']:
+            return self.compare(options)
+
+        with throwaway_database(on_disk=True):
+            result = self.run(options)
+
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+        else:
+            self.report([result])
+
+    def run(self, options):
+        seed_gym(options['athletes'], payments_per_athlete=4, shelves=0)
+        rebuild_revenue_rollups()
+        rebuild_search_index()
+        user = User.objects.create_user('loadtest')
+        athlete_ids = list(Athlete.objects.values_list('pk', flat=True))
+        connection.close()
+
+        stop_at = time.perf_counter() + options['duration']
+        samples = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            client = APIClient()
+            client.force_authenticate(user)
+            names, weights, _ = zip(*OPERATIONS)
+            local = []
+            try:
+                while time.perf_counter() < stop_at:
+                    name = rng.choices(names, weights=weights)[0]
+                    started = time.perf_counter()
+                    try:
+                        response = self.perform(client, name, rng, athlete_ids)
+                        ok = response.status_code < 400
+                    except Exception as exc:
+                        ok = False
+                        response = exc
+                    local.append((name, (time.perf_counter() - started) * 1000, ok))
+                    if not ok:
+                        with lock:
+                            errors.append(f'{name}: {getattr(response, "status_code", response)}')
+            finally:
+                connection.close()
+                with lock:
+                    samples.extend(local)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        operations = {}
+        for name, _, is_write in OPERATIONS:
+            timings = [ms for op, ms, _ in samples if op == name]
+            operations[name] = {'count': len(timings), 'write': is_write, **self.percentiles(timings)}
+        return {
+            'profile': settings.DATABASES['default'].get('PROFILE', connection.vendor),
+            'threads': options['threads'],
+            'seconds': round(elapsed, 2),
+            'requests': len(samples),
+            'throughput': round(len(samples) / elapsed, 1),
+            'writes': sum(1 for op, _, _ in samples if dict((n, w) for n, _, w in OPERATIONS)[op]),
+            'errors': len(errors),
+            'error_samples': errors[:5],
+            **self.percentiles([ms for _, ms, _ in samples]),
+            'operations': operations,
+        }
+
+    def perform(self, client, name, rng, athlete_ids):
+        pk = rng.choice(athlete_ids)
+        if name == 'list athletes':
+            return client.get('/api/athletes/')
+        if name == 'search athletes':
+            return client.get('/api/athletes/', {'search': rng.choice(['ah', 'ali', 'kar', '07', '5'])})
+        if name == 'athlete detail':
+            return client.get(f'/api/athletes/{pk}/')
+        if name == 'dashboard':
+            return client.get('/api/dashboard/')
+        if name == 'renew fee':
+            return client.post(f'/api/athletes/{pk}/renew/', {}, format='json')
+        if name == 'register athlete':
+            return client.post('/api/athletes/', {
+                'full_name': f'Load Test {rng.randrange(10**6)}',
+                'gym_type': rng.choice(['fitness', 'bodybuilding']),
+                'gym_time': rng.choice(['morning', 'afternoon', 'night']),
+            }, format='json')
+        return client.patch(f'/api/athletes/{pk}/', {'notes': f'note {rng.randrange(1000)}'}, format='json')
+
+    percentiles = staticmethod(percentiles)
+
+    def compare(self, options):
+        results = []
+        for profile in options['profiles'].split(','):
+            profile = profile.strip()
+            if profile not in PROFILES:
+                raise CommandError(f'Unknown profile {profile!r}; choose from {", ".join(PROFILES)}')
+            self.stdout.write(f'Running {profile}...')
+            command = [
+                sys.executable, sys.argv[0], 'loadtest', '--json',
+                '--threads', str(options['threads']),
+                '--duration', str(options['duration']),
+                '--athletes', str(options['athletes']),
+            ]
+            completed = subprocess.run(
+                command, env={**os.environ, 'GYM_DB_PROFILE': profile},
+                capture_output=True, text=True,
+            )
+            if completed.returncode:
+                raise CommandError(f'{profile} run failed:\n{completed.stderr}')
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+        else:
+            self.report(results)
+
+    def report(self, results):
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"profile":<14}{"req/s":>9}{"requests":>10}{"writes":>8}{"errors":>8}'
+            f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+        )
+        for r in results:
+            self.stdout.write(
+                f'{r["profile"]:<14}{r["throughput"]:>9.1f}{r["requests"]:>10}{r["writes"]:>8}{r["errors"]:>8}'
+                f'{r["p50"]:>9.1f}{r["p95"]:>9.1f}{r["p99"]:>9.1f}'
+            )
+        for r in results:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{r["profile"]} by operation'))
+            for name, op in r['operations'].items():
+                self.stdout.write(f'  {name:<18}{op["count"]:>7}{op["p50"]:>9.1f}{op["p95"]:>9.1f}{op["p99"]:>9.1f}')
+            for sample in r['error_samples']:
+                self.stdout.write(self.style.WARNING(f'  error: {sample}'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from gym.images import process_athlete_photo
+from gym.models import Athlete
+
+
+class Command(BaseCommand):
+    help = 'Resize, strip and thumbnail athlete photos that have not been processed yet'
+
+    def handle(self, *args, **options):
+        processed = 0
+        pending = Athlete.objects.exclude(photo='').exclude(photo__isnull=True).values_list('pk', flat=True)
+        for athlete_id in pending.iterator():
+            # Already-processed photos are skipped inside process_athlete_photo
+            if process_athlete_photo(athlete_id):
+                processed += 1
+        self.stdout.write(self.style.SUCCESS(f'{processed} athlete photos up to date'))
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gym.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than GYM_SYNC_TOMBSTONE_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.GYM_SYNC_TOMBSTONE_DAYS)
+
+    def handle(self, *args, **options):
+        removed = prune_tombstones(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} tombstones'))
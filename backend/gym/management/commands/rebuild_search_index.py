@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from gym.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Repopulate the athlete full-text search index from the Athlete table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        indexed = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} athletes'))
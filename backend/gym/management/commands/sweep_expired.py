@@ -0,0 +1,50 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from gym.sweeps import sweep_expired
+
+
+class Command(BaseCommand):
+    help = (
+        'Deactivate athletes long past their fee deadline and release lockers past '
+        'their end date, in batches. Run daily (e.g. from cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-days', type=int, default=settings.GYM_SWEEP_GRACE_DAYS,
+                            help='Days past the fee deadline before an athlete is deactivated')
+        parser.add_argument('--batch-size', type=int, default=settings.GYM_SWEEP_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+        parser.add_argument('--report', help='Append a JSON-lines report (changed ids per batch, then a summary)')
+
+    def handle(self, *args, **options):
+        report_file = open(options['report'], 'a') if options['report'] else None
+        started = timezone.now()
+
+        def write_batch(kind, ids):
+            # Written as it goes, so the report never holds a whole roster in memory
+            if report_file:
+                report_file.write(json.dumps({'kind': kind, 'ids': ids}) + '\n')
+
+        try:
+            summary = sweep_expired(
+                grace_days=options['grace_days'], batch_size=options['batch_size'],
+                dry_run=options['dry_run'], on_batch=write_batch,
+            )
+            summary['started_at'] = started.isoformat()
+            summary['seconds'] = round((timezone.now() - started).total_seconds(), 2)
+            if report_file:
+                report_file.write(json.dumps({'kind': 'summary', **summary}) + '\n')
+        finally:
+            if report_file:
+                report_file.close()
+
+        prefix = 'Would deactivate' if options['dry_run'] else 'Deactivated'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {summary["athletes_deactivated"]} athletes and '
+            f'{"release" if options["dry_run"] else "released"} {summary["lockers_released"]} expired lockers '
+            f'in {summary["seconds"]}s'
+        ))
@@ -0,0 +1,106 @@
+# Generated by Django 5.2.10 on 2026-10-18 05:59
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Payment = apps.get_model("gym", "Payment")
+    RevenueRollup = apps.get_model("gym", "RevenueRollup")
+    fields = ("period", "payment_type", "athlete__gym_type")
+    for granularity, period in (
+        ("day", models.F("payment_date")),
+        ("month", TruncMonth("payment_date")),
+    ):
+        rows = (
+            Payment.objects.order_by()
+            .annotate(period=period)
+            .values(*fields)
+            .annotate(total=Sum("amount"), n=Count("pk"))
+        )
+        RevenueRollup.objects.bulk_create(
+            [
+                RevenueRollup(
+                    granularity=granularity,
+                    period_start=row["period"],
+                    payment_type=row["payment_type"],
+                    gym_type=row["athlete__gym_type"],
+                    total=row["total"],
+                    payment_count=row["n"],
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0007_fix_debt_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevenueRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("day", "Day"), ("month", "Month")], max_length=10
+                    ),
+                ),
+                ("period_start", models.DateField()),
+                (
+                    "payment_type",
+                    models.CharField(
+                        choices=[
+                            ("registration", "Registration"),
+                            ("renewal", "Renewal"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "gym_type",
+                    models.CharField(
+                        choices=[
+                            ("fitness", "Fitness"),
+                            ("bodybuilding", "Bodybuilding"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("payment_count", models.IntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["granularity", "period_start"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=(
+                            "granularity",
+                            "period_start",
+                            "payment_type",
+                            "gym_type",
+                        ),
+                        name="unique_revenue_rollup_bucket",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
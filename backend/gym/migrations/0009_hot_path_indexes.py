@@ -0,0 +1,72 @@
+# Generated by Django 5.2.10 on 2026-10-18 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0008_revenuerollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="athlete",
+            index=models.Index(
+                fields=["registration_date", "id"], name="athlete_registered_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="athlete",
+            index=models.Index(
+                fields=["full_name", "id"], name="athlete_full_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="athlete",
+            index=models.Index(
+                fields=["fee_deadline_date", "id"], name="athlete_fee_deadline_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="athlete",
+            index=models.Index(
+                fields=["is_active", "id"], name="athlete_is_active_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="athlete",
+            index=models.Index(
+                fields=["is_active", "fee_deadline_date"],
+                name="athlete_active_deadline_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="athlete",
+            index=models.Index(
+                fields=["gym_type", "registration_date"],
+                name="athlete_type_registered_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="athlete",
+            index=models.Index(
+                fields=["gym_time", "registration_date"],
+                name="athlete_time_registered_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["payment_date"], name="payment_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["athlete", "payment_date"], name="payment_athlete_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shelf",
+            index=models.Index(fields=["status"], name="shelf_status_idx"),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Search index for athlete type-ahead (see gym/search.py)
+
+from django.db import migrations
+
+SQLITE_CREATE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS gym_athlete_fts USING fts5(
+    full_name,
+    father_name,
+    phone,
+    phone_reversed,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+POSTGRES_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS athlete_full_name_trgm_idx "
+    "ON gym_athlete USING gin (UPPER(full_name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS athlete_father_name_trgm_idx "
+    "ON gym_athlete USING gin (UPPER(father_name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS athlete_contact_number_trgm_idx "
+    "ON gym_athlete USING gin (contact_number gin_trgm_ops)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS athlete_full_name_trgm_idx",
+    "DROP INDEX IF EXISTS athlete_father_name_trgm_idx",
+    "DROP INDEX IF EXISTS athlete_contact_number_trgm_idx",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(SQLITE_CREATE)
+        Athlete = apps.get_model("gym", "Athlete")
+        rows = Athlete.objects.values_list(
+            "pk", "full_name", "father_name", "contact_number"
+        )
+        for pk, full_name, father_name, number in rows.iterator():
+            digits = "".join(ch for ch in number if ch.isdigit())
+            schema_editor.execute(
+                "INSERT INTO gym_athlete_fts "
+                "(rowid, full_name, father_name, phone, phone_reversed) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                [pk, full_name, father_name, digits, digits[::-1]],
+            )
+    elif vendor == "postgresql":
+        for statement in POSTGRES_CREATE:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS gym_athlete_fts")
+    elif vendor == "postgresql":
+        for statement in POSTGRES_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0009_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
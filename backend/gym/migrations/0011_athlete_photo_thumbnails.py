@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0010_athlete_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="athlete",
+            name="photo_thumbnails",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.10 on 2026-10-18 06:18
+
+from datetime import date, timedelta
+
+from django.db import migrations, models
+
+
+def populate_fee_status(apps, schema_editor):
+    Athlete = apps.get_model("gym", "Athlete")
+    today = date.today()
+    Athlete.objects.update(
+        fee_status=models.Case(
+            models.When(fee_deadline_date__gte=today + timedelta(days=16), then=3),
+            models.When(fee_deadline_date__gte=today + timedelta(days=6), then=2),
+            models.When(fee_deadline_date__gte=today + timedelta(days=1), then=1),
+            default=0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0011_athlete_photo_thumbnails"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="athlete",
+            name="fee_status",
+            field=models.PositiveSmallIntegerField(
+                choices=[(0, "Overdue"), (1, "Critical"), (2, "Warning"), (3, "Safe")],
+                default=3,
+                editable=False,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="athlete",
+            index=models.Index(
+                fields=["fee_status", "id"], name="athlete_fee_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="athlete",
+            index=models.Index(
+                fields=["fee_status", "fee_deadline_date"],
+                name="athlete_fee_status_due_idx",
+            ),
+        ),
+        migrations.RunPython(populate_fee_status, migrations.RunPython.noop),
+    ]
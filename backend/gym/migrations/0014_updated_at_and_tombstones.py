@@ -0,0 +1,75 @@
+# Generated by Django 5.2.10 on 2026-10-18 06:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0013_resourceversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="athlete",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="shelf",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("resource", models.CharField(max_length=30)),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "deleted_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["deleted_at", "id"], name="tombstone_deleted_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="athlete",
+            index=models.Index(
+                fields=["updated_at", "id"], name="athlete_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["updated_at", "id"], name="payment_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shelf",
+            index=models.Index(fields=["updated_at", "id"], name="shelf_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.10 on 2026-10-18 06:39
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_payment_summary(apps, schema_editor):
+    Athlete = apps.get_model("gym", "Athlete")
+    Payment = apps.get_model("gym", "Payment")
+    payments = (
+        Payment.objects.filter(athlete=models.OuterRef("pk"))
+        .order_by()
+        .values("athlete")
+    )
+    Athlete.objects.update(
+        payment_count=Coalesce(
+            models.Subquery(payments.annotate(n=models.Count("pk")).values("n")), 0
+        ),
+        total_paid=Coalesce(
+            models.Subquery(
+                payments.annotate(total=models.Sum("amount")).values("total")
+            ),
+            models.Value(Decimal("0")),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+        last_payment_date=models.Subquery(
+            payments.annotate(last=models.Max("payment_date")).values("last")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0014_updated_at_and_tombstones"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="athlete",
+            name="last_payment_date",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="athlete",
+            name="payment_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="athlete",
+            name="total_paid",
+            field=models.DecimalField(
+                decimal_places=2, default=0, editable=False, max_digits=12
+            ),
+        ),
+        migrations.RunPython(populate_payment_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.10 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth
+
+
+def populate_gym_type(apps, schema_editor):
+    Athlete = apps.get_model("gym", "Athlete")
+    Payment = apps.get_model("gym", "Payment")
+    RevenueRollup = apps.get_model("gym", "RevenueRollup")
+    Payment.objects.update(
+        gym_type=models.Subquery(
+            Athlete.objects.filter(pk=models.OuterRef("athlete_id")).values(
+                "gym_type"
+            )[:1]
+        )
+    )
+
+    # Earlier reversals used the athlete's current gym type, which could leave
+    # buckets skewed; rebuild them from the payments' recorded type
+    RevenueRollup.objects.all().delete()
+    payments = Payment.objects.order_by()
+    for granularity, period in (
+        ("day", models.F("payment_date")),
+        ("month", TruncMonth("payment_date")),
+    ):
+        rows = (
+            payments.annotate(period=period)
+            .values("period", "payment_type", "gym_type")
+            .annotate(total=models.Sum("amount"), n=models.Count("pk"))
+        )
+        RevenueRollup.objects.bulk_create(
+            [
+                RevenueRollup(
+                    granularity=granularity,
+                    period_start=row["period"],
+                    payment_type=row["payment_type"],
+                    gym_type=row["gym_type"],
+                    total=row["total"],
+                    payment_count=row["n"],
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gym", "0015_athlete_payment_summary"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payment",
+            name="gym_type",
+            field=models.CharField(
+                choices=[("fitness", "Fitness"), ("bodybuilding", "Bodybuilding")],
+                default="",
+                editable=False,
+                max_length=20,
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_gym_type, migrations.RunPython.noop),
+    ]
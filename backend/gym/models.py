@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import pre_delete
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
 class Athlete(models.Model):
     GYM_TYPE_CHOICES = [
@@ -13,10 +16,23 @@ class Athlete(models.Model):
         ('afternoon', 'Afternoon'),
         ('night', 'Night'),
     ]
+    # Fee status buckets, stored as numbers so they sort by urgency
+    FEE_OVERDUE, FEE_CRITICAL, FEE_WARNING, FEE_SAFE = 0, 1, 2, 3
+    FEE_STATUS_CHOICES = [
+        (FEE_OVERDUE, 'Overdue'),
+        (FEE_CRITICAL, 'Critical'),
+        (FEE_WARNING, 'Warning'),
+        (FEE_SAFE, 'Safe'),
+    ]
+    FEE_STATUS_NAMES = {code: label.lower() for code, label in FEE_STATUS_CHOICES}
+    # Lowest days_left of each bucket above overdue (overdue: 0 or negative)
+    FEE_STATUS_THRESHOLDS = [(FEE_SAFE, 16), (FEE_WARNING, 6), (FEE_CRITICAL, 1)]
 
     full_name = models.CharField(max_length=100)
     father_name = models.CharField(max_length=100, blank=True)
     photo = models.ImageField(upload_to='athletes/', blank=True, null=True)
+    # Processed photo and thumbnail file names, filled in by gym.images
+    photo_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
     registration_date = models.DateTimeField(auto_now_add=True)
     fee_start_date = models.DateField(auto_now_add=True)
     fee_deadline_date = models.DateField()
@@ -29,37 +45,158 @@ class Athlete(models.Model):
     notes = models.TextField(blank=True)
     shelf = models.OneToOneField('Shelf', on_delete=models.SET_NULL, null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    # Bucket of fee_deadline_date relative to today; kept current by gym.fee_status
+    fee_status = models.PositiveSmallIntegerField(choices=FEE_STATUS_CHOICES, default=FEE_SAFE, editable=False)
+    # Payment history summary, maintained by gym.payment_summary
+    payment_count = models.PositiveIntegerField(default=0, editable=False)
+    total_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    last_payment_date = models.DateField(null=True, blank=True, editable=False)
+    # Set on every write, including queryset/bulk updates (see gym.sync)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # List ordering + keyset pagination (ordering fields followed by id)
+            models.Index(fields=['registration_date', 'id'], name='athlete_registered_idx'),
+            models.Index(fields=['full_name', 'id'], name='athlete_full_name_idx'),
+            models.Index(fields=['fee_deadline_date', 'id'], name='athlete_fee_deadline_idx'),
+            models.Index(fields=['is_active', 'id'], name='athlete_is_active_idx'),
+            # Dashboard alerts: is_active AND fee_deadline_date <= ...
+            models.Index(fields=['is_active', 'fee_deadline_date'], name='athlete_active_deadline_idx'),
+            # gym_type / gym_time filters combined with the default ordering
+            models.Index(fields=['gym_type', 'registration_date'], name='athlete_type_registered_idx'),
+            models.Index(fields=['gym_time', 'registration_date'], name='athlete_time_registered_idx'),
+            models.Index(fields=['fee_status', 'id'], name='athlete_fee_status_idx'),
+            # Finding rows whose stored bucket has gone stale
+            models.Index(fields=['fee_status', 'fee_deadline_date'], name='athlete_fee_status_due_idx'),
+            models.Index(fields=['updated_at', 'id'], name='athlete_updated_idx'),
+        ]
+
+    BASE_FEES = {
+        'fitness': 1000,
+        'bodybuilding': 700,
+    }
+
+    @classmethod
+    def calculate_final_fee(cls, gym_type, discount=0, debt=0):
+        """Monthly fee after discount and outstanding debt"""
+        return cls.BASE_FEES.get(gym_type, cls.BASE_FEES['bodybuilding']) - discount - debt
+
+    @classmethod
+    def fee_status_for(cls, fee_deadline_date, today=None):
+        from datetime import date
+        days_left = (fee_deadline_date - (today or date.today())).days
+        for code, lowest in cls.FEE_STATUS_THRESHOLDS:
+            if days_left >= lowest:
+                return code
+        return cls.FEE_OVERDUE
 
     @property
     def days_left(self):
         from datetime import date
         return (self.fee_deadline_date - date.today()).days
+
+    @property
+    def fee_status_name(self):
+        """Live bucket name (safe/warning/critical/overdue)"""
+        return self.FEE_STATUS_NAMES[self.fee_status_for(self.fee_deadline_date)]
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._snapshot()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # The refreshed values are what the row now holds; compare against those
+        current = self._snapshot()
+        if fields is None:
+            self._loaded_values = current
+            return
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is not None:
+            for name in fields:
+                attname = self._meta.get_field(name).attname
+                if attname in current:
+                    loaded[attname] = current[attname]
+
+    def _snapshot(self):
+        """Current value of every loaded (non-deferred) concrete field, keyed by attname"""
+        values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname not in self.__dict__:
+                continue
+            value = getattr(self, field.attname)
+            if isinstance(value, FieldFile):
+                value = value.name
+            elif isinstance(value, dict):
+                value = dict(value)
+            values[field.attname] = value
+        return values
+
+    def get_changed_fields(self):
+        """
+        Names of fields modified since the row was loaded, or None when the
+        instance was not loaded from the database (nothing to compare to).
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        current = self._snapshot()
+        # A deferred field assigned without being loaded counts as changed
+        return [
+            field.name for field in self._meta.concrete_fields
+            if field.attname in current
+            and (field.attname not in loaded or current[field.attname] != loaded[field.attname])
+        ]
+
     def save(self, *args, **kwargs):
-        # Get the old instance if updating
-        if self.pk:
-            try:
-                old_instance = Athlete.objects.get(pk=self.pk)
-                old_shelf = old_instance.shelf
-            except Athlete.DoesNotExist:
-                old_shelf = None
+        loaded = getattr(self, '_loaded_values', None)
+        creating = self._state.adding or not self.pk
+
+        update_fields = kwargs.get('update_fields')
+        if self.fee_deadline_date and (update_fields is None or 'fee_deadline_date' in update_fields):
+            deadline = self._meta.get_field('fee_deadline_date').to_python(self.fee_deadline_date)
+            self.fee_status = self.fee_status_for(deadline)
+            if update_fields is not None:
+                kwargs['update_fields'] = [*update_fields, 'fee_status']
+
+        if creating:
+            old_shelf_id = None
+        elif loaded is not None:
+            old_shelf_id = loaded.get('shelf_id')
+            if kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+                # Write only the columns that actually changed
+                changed = self.get_changed_fields()
+                if not changed:
+                    return
+                kwargs['update_fields'] = changed
         else:
-            old_shelf = None
-        
-        # Save the athlete first
+            old_shelf_id = Athlete.objects.filter(pk=self.pk).values_list('shelf_id', flat=True).first()
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'updated_at' not in update_fields:
+            # auto_now only applies to the columns being written
+            kwargs['update_fields'] = [*update_fields, 'updated_at']
+        shelf_changed = old_shelf_id != self.shelf_id and (
+            update_fields is None or {'shelf', 'shelf_id'} & set(update_fields))
+
+        old_photo = loaded.get('photo') if loaded is not None and not creating else None
+
         super().save(*args, **kwargs)
-        
-        # Update old shelf status if it was changed
-        if old_shelf and old_shelf != self.shelf:
-            old_shelf.status = 'available'
-            old_shelf.assigned_athlete = None
-            old_shelf.save()
-        
-        # Update new shelf status
-        if self.shelf:
-            self.shelf.status = 'assigned'
-            self.shelf.assigned_athlete = self
-            self.shelf.save()
+        self._loaded_values = self._snapshot()
+
+        # New upload: resize, strip and thumbnail it once the row is committed
+        if self.photo and self.photo.name != old_photo and (update_fields is None or 'photo' in update_fields):
+            from .images import schedule_photo_processing
+            athlete_id = self.pk
+            transaction.on_commit(lambda: schedule_photo_processing(athlete_id))
+
+        # Locker bookkeeping only when the assignment itself changed
+        if shelf_changed:
+            from .lockers import mirror_athlete_shelf
+            mirror_athlete_shelf(self, old_shelf_id)
 
     def __str__(self):
         return self.full_name
@@ -74,8 +211,25 @@ class Payment(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_date = models.DateField(auto_now_add=True)
     payment_type = models.CharField(max_length=20, choices=PAYMENT_TYPES)
+    # The athlete's gym type when the payment was taken: its revenue rollup
+    # bucket, which must not move when the athlete later switches type
+    gym_type = models.CharField(max_length=20, choices=Athlete.GYM_TYPE_CHOICES, editable=False)
     notes = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='payment_updated_idx'),
+            models.Index(fields=['payment_date'], name='payment_date_idx'),
+            # Per-athlete history and last-payment lookups
+            models.Index(fields=['athlete', 'payment_date'], name='payment_athlete_date_idx'),
+        ]
     
+    def save(self, *args, **kwargs):
+        if not self.gym_type:
+            self.gym_type = self.athlete.gym_type
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.athlete.full_name} - {self.amount}"
 
@@ -100,13 +254,173 @@ class Shelf(models.Model):
     locker_end_date = models.DateField(null=True, blank=True)
     locker_duration_months = models.IntegerField(choices=DURATION_CHOICES, null=True, blank=True)
     locker_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, default=None)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='shelf_status_idx'),
+            models.Index(fields=['updated_at', 'id'], name='shelf_updated_idx'),
+        ]
     
     def __str__(self):
         return f"Shelf {self.shelf_number}"
 
+class RevenueRollup(models.Model):
+    """Payment totals materialized per day and per month, split by payment and gym type"""
+    GRANULARITY_CHOICES = [
+        ('day', 'Day'),
+        ('month', 'Month'),
+    ]
+
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    period_start = models.DateField()
+    payment_type = models.CharField(max_length=20, choices=Payment.PAYMENT_TYPES)
+    gym_type = models.CharField(max_length=20, choices=Athlete.GYM_TYPE_CHOICES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payment_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['granularity', 'period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'period_start', 'payment_type', 'gym_type'],
+                name='unique_revenue_rollup_bucket',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.granularity} {self.period_start} {self.payment_type}/{self.gym_type}: {self.total}"
+
+class ResourceVersion(models.Model):
+    """Change counter per API resource, bumped whenever its rows change (see gym.versions)"""
+    resource = models.CharField(max_length=30, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.resource} v{self.version}"
+
+class Tombstone(models.Model):
+    """Record of a deleted athlete, payment or shelf, for delta sync (see gym.sync)"""
+    resource = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.resource} #{self.object_id} deleted {self.deleted_at}"
+
 @receiver(pre_delete, sender=Athlete)
 def unassign_shelf_on_delete(sender, instance, **kwargs):
-    if instance.shelf:
-        instance.shelf.status = 'available'
-        instance.shelf.assigned_athlete = None
-        instance.shelf.save()
+    if instance.shelf_id:
+        from .lockers import release_locker
+        release_locker(instance.shelf_id)
+
+
+@receiver(post_save, sender=Athlete)
+@receiver(post_delete, sender=Athlete)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=Shelf)
+@receiver(post_delete, sender=Shelf)
+def invalidate_dashboard_on_change(sender, **kwargs):
+    from .dashboard import invalidate_dashboard_snapshot
+    transaction.on_commit(invalidate_dashboard_snapshot)
+
+@receiver(post_save, sender=Athlete)
+@receiver(post_delete, sender=Athlete)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=Shelf)
+@receiver(post_delete, sender=Shelf)
+def bump_version_on_change(sender, instance, signal, **kwargs):
+    from .events import DELETED, SAVED, record_change
+    from .versions import bump_versions, resource_for_model
+    resource = resource_for_model(sender)
+    # Recorded first: outside a transaction the bump flushes immediately
+    record_change(resource, DELETED if signal is post_delete else SAVED, instance.pk)
+    bump_versions(resource)
+
+@receiver(post_save, sender=Payment)
+def update_payment_summary_on_save(sender, instance, created, **kwargs):
+    from .payment_summary import add_payment, refresh_payment_summaries
+    if created:
+        add_payment(instance)
+    else:
+        refresh_payment_summaries([instance.athlete_id])
+
+@receiver(post_delete, sender=Payment)
+def update_payment_summary_on_delete(sender, instance, origin=None, **kwargs):
+    # Nothing to keep when the athlete itself is being deleted
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    if origin_model is Athlete:
+        return
+    from .payment_summary import refresh_payment_summaries
+    refresh_payment_summaries([instance.athlete_id])
+
+@receiver(pre_save, sender=Payment)
+def remember_recorded_revenue(sender, instance, update_fields=None, **kwargs):
+    # What the stored row counts towards in the rollup, to move it on an edit
+    from .rollups import ROLLUP_FIELDS
+    instance._recorded_revenue = None
+    if instance._state.adding or (update_fields is not None and not ROLLUP_FIELDS & set(update_fields)):
+        return
+    instance._recorded_revenue = Payment.objects.filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+
+@receiver(post_save, sender=Payment)
+def record_revenue_on_save(sender, instance, created, **kwargs):
+    from .rollups import record_payment, rerecord_payment
+    if created:
+        record_payment(instance)
+    elif instance._recorded_revenue is not None:
+        rerecord_payment(instance._recorded_revenue, instance)
+
+@receiver(pre_delete, sender=Athlete)
+def reverse_athlete_revenue_on_delete(sender, instance, **kwargs):
+    from .rollups import reverse_payments
+    reverse_payments(instance.payments.all())
+
+@receiver(pre_delete, sender=Payment)
+def reverse_payment_revenue_on_delete(sender, instance, origin=None, **kwargs):
+    # Cascades from an athlete delete are reversed in one pass above
+    origin_model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    if origin_model is Athlete:
+        return
+    from .rollups import reverse_payments
+    reverse_payments(Payment.objects.filter(pk=instance.pk))
+
+@receiver(post_delete, sender=Athlete)
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=Shelf)
+def record_tombstone_on_delete(sender, instance, **kwargs):
+    from .versions import resource_for_model
+    Tombstone.objects.create(resource=resource_for_model(sender), object_id=instance.pk)
+
+@receiver(pre_delete, sender=Shelf)
+def touch_athlete_on_shelf_delete(sender, instance, **kwargs):
+    from .events import SAVED, record_change
+    from .versions import ATHLETES, bump_versions
+    # Athlete.shelf is cleared by SET_NULL, a queryset update that skips
+    # auto_now and the save signals
+    athlete_ids = list(Athlete.objects.filter(shelf=instance).values_list('pk', flat=True))
+    if not athlete_ids:
+        return
+    Athlete.objects.filter(pk__in=athlete_ids).update(updated_at=timezone.now())
+    for pk in athlete_ids:
+        record_change(ATHLETES, SAVED, pk)
+    bump_versions(ATHLETES)
+
+@receiver(post_save, sender=Athlete)
+def sync_search_index_on_save(sender, instance, update_fields=None, **kwargs):
+    from .search import SEARCH_FIELDS, index_athlete
+    if update_fields is None or SEARCH_FIELDS & set(update_fields):
+        index_athlete(instance)
+
+@receiver(post_delete, sender=Athlete)
+def remove_from_search_index_on_delete(sender, instance, **kwargs):
+    from .search import unindex_athlete
+    unindex_athlete(instance.pk)
@@ -0,0 +1,167 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a composite ordering.
+
+    Unlike DRF's CursorPagination, which keys only on the first ordering field
+    and falls back to OFFSET for ties, the cursor stores the values of every
+    ordering column plus the primary key, so each page is a single indexed
+    range scan no matter how deep the client pages or how many rows share a
+    value (e.g. ``ordering=is_active``).
+    """
+
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    ordering = ('-registration_date',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_ordering(request, queryset, view)
+        self.fields = [self._get_field(queryset.model, name) for name, _ in self.keys]
+
+        values, self.reverse = self.decode_cursor(request)
+        keys = [(name, not desc) for name, desc in self.keys] if self.reverse else self.keys
+
+        queryset = queryset.order_by(*[('-' if desc else '') + name for name, desc in keys])
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(keys, values))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Return the ordering as ``[(field_name, descending), ...]``, honouring
+        the view's OrderingFilter and always ending with the primary key so
+        every row has a unique position.
+        """
+        ordering = None
+        for filter_cls in getattr(view, 'filter_backends', []):
+            if hasattr(filter_cls, 'get_ordering'):
+                ordering = filter_cls().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+
+        keys = []
+        for term in ordering:
+            name = term.lstrip('-')
+            name = queryset.model._meta.pk.name if name == 'pk' else name
+            keys.append((name, term.startswith('-')))
+
+        pk_name = queryset.model._meta.pk.name
+        if pk_name not in [name for name, _ in keys]:
+            keys.append((pk_name, keys[0][1] if keys else False))
+        return keys
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def encode_cursor(self, obj, reverse):
+        position = [field.value_to_string(obj) for field in self.fields]
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        token = urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        """Return ``(values, reverse)``; values is None on the first page."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            position = payload['p']
+            if len(position) != len(self.fields):
+                raise ValueError
+            values = [field.to_python(value) for field, value in zip(self.fields, position)]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, bool(payload.get('r'))
+
+    @staticmethod
+    def _get_field(model, name):
+        return model._meta.get_field(name)
+
+    @staticmethod
+    def _seek_filter(keys, values):
+        """
+        Build ``(a, b, c) > (x, y, z)`` as an OR of prefix-equality terms,
+        which every database backend can answer from a composite index.
+        """
+        condition = Q()
+        for i, (name, desc) in enumerate(keys):
+            term = Q(**{f'{name}__{"lt" if desc else "gt"}': values[i]})
+            for j, (prev_name, _) in enumerate(keys[:i]):
+                term &= Q(**{prev_name: values[j]})
+            condition |= term
+        return condition
+
+
+class AthleteCursorPagination(KeysetCursorPagination):
+    ordering = ('-registration_date',)
+
+
+class PaymentCursorPagination(KeysetCursorPagination):
+    ordering = ('-payment_date',)
@@ -0,0 +1,68 @@
+"""
+Per-athlete payment summary: ``payment_count``, ``total_paid`` and
+``last_payment_date`` stored on the athlete row.
+
+Athlete responses report these columns instead of embedding or aggregating
+the payment history; the history itself is paged separately under
+``/api/athletes/{id}/payments/``. ``Payment.save()``/``delete()`` keep the
+columns current through receivers (models.py). Paths that bypass those --
+bulk import, batch renewal, seeding -- maintain them themselves,
+incrementally where they know the delta and with
+``refresh_payment_summaries`` where they don't.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Athlete, Payment
+
+SUMMARY_FIELDS = ('payment_count', 'total_paid', 'last_payment_date')
+
+
+def summary_expressions():
+    """The summary columns recomputed from the payments table, as correlated subqueries."""
+    payments = Payment.objects.filter(athlete=OuterRef('pk')).order_by().values('athlete')
+    return {
+        'payment_count': Coalesce(Subquery(payments.annotate(n=Count('pk')).values('n')), 0),
+        'total_paid': Coalesce(
+            Subquery(payments.annotate(total=Sum('amount')).values('total')), Value(Decimal('0')),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+        'last_payment_date': Subquery(payments.annotate(last=Max('payment_date')).values('last')),
+    }
+
+
+def refresh_payment_summaries(athlete_ids=None):
+    """Recompute the summary of ``athlete_ids`` (every athlete if None) in one UPDATE."""
+    athletes = Athlete.objects.all() if athlete_ids is None else Athlete.objects.filter(pk__in=athlete_ids)
+    return athletes.update(**summary_expressions(), updated_at=timezone.now())
+
+
+def added_payment_expressions(amount, payment_date):
+    """Column updates that fold one new payment into a summary."""
+    return {
+        'payment_count': F('payment_count') + 1,
+        'total_paid': F('total_paid') + amount,
+        'last_payment_date': Greatest(Coalesce('last_payment_date', Value(payment_date)), Value(payment_date)),
+    }
+
+
+def add_payment(payment):
+    """Fold a newly created ``payment`` into its athlete's summary."""
+    now = timezone.now()
+    Athlete.objects.filter(pk=payment.athlete_id).update(
+        **added_payment_expressions(payment.amount, payment.payment_date), updated_at=now)
+
+    # Keep an athlete instance the caller is holding (and will serialize) in step
+    if Payment._meta.get_field('athlete').is_cached(payment):
+        athlete = payment.athlete
+        athlete.payment_count = (athlete.payment_count or 0) + 1
+        athlete.total_paid = (athlete.total_paid or 0) + Decimal(payment.amount)
+        if athlete.last_payment_date is None or payment.payment_date > athlete.last_payment_date:
+            athlete.last_payment_date = payment.payment_date
+        athlete.updated_at = now
+        loaded = getattr(athlete, '_loaded_values', None)
+        if loaded is not None:
+            loaded.update({name: getattr(athlete, name) for name in (*SUMMARY_FIELDS, 'updated_at')})
@@ -0,0 +1,66 @@
+"""
+Per-row representation cache for list responses.
+
+Serializing a long athlete or shelf list is dominated by DRF field handling,
+yet from one request to the next almost every row is unchanged. Serializers
+that set ``Meta.list_serializer_class = CachedListSerializer`` and define
+``cache_version(instance)`` have each row's output cached under
+``(serializer, pk, version)``; a page is looked up with one ``get_many`` and
+only the misses are serialized.
+
+The version starts from the row's ``updated_at``, which every write sets:
+``save()``, payment creation (gym.payment_summary) and the queryset/bulk
+updates (see gym.sync). Serializers add whatever else their output depends
+on -- the date for ``days_left``, the assigned athlete for a shelf's
+``athlete_name``. Stale entries are never read again and age out.
+
+Entries go to the ``GYM_REPRESENTATION_CACHE`` cache alias: an LRU-evicting
+locmem cache by default, or any file-based or Redis cache configured under
+that alias. Hits and misses are counted in gymsystem.metrics.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import models
+from rest_framework import serializers
+
+from gymsystem.metrics import registry
+
+
+def representation_cache():
+    return caches[settings.GYM_REPRESENTATION_CACHE]
+
+
+class CachedListSerializer(serializers.ListSerializer):
+    """ListSerializer that reuses cached row representations of its child"""
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        # Absolute photo URLs depend on the host the request came in on
+        request = self.context.get('request')
+        base = request.build_absolute_uri('/') if request else ''
+        keys = [self.cache_key(item, base) for item in items]
+        cache = representation_cache()
+        cached = cache.get_many([key for key in keys if key is not None])
+
+        results, missed = [], {}
+        for item, key in zip(items, keys):
+            representation = cached.get(key)
+            if representation is None:
+                representation = self.child.to_representation(item)
+                if key is not None:
+                    missed[key] = representation
+            results.append(representation)
+        if missed:
+            cache.set_many(missed, settings.GYM_REPRESENTATION_CACHE_TIMEOUT)
+
+        name = type(self.child).__name__
+        registry.increment('gym_representation_cache_total', (('serializer', name), ('result', 'hit')), len(cached))
+        registry.increment('gym_representation_cache_total', (('serializer', name), ('result', 'miss')),
+                           len(items) - len(cached))
+        return results
+
+    def cache_key(self, instance, base=''):
+        """None for rows that cannot be cached (not saved yet)"""
+        if instance.pk is None or getattr(instance, 'updated_at', None) is None:
+            return None
+        return f'repr:{type(self.child).__name__}:{instance.pk}:{self.child.cache_version(instance)}:{base}'
@@ -0,0 +1,124 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Payment, RevenueRollup
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _apply(granularity, period_start, payment_type, gym_type, amount, count):
+    """Add ``amount``/``count`` to one rollup bucket, creating it on first use."""
+    bucket = RevenueRollup.objects.filter(
+        granularity=granularity,
+        period_start=period_start,
+        payment_type=payment_type,
+        gym_type=gym_type,
+    )
+    delta = {'total': F('total') + amount, 'payment_count': F('payment_count') + count}
+    if bucket.update(**delta):
+        return
+    try:
+        with transaction.atomic():
+            RevenueRollup.objects.create(
+                granularity=granularity,
+                period_start=period_start,
+                payment_type=payment_type,
+                gym_type=gym_type,
+                total=amount,
+                payment_count=count,
+            )
+    except IntegrityError:
+        # Another writer created the bucket first
+        bucket.update(**delta)
+
+
+# Payment columns that decide which buckets a payment counts towards, and how much
+ROLLUP_FIELDS = {'payment_date', 'payment_type', 'gym_type', 'amount'}
+
+
+def _buckets(payment_date, payment_type, gym_type):
+    return (('day', payment_date, payment_type, gym_type),
+            ('month', _month_start(payment_date), payment_type, gym_type))
+
+
+def record_payments(payments):
+    """Fold newly created payments into their day and month buckets; each bucket is touched once."""
+    buckets = defaultdict(lambda: [0, 0])
+    for payment in payments:
+        for key in _buckets(payment.payment_date, payment.payment_type, payment.gym_type):
+            bucket = buckets[key]
+            bucket[0] += payment.amount
+            bucket[1] += 1
+    with transaction.atomic():
+        for key, (total, count) in buckets.items():
+            _apply(*key, total, count)
+
+
+def record_payment(payment):
+    record_payments([payment])
+
+
+def rerecord_payment(previous, payment):
+    """
+    Move an edited payment from the buckets of ``previous`` (its
+    ``ROLLUP_FIELDS`` values before the edit) to its current ones.
+    """
+    current = {field: getattr(payment, field) for field in ROLLUP_FIELDS}
+    if current == previous:
+        return
+    with transaction.atomic():
+        for key in _buckets(previous['payment_date'], previous['payment_type'], previous['gym_type']):
+            _apply(*key, -previous['amount'], -1)
+        for key in _buckets(payment.payment_date, payment.payment_type, payment.gym_type):
+            _apply(*key, payment.amount, 1)
+
+
+def reverse_payments(payments):
+    """Subtract a queryset of payments (about to be deleted) from the rollup."""
+    rows = payments.order_by().values('payment_date', 'payment_type', 'gym_type')\
+        .annotate(total=Sum('amount'), n=Count('pk'))
+    months = defaultdict(lambda: [0, 0])
+    with transaction.atomic():
+        for row in rows:
+            key = (row['payment_type'], row['gym_type'])
+            _apply('day', row['payment_date'], *key, -row['total'], -row['n'])
+            month = months[(_month_start(row['payment_date']),) + key]
+            month[0] += row['total']
+            month[1] += row['n']
+        for (period_start, payment_type, gym_type), (total, n) in months.items():
+            _apply('month', period_start, payment_type, gym_type, -total, -n)
+
+
+def rebuild_revenue_rollups(batch_size=1000):
+    """Recompute every bucket from the Payment table. Returns the number of rows written."""
+    payments = Payment.objects.order_by()
+    daily = payments.annotate(period=F('payment_date'))\
+        .values('period', 'payment_type', 'gym_type')\
+        .annotate(total=Sum('amount'), n=Count('pk'))
+    monthly = payments.annotate(period=TruncMonth('payment_date'))\
+        .values('period', 'payment_type', 'gym_type')\
+        .annotate(total=Sum('amount'), n=Count('pk'))
+
+    with transaction.atomic():
+        RevenueRollup.objects.all().delete()
+        written = 0
+        for granularity, rows in (('day', daily), ('month', monthly)):
+            objs = [
+                RevenueRollup(
+                    granularity=granularity,
+                    period_start=row['period'],
+                    payment_type=row['payment_type'],
+                    gym_type=row['gym_type'],
+                    total=row['total'],
+                    payment_count=row['n'],
+                )
+                for row in rows
+            ]
+            RevenueRollup.objects.bulk_create(objs, batch_size=batch_size)
+            written += len(objs)
+    return written
@@ -0,0 +1,136 @@
+"""
+Athlete type-ahead search.
+
+On SQLite the ``gym_athlete_fts`` FTS5 table (created by migration 0010)
+holds one row per athlete, keyed by rowid = athlete id, and is kept in sync
+by the Athlete save/delete receivers. Name tokens match as prefixes and
+digit tokens match the start or the end of the phone number, the latter via
+a column holding the reversed digits.
+
+Other backends filter with ``icontains``/``startswith``/``endswith``; on
+PostgreSQL those lookups are served by the trigram GIN indexes created in
+the same migration.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from .models import Athlete
+
+FTS_TABLE = 'gym_athlete_fts'
+SEARCH_FIELDS = {'full_name', 'father_name', 'contact_number'}
+
+_INSERT_SQL = (
+    f'INSERT INTO {FTS_TABLE} (rowid, full_name, father_name, phone, phone_reversed) '
+    'VALUES (%s, %s, %s, %s, %s)'
+)
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_NON_DIGIT_RE = re.compile(r'\D')
+
+
+def _tokens(term):
+    return _TOKEN_RE.findall(term or '')
+
+
+def _phone_digits(number):
+    return _NON_DIGIT_RE.sub('', number or '')
+
+
+def _uses_fts():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(term):
+    """Translate free text into an FTS5 MATCH expression (all tokens must match)."""
+    clauses = []
+    for token in _tokens(term):
+        token = token.replace('"', '')
+        if token.isdigit():
+            clauses.append(f'(phone : "{token}"* OR phone_reversed : "{token[::-1]}"*)')
+        else:
+            clauses.append(f'{{full_name father_name}} : "{token}"*')
+    return ' AND '.join(clauses)
+
+
+def search_athletes(queryset, term):
+    tokens = _tokens(term)
+    if not tokens:
+        return queryset
+
+    if _uses_fts():
+        match = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [build_match_query(term)])
+        return queryset.filter(pk__in=match)
+
+    condition = Q()
+    for token in tokens:
+        if token.isdigit():
+            condition &= Q(contact_number__startswith=token) | Q(contact_number__endswith=token)
+        else:
+            condition &= Q(full_name__icontains=token) | Q(father_name__icontains=token)
+    return queryset.filter(condition)
+
+
+def index_athletes(athletes):
+    if not _uses_fts():
+        return
+    rows = []
+    for athlete in athletes:
+        phone = _phone_digits(athlete.contact_number)
+        rows.append((athlete.pk, athlete.full_name, athlete.father_name, phone, phone[::-1]))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(_INSERT_SQL, rows)
+
+
+def index_athlete(athlete):
+    index_athletes([athlete])
+
+
+def unindex_athlete(pk):
+    if not _uses_fts():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def rebuild_search_index(batch_size=5000):
+    """Repopulate the FTS table from the Athlete table. Returns the number of rows indexed."""
+    if not _uses_fts():
+        return 0
+    rows = Athlete.objects.order_by('pk').values_list('pk', 'full_name', 'father_name', 'contact_number')
+    indexed = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        batch = []
+        for pk, full_name, father_name, contact_number in rows.iterator(chunk_size=batch_size):
+            phone = _phone_digits(contact_number)
+            batch.append((pk, full_name, father_name, phone, phone[::-1]))
+            if len(batch) >= batch_size:
+                cursor.executemany(_INSERT_SQL, batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(_INSERT_SQL, batch)
+            indexed += len(batch)
+    return indexed
+
+
+class AthleteSearchFilter(BaseFilterBackend):
+    """Drop-in replacement for SearchFilter on the athlete list (same ``search`` parameter)."""
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        return search_athletes(queryset, request.query_params.get(self.search_param, ''))
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Name prefix or phone number prefix/suffix',
+            'schema': {'type': 'string'},
+        }]
@@ -0,0 +1,144 @@
+"""
+Synthetic gym data for benchmarks.
+
+Rows are built in memory and written with ``bulk_create`` in batches, so
+seeding skips ``Athlete.save`` bookkeeping and signal receivers; callers that
+need derived tables (e.g. the revenue rollup) rebuild them afterwards.
+"""
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+import random
+
+from django.db import transaction
+from django.utils import timezone as dj_timezone
+
+from .models import Athlete, Payment, Shelf
+from .payment_summary import refresh_payment_summaries
+from .versions import ATHLETES, PAYMENTS, SHELVES, bump_versions
+
+FIRST_NAMES = [
+    'Ahmad', 'Mohammad', 'Ali', 'Hamid', 'Reza', 'Farid', 'Omid', 'Sami', 'Nasir', 'Karim',
+    'Yusuf', 'Bilal', 'Jawad', 'Rahim', 'Wahid', 'Zaki', 'Idris', 'Tariq', 'Hasan', 'Aziz',
+]
+LAST_NAMES = [
+    'Azizi', 'Ahmadi', 'Rahimi', 'Karimi', 'Hakimi', 'Noori', 'Sultani', 'Habibi', 'Safi', 'Popal',
+    'Stanekzai', 'Wardak', 'Amiri', 'Sharifi', 'Qaderi', 'Hashimi', 'Jalali', 'Rasuli', 'Yousufi', 'Zaheer',
+]
+
+
+@contextmanager
+def _explicit_dates(*fields):
+    """Let bulk_create keep supplied values for ``auto_now_add`` fields."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _weighted(rng, choices, weights):
+    return rng.choices(choices, weights=weights)[0]
+
+
+def seed_gym(athletes, payments_per_athlete=10, shelves=0, batch_size=5000, seed=42, stdout=None):
+    """
+    Insert ``athletes`` members with on average ``payments_per_athlete``
+    payments each, plus ``shelves`` lockers of which roughly half are
+    assigned. Distributions are skewed the way a real roster is: most members
+    train in the morning, tenure and payment counts are heavy-tailed, and fee
+    deadlines cluster around the current month.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    registration_field = Athlete._meta.get_field('registration_date')
+    fee_start_field = Athlete._meta.get_field('fee_start_date')
+    payment_date_field = Payment._meta.get_field('payment_date')
+
+    with _explicit_dates(registration_field, fee_start_field, payment_date_field):
+        offset = Shelf.objects.count()
+        shelf_objs = Shelf.objects.bulk_create(
+            [Shelf(shelf_number=f'L{offset + n:05d}') for n in range(1, shelves + 1)],
+            batch_size=batch_size,
+        )
+        shelf_ids = [shelf.pk for shelf in shelf_objs]
+        assignable = rng.sample(shelf_ids, min(len(shelf_ids) // 2, athletes))
+
+        created = 0
+        payments_created = 0
+        while created < athletes:
+            count = min(batch_size, athletes - created)
+            with transaction.atomic():
+                batch = []
+                for i in range(count):
+                    tenure = min(int(rng.paretovariate(1.2) * 30), 1100)
+                    registered = today - timedelta(days=tenure)
+                    deadline = today + timedelta(days=int(rng.triangular(-60, 45, 10)))
+                    gym_type = _weighted(rng, ['fitness', 'bodybuilding'], [6, 4])
+                    base_fee = 1000 if gym_type == 'fitness' else 700
+                    discount = Decimal(rng.choice([0, 0, 0, 50, 100]))
+                    batch.append(Athlete(
+                        full_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                        father_name=rng.choice(FIRST_NAMES),
+                        registration_date=datetime.combine(registered, time(rng.randrange(6, 22)), timezone.utc)
+                        + timedelta(seconds=rng.randrange(3600)),
+                        fee_start_date=deadline - timedelta(days=30),
+                        fee_deadline_date=deadline,
+                        fee_status=Athlete.fee_status_for(deadline, today),
+                        gym_type=gym_type,
+                        gym_time=_weighted(rng, ['morning', 'afternoon', 'night'], [5, 2, 3]),
+                        discount=discount,
+                        final_fee=base_fee - discount,
+                        contact_number=f'07{rng.randrange(10**8):08d}',
+                        is_active=rng.random() < 0.85,
+                        shelf_id=assignable[created + i] if created + i < len(assignable) else None,
+                    ))
+                # Relies on the backend returning primary keys (SQLite 3.35+, PostgreSQL)
+                Athlete.objects.bulk_create(batch, batch_size=batch_size)
+
+                payments = []
+                for athlete in batch:
+                    registered = athlete.registration_date.date()
+                    tenure_days = max((today - registered).days, 1)
+                    n = max(1, round(rng.expovariate(1 / payments_per_athlete))) if payments_per_athlete else 0
+                    if n:
+                        payments.append(Payment(
+                            athlete_id=athlete.pk, amount=athlete.final_fee,
+                            payment_date=registered, payment_type='registration', gym_type=athlete.gym_type,
+                        ))
+                    for _ in range(n - 1):
+                        payments.append(Payment(
+                            athlete_id=athlete.pk, amount=athlete.final_fee,
+                            payment_date=registered + timedelta(days=rng.randrange(tenure_days)),
+                            payment_type='renewal', gym_type=athlete.gym_type,
+                        ))
+                Payment.objects.bulk_create(payments, batch_size=batch_size)
+                payments_created += len(payments)
+                refresh_payment_summaries([athlete.pk for athlete in batch])
+
+                now = dj_timezone.now()
+                lockers = []
+                for athlete in batch:
+                    if not athlete.shelf_id:
+                        continue
+                    # A few rentals have already run out, as in a gym nobody sweeps
+                    months = _weighted(rng, [1, 3, 6, 12], [5, 3, 2, 1])
+                    start = today - timedelta(days=rng.randrange(months * 30 + 20))
+                    lockers.append(Shelf(
+                        pk=athlete.shelf_id, status='assigned', assigned_athlete_id=athlete.pk,
+                        locker_start_date=start, locker_end_date=start + timedelta(days=months * 30),
+                        locker_duration_months=months, locker_price=Decimal(months * 100), updated_at=now,
+                    ))
+                Shelf.objects.bulk_update(lockers, [
+                    'status', 'assigned_athlete', 'locker_start_date', 'locker_end_date',
+                    'locker_duration_months', 'locker_price', 'updated_at',
+                ], batch_size=batch_size)
+
+            created += count
+            if stdout:
+                stdout.write(f'  {created}/{athletes} athletes, {payments_created} payments')
+
+    bump_versions(ATHLETES, PAYMENTS, SHELVES)
+    return {'athletes': created, 'payments': payments_created, 'shelves': len(shelf_ids)}
@@ -1,5 +1,8 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from .images import THUMBNAIL_SIZES
 from .models import Athlete, Shelf, Payment
+from .representations import CachedListSerializer
 from datetime import date, timedelta
 import logging
 
@@ -10,30 +13,56 @@ class PaymentSerializer(serializers.ModelSerializer):
         model = Payment
         fields = '__all__'
 
+class PaymentLedgerSerializer(serializers.ModelSerializer):
+    """A ledger row; athlete_name is annotated by the view, not loaded per row"""
+    athlete_name = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Payment
+        fields = ['id', 'athlete', 'athlete_name', 'gym_type', 'amount', 'payment_date', 'payment_type', 'notes']
+
+class PhotoThumbnailsField(serializers.Field):
+    """Thumbnail URLs by size, or None while the current photo is still being processed"""
+
+    def __init__(self, **kwargs):
+        super().__init__(source='*', read_only=True, **kwargs)
+
+    def to_representation(self, athlete):
+        variants = athlete.photo_thumbnails
+        if not athlete.photo or not variants or variants.get('photo') != athlete.photo.name:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for size in THUMBNAIL_SIZES:
+            url = default_storage.url(variants[size])
+            urls[size] = request.build_absolute_uri(url) if request else url
+        return urls
+
 class AthleteSerializer(serializers.ModelSerializer):
     days_left = serializers.ReadOnlyField()
+    fee_status = serializers.ReadOnlyField(source='fee_status_name')
+    thumbnails = PhotoThumbnailsField()
     fee_deadline_date = serializers.DateField(required=False)
     final_fee = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     debt = serializers.DecimalField(max_digits=10, decimal_places=2, default=0)
-    payments = PaymentSerializer(many=True, read_only=True)
 
     class Meta:
         model = Athlete
         fields = '__all__'
+        list_serializer_class = CachedListSerializer
+
+    def cache_version(self, athlete):
+        # days_left and fee_status move with the date
+        return f'{athlete.updated_at.isoformat()}:{date.today().isoformat()}'
 
     def create(self, validated_data):
         # Calculate final fee
         gym_type = validated_data.get('gym_type')
         discount = validated_data.get('discount', 0)
         debt = validated_data.get('debt', 0)
-        if gym_type == 'fitness':
-            base_fee = 1000
-        else:
-            base_fee = 700
-        final_fee = base_fee - discount - debt
         
         # Set auto-calculated fields
-        validated_data['final_fee'] = final_fee
+        validated_data['final_fee'] = Athlete.calculate_final_fee(gym_type, discount, debt)
         
         # Use provided fee_deadline_date or auto-calculate
         if 'fee_deadline_date' not in validated_data:
@@ -47,13 +76,7 @@ class AthleteSerializer(serializers.ModelSerializer):
         discount = validated_data.get('discount', instance.discount)
         debt = validated_data.get('debt', instance.debt)
         
-        if gym_type == 'fitness':
-            base_fee = 1000
-        else:
-            base_fee = 700
-        final_fee = base_fee - discount - debt
-        
-        validated_data['final_fee'] = final_fee
+        validated_data['final_fee'] = Athlete.calculate_final_fee(gym_type, discount, debt)
         
         # Keep existing fee_deadline_date unless it's a renewal (handled separately)
         if 'fee_deadline_date' not in validated_data:
@@ -71,12 +94,57 @@ class AthleteSerializer(serializers.ModelSerializer):
         
         return super().update(instance, validated_data)
 
+class AthleteAlertSerializer(serializers.ModelSerializer):
+    """Compact representation for fee-deadline alerts"""
+    days_left = serializers.ReadOnlyField()
+    thumbnails = PhotoThumbnailsField()
+
+    class Meta:
+        model = Athlete
+        fields = ['id', 'full_name', 'photo', 'thumbnails', 'gym_type', 'gym_time', 'contact_number',
+                  'fee_deadline_date', 'days_left', 'is_active']
+
+class AlertSerializer(AthleteAlertSerializer):
+    """The alert badge's cut of AthleteAlertSerializer, with a single small avatar URL"""
+    avatar = serializers.SerializerMethodField()
+
+    class Meta(AthleteAlertSerializer.Meta):
+        # Columns loaded by gym.alerts.alert_athletes()
+        fields = ['id', 'full_name', 'days_left', 'avatar', 'gym_type', 'contact_number']
+
+    def get_avatar(self, athlete):
+        if not athlete.photo:
+            return None
+        variants = athlete.photo_thumbnails or {}
+        name = variants['sm'] if variants.get('photo') == athlete.photo.name else athlete.photo.name
+        request = self.context.get('request')
+        url = default_storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+
+class AthleteImportSerializer(serializers.ModelSerializer):
+    """Validates one row of a bulk import; fees and dates are filled in by gym.bulk"""
+    fee_deadline_date = serializers.DateField(required=False)
+    debt = serializers.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        model = Athlete
+        fields = ['full_name', 'father_name', 'gym_type', 'gym_time', 'discount', 'debt',
+                  'contact_number', 'notes', 'fee_deadline_date', 'is_active']
+
 class ShelfSerializer(serializers.ModelSerializer):
     athlete_name = serializers.SerializerMethodField()
     
     class Meta:
         model = Shelf
         fields = '__all__'
+        # Assignment changes go through gym.lockers (the assign/release actions)
+        read_only_fields = ['status', 'assigned_athlete']
+        list_serializer_class = CachedListSerializer
+
+    def cache_version(self, shelf):
+        # athlete_name comes from the assigned athlete's row
+        athlete = shelf.assigned_athlete
+        return f'{shelf.updated_at.isoformat()}:{athlete.updated_at.isoformat() if athlete else ""}'
     
     def get_athlete_name(self, obj):
         """Get the name of the assigned athlete"""
@@ -97,4 +165,14 @@ class ShelfSerializer(serializers.ModelSerializer):
     
     def update(self, instance, validated_data):
         """Update shelf with locker fields"""
-        return super().update(instance, validated_data)
\ No newline at end of file
+        return super().update(instance, validated_data)
+
+class AthleteSyncSerializer(AthleteSerializer):
+    """Athlete rows for delta sync"""
+    updated_at = serializers.DateTimeField(read_only=True)
+
+class PaymentSyncSerializer(PaymentSerializer):
+    updated_at = serializers.DateTimeField(read_only=True)
+
+class ShelfSyncSerializer(ShelfSerializer):
+    updated_at = serializers.DateTimeField(read_only=True)
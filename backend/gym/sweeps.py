@@ -0,0 +1,88 @@
+"""
+Expiry sweeps: deactivate long-overdue athletes and reclaim expired lockers.
+
+Run daily from cron with ``manage.py sweep_expired``. Both sweeps walk their
+candidates in primary-key order, ``GYM_SWEEP_BATCH_SIZE`` ids at a time
+(keyset, no OFFSET), and write each batch in its own short transaction, so
+memory stays bounded and the database lock is never held for a whole roster.
+Every batch re-checks its condition while writing, so an athlete renewed or a
+locker extended between picking and writing is left alone.
+
+Deactivation is deliberately conservative: only athletes more than
+``GYM_SWEEP_GRACE_DAYS`` past their fee deadline are flipped to inactive.
+Renewing an athlete does not reactivate them; that stays a front-desk
+decision (``toggle_status``).
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from gymsystem.database import retry_when_locked
+
+from .lockers import release_expired_lockers
+from .models import Athlete, Shelf
+from .versions import ATHLETES, bump_versions
+
+
+def _batches(queryset, batch_size):
+    """Primary keys of ``queryset`` in ascending chunks of ``batch_size``."""
+    last = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def overdue_athletes(today=None, grace_days=None):
+    today = today or date.today()
+    grace_days = settings.GYM_SWEEP_GRACE_DAYS if grace_days is None else grace_days
+    return Athlete.objects.filter(is_active=True, fee_deadline_date__lt=today - timedelta(days=grace_days))
+
+
+def expired_lockers(today=None):
+    return Shelf.objects.filter(status='assigned', locker_end_date__lt=today or date.today())
+
+
+def deactivate_overdue_athletes(ids, today=None, grace_days=None):
+    """Deactivate those of ``ids`` that are still overdue; returns the ids updated."""
+    def deactivate():
+        with transaction.atomic():
+            overdue = list(overdue_athletes(today, grace_days).filter(pk__in=ids).values_list('pk', flat=True))
+            if overdue:
+                Athlete.objects.filter(pk__in=overdue).update(is_active=False, updated_at=timezone.now())
+                from .dashboard import invalidate_dashboard_snapshot
+                transaction.on_commit(invalidate_dashboard_snapshot)
+                bump_versions(ATHLETES)
+            return overdue
+
+    return retry_when_locked(deactivate)
+
+
+def sweep_expired(today=None, grace_days=None, batch_size=None, dry_run=False, on_batch=None):
+    """
+    Run both sweeps and return a summary dict. ``on_batch(kind, ids)`` is
+    called with the ids each batch changed (or would change, for a dry run).
+    """
+    today = today or date.today()
+    batch_size = batch_size or settings.GYM_SWEEP_BATCH_SIZE
+    report = {'date': today.isoformat(), 'dry_run': dry_run, 'athletes_deactivated': 0, 'lockers_released': 0}
+
+    for ids in _batches(overdue_athletes(today, grace_days), batch_size):
+        if not dry_run:
+            ids = deactivate_overdue_athletes(ids, today, grace_days)
+        report['athletes_deactivated'] += len(ids)
+        if ids and on_batch:
+            on_batch('athletes_deactivated', ids)
+
+    for ids in _batches(expired_lockers(today), batch_size):
+        if not dry_run:
+            ids = release_expired_lockers(ids, today)
+        report['lockers_released'] += len(ids)
+        if ids and on_batch:
+            on_batch('lockers_released', ids)
+
+    return report
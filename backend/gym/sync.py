@@ -0,0 +1,124 @@
+"""
+Delta sync for offline-capable clients.
+
+``GET /api/sync/`` without a token returns everything (paged); with
+``?since=<token>`` it returns only the athletes, payments and shelves
+written since that token, plus the ids deleted since then, and a new token.
+Clients upsert the changed rows, then drop the deleted ids.
+
+Changes are found through the ``updated_at`` column every synced model
+carries. ``auto_now`` keeps it current for ``save()``; queryset and bulk
+updates (locker service, bulk renew, photo processing, ...) set it
+explicitly. Deletes -- including cascades -- leave a ``Tombstone`` row.
+
+The token is a keyset cursor over ``(updated_at, id)`` per table, so a
+large backlog is delivered in pages (``has_more``) without OFFSET. Once a
+client has caught up the cursor is set ``SYNC_OVERLAP`` before the
+request started, so rows written by transactions still in flight are
+picked up next time; the overlap means a few rows may arrive twice, which
+upserting makes harmless. Tombstones are kept for
+``GYM_SYNC_TOMBSTONE_DAYS``; an older token must start over with a full
+sync.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta, timezone as dt_timezone
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Athlete, Payment, Shelf, Tombstone
+from .serializers import AthleteSyncSerializer, PaymentSyncSerializer, ShelfSyncSerializer
+from .versions import ATHLETES, PAYMENTS, SHELVES
+
+SYNC_OVERLAP = timedelta(seconds=5)
+DELETED = 'deleted'
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+class SyncTokenExpired(Exception):
+    pass
+
+
+def _sources():
+    return [
+        (ATHLETES, Athlete.objects.all(), AthleteSyncSerializer),
+        (PAYMENTS, Payment.objects.all(), PaymentSyncSerializer),
+        (SHELVES, Shelf.objects.select_related('assigned_athlete'), ShelfSyncSerializer),
+    ]
+
+
+def encode_token(cursors):
+    payload = {name: [moment.isoformat(), pk] for name, (moment, pk) in cursors.items()}
+    return urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    try:
+        payload = json.loads(urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        cursors = {}
+        for name in (ATHLETES, PAYMENTS, SHELVES, DELETED):
+            moment, pk = payload[name]
+            moment = datetime.fromisoformat(moment)
+            if not timezone.is_aware(moment):
+                raise ValueError('Sync token timestamps must carry a UTC offset')
+            cursors[name] = (moment, int(pk))
+    except (ValueError, TypeError, KeyError):
+        raise InvalidSyncToken('Invalid sync token')
+    return cursors
+
+
+def _after(cursor, field):
+    moment, pk = cursor
+    return Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'id__gt': pk})
+
+
+def _page(queryset, field, cursor, limit):
+    rows = list(queryset.filter(_after(cursor, field)).order_by(field, 'id')[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def sync_changes(token=None, limit=1000, context=None):
+    """Build the sync payload for ``token`` (None for a full sync)."""
+    started = timezone.now()
+    caught_up = (started - SYNC_OVERLAP, 0)
+    full = not token
+    if full:
+        cursors = dict.fromkeys((ATHLETES, PAYMENTS, SHELVES), (EPOCH, 0))
+        cursors[DELETED] = caught_up
+    else:
+        cursors = decode_token(token)
+        retention = timedelta(days=settings.GYM_SYNC_TOMBSTONE_DAYS)
+        if cursors[DELETED][0] < started - retention:
+            raise SyncTokenExpired()
+
+    payload = {'full': full, 'has_more': False}
+    next_cursors = {}
+    for name, queryset, serializer_class in _sources():
+        rows, more = _page(queryset, 'updated_at', cursors[name], limit)
+        payload[name] = serializer_class(rows, many=True, context=context or {}).data
+        next_cursors[name] = (rows[-1].updated_at, rows[-1].pk) if more else caught_up
+        payload['has_more'] |= more
+
+    deleted = {name: [] for name in (ATHLETES, PAYMENTS, SHELVES)}
+    tombstones, more = _page(Tombstone.objects.all(), 'deleted_at', cursors[DELETED], limit)
+    for tombstone in tombstones:
+        deleted.setdefault(tombstone.resource, []).append(tombstone.object_id)
+    next_cursors[DELETED] = (tombstones[-1].deleted_at, tombstones[-1].pk) if more else caught_up
+    payload['has_more'] |= more
+
+    payload[DELETED] = deleted
+    payload['token'] = encode_token(next_cursors)
+    return payload
+
+
+def prune_tombstones(days=None):
+    """Delete tombstones older than the retention window; returns how many were removed."""
+    days = settings.GYM_SYNC_TOMBSTONE_DAYS if days is None else days
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
@@ -1,3 +1,1205 @@
-from django.test import TestCase
+import asyncio
+from base64 import urlsafe_b64encode
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import gzip
+import json
+from io import BytesIO, StringIO
+import os
+import tempfile
+from itertools import count
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from gymsystem.database import database_settings, retry_when_locked
+from gymsystem.metrics import MetricsMiddleware, registry
+from gymsystem.renderers import FastJSONParser, FastJSONRenderer
+
+from .benchmarks import compare_results, run_flows
+from .events import RESYNC_FRAME, Broker, issue_ticket
+from .fee_status import advance_fee_statuses, stale_fee_statuses
+from .images import process_athlete_photo
+from .lockers import LockerUnavailable, assign_locker, release_locker
+from .models import Athlete, Payment, RevenueRollup, Shelf, Tombstone
+from .representations import representation_cache
+from .sweeps import sweep_expired
+
+
+_sequence = count(1)
+
+
+def make_athlete(**kwargs):
+    n = next(_sequence)
+    fields = {
+        'full_name': f'Athlete {n}',
+        'gym_type': 'fitness',
+        'gym_time': 'morning',
+        'final_fee': 1000,
+        'fee_deadline_date': date.today() + timedelta(days=n % 40 - 10),
+    }
+    fields.update(kwargs)
+    return Athlete.objects.create(**fields)
+
+
+def make_shelf(**kwargs):
+    fields = {'shelf_number': f'S{next(_sequence)}'}
+    fields.update(kwargs)
+    return Shelf.objects.create(**fields)
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Endpoints must issue a constant number of queries regardless of how many
+    rows they return. Each test measures an endpoint, grows the data set and
+    measures again; any per-row (N+1) query makes the counts diverge.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('frontdesk', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def seed(self, rows):
+        for _ in range(rows):
+            shelf = make_shelf()
+            athlete = make_athlete(shelf=shelf)
+            Payment.objects.create(athlete=athlete, amount=1000, payment_type='registration')
+            Payment.objects.create(athlete=athlete, amount=1000, payment_type='renewal')
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def assertQueryCountFlat(self, url):
+        self.seed(2)
+        small = self.count_queries(url)
+        self.seed(8)
+        large = self.count_queries(url)
+        self.assertEqual(
+            small, large,
+            f'{url} issued {small} queries for 2 rows but {large} for 10 rows',
+        )
+
+    def test_athlete_list(self):
+        self.assertQueryCountFlat('/api/athletes/')
+
+    def test_athlete_list_ordering_and_filters(self):
+        self.assertQueryCountFlat('/api/athletes/?ordering=full_name&fee_status=overdue')
+
+    def test_shelf_list(self):
+        self.assertQueryCountFlat('/api/shelves/')
+
+    def test_dashboard(self):
+        self.assertQueryCountFlat('/api/dashboard/')
+
+
+class DashboardCacheTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('frontdesk', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def test_snapshot_is_served_from_cache(self):
+        make_athlete()
+        self.client.get('/api/dashboard/')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.data['stats']['total'], 1)
+        # Only the ETag version lookup
+        [query] = ctx.captured_queries
+        self.assertIn('gym_resourceversion', query['sql'])
+
+    def test_writes_invalidate_snapshot(self):
+        athlete = make_athlete()
+        self.assertEqual(self.client.get('/api/dashboard/').data['stats']['active'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            athlete.is_active = False
+            athlete.save()
+        stats = self.client.get('/api/dashboard/').data['stats']
+        self.assertEqual((stats['active'], stats['inactive']), (0, 1))
+
+
+class RevenueRollupTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('frontdesk', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def create_athlete(self, gym_type='fitness'):
+        response = self.client.post('/api/athletes/', {
+            'full_name': 'Rollup Athlete', 'gym_type': gym_type, 'gym_time': 'night',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def test_payments_are_rolled_up_by_day_and_month(self):
+        athlete_id = self.create_athlete()
+        self.client.post(f'/api/athletes/{athlete_id}/renew/', {'duration': 60}, format='json')
+        self.create_athlete(gym_type='bodybuilding')
+
+        response = self.client.get('/api/reports/revenue/', {'granularity': 'day'})
+        self.assertEqual(response.status_code, 200)
+        [today] = response.data['results']
+        self.assertEqual(today['total'], 1000 + 2000 + 700)
+        self.assertEqual(today['count'], 3)
+        self.assertEqual(today['by_payment_type'], {'registration': 1700, 'renewal': 2000})
+        self.assertEqual(today['by_gym_type'], {'fitness': 3000, 'bodybuilding': 700})
+
+        monthly = self.client.get('/api/reports/revenue/').data['results']
+        self.assertEqual(monthly[0]['total'], today['total'])
+
+    def test_deleting_athlete_reverses_revenue(self):
+        athlete_id = self.create_athlete()
+        self.client.delete(f'/api/athletes/{athlete_id}/')
+        totals = RevenueRollup.objects.values_list('total', 'payment_count')
+        self.assertTrue(all(total == 0 and count == 0 for total, count in totals))
+
+    def buckets(self):
+        return {(row.granularity, row.payment_type, row.gym_type): (row.total, row.payment_count)
+                for row in RevenueRollup.objects.exclude(payment_count=0)}
+
+    def test_reversal_uses_the_gym_type_recorded_with_the_payment(self):
+        athlete_id = self.create_athlete(gym_type='fitness')
+        self.client.patch(f'/api/athletes/{athlete_id}/', {'gym_type': 'bodybuilding'}, format='json')
+        self.client.delete(f'/api/athletes/{athlete_id}/')
+        self.assertEqual(self.buckets(), {})
+        self.assertFalse(RevenueRollup.objects.exclude(total=0).exists())
+
+    def test_payments_saved_directly_are_recorded_and_moved_on_edit(self):
+        athlete = make_athlete(gym_type='bodybuilding')
+        payment = Payment.objects.create(athlete=athlete, amount=700, payment_type='renewal')
+        self.assertEqual(self.buckets(), {('day', 'renewal', 'bodybuilding'): (700, 1),
+                                          ('month', 'renewal', 'bodybuilding'): (700, 1)})
+
+        payment.amount = 900
+        payment.payment_type = 'registration'
+        payment.save()
+        self.assertEqual(self.buckets(), {('day', 'registration', 'bodybuilding'): (900, 1),
+                                          ('month', 'registration', 'bodybuilding'): (900, 1)})
+
+        payment.notes = 'Paid in cash'
+        with CaptureQueriesContext(connection) as ctx:
+            payment.save(update_fields=['notes'])
+        self.assertFalse(any('gym_revenuerollup' in query['sql'] for query in ctx.captured_queries))
+
+        payment.delete()
+        self.assertEqual(self.buckets(), {})
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/reports/revenue/', {'granularity': 'week'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/revenue/', {'from': '2026-02-30'}).status_code, 400)
+
+
+class AthleteSearchTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('frontdesk', password='secret')
+        self.client.force_authenticate(self.user)
+        self.ahmad = make_athlete(full_name='Ahmad Karimi', father_name='Rahim', contact_number='0799 123 456')
+        self.hamid = make_athlete(full_name='Hamid Noori', father_name='Ahmad', contact_number='0700555111')
+
+    def search(self, term):
+        response = self.client.get('/api/athletes/', {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return {row['id'] for row in response.data['results']}
+
+    def test_name_prefix(self):
+        self.assertEqual(self.search('kar'), {self.ahmad.id})
+        self.assertEqual(self.search('ahm'), {self.ahmad.id, self.hamid.id})
+        self.assertEqual(self.search('ahmad noo'), {self.hamid.id})
+
+    def test_phone_prefix_and_suffix(self):
+        self.assertEqual(self.search('0799'), {self.ahmad.id})
+        self.assertEqual(self.search('5111'), {self.hamid.id})
+        self.assertEqual(self.search('456'), {self.ahmad.id})
+
+    def test_index_follows_updates_and_deletes(self):
+        self.ahmad.full_name = 'Zaki Karimi'
+        self.ahmad.save()
+        self.assertEqual(self.search('zak'), {self.ahmad.id})
+        self.hamid.delete()
+        self.assertEqual(self.search('ahm'), set())
+
+
+class BulkImportExportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('frontdesk', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def test_csv_import_creates_athletes_and_payments(self):
+        body = (
+            'full_name,father_name,gym_type,gym_time,discount,contact_number\n'
+            'Omid Safi,Karim,fitness,morning,100,0799000111\n'
+            'Bad Row,,yoga,morning,,\n'
+            'Sami Popal,,bodybuilding,night,,\n'
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.generic('POST', '/api/athletes/bulk/', body, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2])
+
+        omid = Athlete.objects.get(full_name='Omid Safi')
+        self.assertEqual(omid.final_fee, 900)
+        self.assertEqual(omid.payments.get().amount, 900)
+        self.assertEqual(Payment.objects.count(), 2)
+        self.assertEqual(self.client.get('/api/athletes/', {'search': 'omi'}).data['results'][0]['id'], omid.id)
+
+        # One batch: a constant number of statements, not one per row
+        self.assertLess(len(ctx.captured_queries), 20)
+
+    def test_ndjson_upload(self):
+        upload = SimpleUploadedFile(
+            'athletes.jsonl',
+            b'{"full_name": "Nasir", "gym_type": "fitness", "gym_time": "night"}\n'
+            b'{"full_name": "Idris", "gym_type": "fitness", "gym_time": "morning", "is_active": false}\n',
+            content_type='application/x-ndjson',
+        )
+        response = self.client.post('/api/athletes/bulk/', {'file': upload}, format='multipart')
+        self.assertEqual(response.data, {'created': 2, 'errors': []})
+        self.assertFalse(Athlete.objects.get(full_name='Idris').is_active)
+
+    def test_streaming_export(self):
+        make_athlete(full_name='Export Me')
+        response = self.client.get('/api/athletes/bulk/')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith('id,full_name'))
+        self.assertIn('Export Me', lines[1])
+
+
+class AthleteChangeTrackingTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('frontdesk', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def updates(self, ctx, table='gym_athlete'):
+        return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(f'UPDATE "{table}"')]
+
+    def test_unchanged_save_writes_nothing(self):
+        athlete = Athlete.objects.get(pk=make_athlete().pk)
+        with CaptureQueriesContext(connection) as ctx:
+            athlete.save()
+        self.assertEqual(ctx.captured_queries, [])
+
+    def test_save_writes_only_changed_columns(self):
+        athlete = Athlete.objects.get(pk=make_athlete().pk)
+        athlete.notes = 'Prefers the night shift'
+        with CaptureQueriesContext(connection) as ctx:
+            athlete.save()
+        [update] = self.updates(ctx)
+        self.assertIn('"notes"', update)
+        self.assertNotIn('"full_name"', update)
+        self.assertEqual(self.updates(ctx, 'gym_shelf'), [])
+
+    def test_save_after_refresh_compares_against_refreshed_values(self):
+        athlete = Athlete.objects.get(pk=make_athlete().pk)
+        Athlete.objects.filter(pk=athlete.pk).update(is_active=False)
+        athlete.refresh_from_db()
+        athlete.is_active = True
+        athlete.save()
+        self.assertTrue(Athlete.objects.get(pk=athlete.pk).is_active)
+
+        Athlete.objects.filter(pk=athlete.pk).update(notes='Changed elsewhere')
+        athlete.refresh_from_db(fields=['notes'])
+        athlete.notes = ''
+        athlete.save()
+        self.assertEqual(Athlete.objects.get(pk=athlete.pk).notes, '')
+
+    def test_assigning_a_deferred_field_writes_it(self):
+        athlete = Athlete.objects.only('pk', 'full_name').get(pk=make_athlete().pk)
+        athlete.notes = 'Set without loading'
+        athlete.save()
+        self.assertEqual(Athlete.objects.get(pk=athlete.pk).notes, 'Set without loading')
+
+    def test_toggle_status_and_renew_are_single_updates(self):
+        athlete = make_athlete()
+        # Renewing also folds the new payment into the athlete's payment summary
+        for url, expected in ((f'/api/athletes/{athlete.pk}/toggle_status/', 1),
+                              (f'/api/athletes/{athlete.pk}/renew/', 2)):
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.post(url, {}, format='json').status_code, 200)
+            self.assertEqual(len(self.updates(ctx)), expected, url)
+            self.assertEqual(self.updates(ctx, 'gym_shelf'), [], url)
+
+    def test_shelf_change_moves_assignment(self):
+        first, second = make_shelf(), make_shelf()
+        athlete = make_athlete(shelf=first)
+        athlete = Athlete.objects.get(pk=athlete.pk)
+        athlete.shelf = second
+        athlete.save()
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, first.assigned_athlete_id), ('available', None))
+        self.assertEqual((second.status, second.assigned_athlete_id), ('assigned', athlete.pk))
+
+
+class LockerAssignmentTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+
+    def test_assign_conflict_returns_409_and_changes_nothing(self):
+        shelf = make_shelf()
+        holder, other = make_athlete(), make_athlete()
+        assign_locker(holder, shelf.pk)
+        response = self.client.post(f'/api/shelves/{shelf.pk}/assign/', {'athlete': other.pk}, format='json')
+        self.assertEqual(response.status_code, 409)
+        shelf.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(shelf.assigned_athlete_id, holder.pk)
+        self.assertIsNone(other.shelf_id)
+
+    def test_reassign_releases_previous_locker(self):
+        first, second = make_shelf(), make_shelf()
+        athlete = make_athlete()
+        response = self.client.post(
+            f'/api/shelves/{first.pk}/assign/', {'athlete': athlete.pk, 'locker_price': '50'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.post(f'/api/shelves/{second.pk}/assign/', {'athlete': athlete.pk}, format='json')
+        first.refresh_from_db()
+        athlete.refresh_from_db()
+        self.assertEqual((first.status, first.assigned_athlete_id, first.locker_price), ('available', None, None))
+        self.assertEqual(athlete.shelf_id, second.pk)
+
+    def test_release(self):
+        shelf = make_shelf()
+        athlete = make_athlete()
+        assign_locker(athlete, shelf.pk)
+        self.assertEqual(self.client.post(f'/api/shelves/{shelf.pk}/release/').status_code, 200)
+        athlete.refresh_from_db()
+        self.assertIsNone(athlete.shelf_id)
+
+    def test_athlete_create_with_taken_locker_is_rolled_back(self):
+        shelf = make_shelf()
+        assign_locker(make_athlete(), shelf.pk)
+        before = Athlete.objects.count()
+        response = self.client.post('/api/athletes/', {
+            'full_name': 'Late Comer', 'gym_type': 'fitness', 'gym_time': 'night', 'shelf': shelf.pk,
+        }, format='json')
+        # Usually caught by the serializer's unique check; a race past it gets a 409
+        self.assertIn(response.status_code, (400, 409))
+        self.assertEqual(Athlete.objects.count(), before)
+
+
+class LockerContentionTests(TransactionTestCase):
+    """Many clerks racing for a handful of lockers must never double-assign one."""
+
+    def test_concurrent_assignments_stay_consistent(self):
+        shelves = [make_shelf().pk for _ in range(3)]
+        athletes = [make_athlete() for _ in range(12)]
+
+        def attempt(args):
+            athlete, shelf_id = args
+            try:
+                assign_locker(athlete, shelf_id)
+                return True
+            except LockerUnavailable:
+                return False
+            finally:
+                connection.close()
+
+        jobs = [(athlete, shelves[i % len(shelves)]) for i, athlete in enumerate(athletes)]
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            wins = sum(pool.map(attempt, jobs))
+
+        self.assertEqual(wins, len(shelves))
+        for shelf in Shelf.objects.all():
+            self.assertEqual(shelf.status, 'assigned')
+            self.assertEqual(Athlete.objects.filter(shelf=shelf).count(), 1)
+            self.assertEqual(Athlete.objects.get(shelf=shelf).pk, shelf.assigned_athlete_id)
+        release_locker(shelves[0])
+        self.assertEqual(Athlete.objects.filter(shelf__isnull=False).count(), len(shelves) - 1)
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def test_profiles(self):
+        tuned = database_settings(Path('/srv'), 'sqlite')
+        self.assertEqual(tuned['PRAGMAS']['journal_mode'], 'WAL')
+        self.assertEqual(tuned['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertGreater(tuned['CONN_MAX_AGE'], 0)
+
+        self.assertNotIn('PRAGMAS', database_settings(Path('/srv'), 'sqlite-plain'))
+
+        postgres = database_settings(Path('/srv'), 'postgres')
+        self.assertIn('pool', postgres['OPTIONS'])
+        self.assertEqual(postgres['CONN_MAX_AGE'], 0)
+
+        with self.assertRaises(ValueError):
+            database_settings(Path('/srv'), 'mysql')
+
+    def test_retry_when_locked(self):
+        work = mock.Mock(side_effect=[OperationalError('database is locked'), 'done'])
+        with mock.patch('gymsystem.database.time.sleep'):
+            self.assertEqual(retry_when_locked(work), 'done')
+        self.assertEqual(work.call_count, 2)
+
+        with self.assertRaises(OperationalError):
+            retry_when_locked(mock.Mock(side_effect=OperationalError('no such table')))
+
+
+class SpaServingTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        (self.root / 'assets').mkdir()
+        self.index = self.root / 'index.html'
+        self.index.write_text('<div id="root">v1</div>')
+        self.asset = self.root / 'assets' / 'index-abc123.js'
+        self.asset.write_text('console.log(1)')
+        self.asset.with_name('index-abc123.js.gz').write_bytes(gzip.compress(b'console.log(1)'))
+        override = override_settings(SPA_INDEX_FILE=str(self.index), SPA_ASSETS_DIR=str(self.root / 'assets'))
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_index_is_cached_and_reloaded_on_change(self):
+        response = self.client.get('/athletes')
+        self.assertEqual(response.content, b'<div id="root">v1</div>')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(self.client.get('/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.index.write_text('<div id="root">v2</div>')
+        stat = self.index.stat()
+        os.utime(self.index, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.client.get('/').content, b'<div id="root">v2</div>')
+
+    def test_asset_is_immutable_and_precompressed(self):
+        response = self.client.get('/assets/index-abc123.js', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'console.log(1)')
+
+        plain = self.client.get('/assets/index-abc123.js', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(
+            self.client.get('/assets/index-abc123.js', HTTP_IF_NONE_MATCH=plain['ETag']).status_code, 304)
+        self.assertEqual(self.client.get('/assets/../index.html').status_code, 404)
+
+
+class PhotoPipelineTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name, GYM_IMAGE_WORKERS=0)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def upload(self, size=(3000, 2000)):
+        exif = Image.Exif()
+        exif[0x0112] = 6          # Orientation: rotate 90
+        exif[0x010F] = 'PhoneCo'  # Make
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+        photo = SimpleUploadedFile('phone.jpg', buffer.getvalue(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/athletes/', {
+                'full_name': 'Photo Athlete', 'gym_type': 'fitness', 'gym_time': 'morning', 'photo': photo,
+            }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        return Athlete.objects.get(pk=response.data['id'])
+
+    def test_upload_is_reencoded_and_thumbnailed(self):
+        athlete = self.upload()
+        self.assertTrue(athlete.photo.name.endswith('.webp'))
+        with Image.open(athlete.photo.path) as image:
+            self.assertEqual(image.size, (1067, 1600))  # orientation applied, long side capped
+            self.assertFalse(image.getexif())
+        self.assertFalse(default_storage.exists('athletes/phone.jpg'))
+
+        thumbnails = self.client.get(f'/api/athletes/{athlete.pk}/').data['thumbnails']
+        self.assertEqual(set(thumbnails), {'sm', 'md'})
+        with Image.open(default_storage.path(athlete.photo_thumbnails['sm'])) as thumb:
+            self.assertEqual(thumb.size, (96, 96))
+
+    def test_unprocessed_photo_has_no_thumbnails_and_processing_is_idempotent(self):
+        athlete = self.upload(size=(200, 100))
+        variants = dict(athlete.photo_thumbnails)
+        self.assertEqual(process_athlete_photo(athlete.pk), variants)
+
+        Athlete.objects.filter(pk=athlete.pk).update(photo='athletes/other.jpg')
+        self.assertIsNone(self.client.get(f'/api/athletes/{athlete.pk}/').data['thumbnails'])
+
+
+class FeeStatusTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+        cache.clear()
+
+    def make(self, days_left):
+        return make_athlete(fee_deadline_date=date.today() + timedelta(days=days_left))
+
+    def test_buckets_set_on_save_and_exposed(self):
+        expected = {-3: 'overdue', 0: 'overdue', 1: 'critical', 5: 'critical', 6: 'warning', 15: 'warning', 16: 'safe'}
+        athletes = {days: self.make(days) for days in expected}
+        for days, name in expected.items():
+            self.assertEqual(Athlete.FEE_STATUS_NAMES[athletes[days].fee_status], name, days)
+        data = self.client.get(f'/api/athletes/{athletes[0].pk}/').data
+        self.assertEqual(data['fee_status'], 'overdue')
+
+        response = self.client.get('/api/athletes/fee_status_counts/')
+        self.assertEqual(response.data, {'overdue': 2, 'critical': 2, 'warning': 2, 'safe': 1, 'total': 7})
+
+        ordered = self.client.get('/api/athletes/?ordering=fee_status').data['results']
+        self.assertEqual([row['fee_status'] for row in ordered][:3], ['overdue', 'overdue', 'critical'])
+        critical = self.client.get('/api/athletes/?fee_status=critical').data['results']
+        self.assertEqual({row['id'] for row in critical}, {athletes[1].pk, athletes[5].pk})
+
+    def test_advance_moves_only_rows_that_crossed_a_boundary(self):
+        for days in (20, 16, 6, 1, -5):
+            self.make(days)
+        tomorrow = date.today() + timedelta(days=1)
+        self.assertEqual(stale_fee_statuses(tomorrow).count(), 3)  # 16 -> warning, 6 -> critical, 1 -> overdue
+        before = timezone.now()
+        self.assertEqual(advance_fee_statuses(tomorrow), 3)
+        self.assertEqual(advance_fee_statuses(tomorrow), 0)
+        # Delta sync picks the moves up
+        self.assertEqual(Athlete.objects.filter(updated_at__gte=before).count(), 3)
+
+    def test_first_read_of_the_day_advances_stale_buckets(self):
+        athlete = self.make(-3)
+        # As if the daily command had not run since the deadline passed
+        Athlete.objects.filter(pk=athlete.pk).update(fee_status=Athlete.FEE_SAFE)
+        response = self.client.get('/api/athletes/fee_status_counts/')
+        self.assertEqual(response.data['overdue'], 1)
+        self.assertEqual(self.client.get('/api/athletes/').data['results'][0]['fee_status'], 'overdue')
+
+        Athlete.objects.filter(pk=athlete.pk).update(fee_status=Athlete.FEE_SAFE)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/athletes/fee_status_counts/')
+        # Only once a day
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "gym_athlete"')])
+
+    def test_renew_moves_athlete_to_safe(self):
+        athlete = self.make(-2)
+        self.client.post(f'/api/athletes/{athlete.pk}/renew/', {}, format='json')
+        athlete.refresh_from_db()
+        self.assertEqual(athlete.fee_status, Athlete.FEE_SAFE)
+
+
+class BulkRenewTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+
+    def test_bulk_renew(self):
+        first = make_athlete(final_fee=1000, fee_deadline_date=date.today() - timedelta(days=3))
+        second = make_athlete(final_fee=700, gym_type='bodybuilding')
+        items = [{'id': first.pk}, {'id': second.pk, 'duration': 90}, {'id': 999999}, {'id': first.pk}, {'id': 'x'}]
+        response = self.client.post('/api/athletes/bulk_renew/', items, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['renewed'], response.data['failed']), (2, 3))
+        self.assertEqual([r['status'] for r in response.data['results']],
+                         ['renewed', 'renewed', 'error', 'error', 'error'])
+        self.assertEqual(response.data['results'][1]['amount'], 2100)
+
+        first.refresh_from_db()
+        self.assertEqual(first.fee_deadline_date, date.today() + timedelta(days=30))
+        self.assertEqual(first.fee_status, Athlete.FEE_SAFE)
+        self.assertEqual(Payment.objects.filter(payment_type='renewal').count(), 2)
+        self.assertEqual(
+            RevenueRollup.objects.get(granularity='day', payment_type='renewal', gym_type='bodybuilding').total, 2100)
+
+    def test_query_count_does_not_grow_with_items(self):
+        def renew(count):
+            items = [{'id': make_athlete(gym_type=gym_type).pk}
+                     for gym_type in ('fitness', 'bodybuilding') for _ in range(count)]
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.post('/api/athletes/bulk_renew/', items, format='json')
+            return len(ctx.captured_queries)
+
+        renew(1)  # create today's rollup buckets
+        self.assertEqual(renew(1), renew(20))
+
+    def test_renew_rolls_back_dates_when_payment_fails(self):
+        athlete = make_athlete(fee_deadline_date=date.today() + timedelta(days=2))
+        with mock.patch.object(Payment, 'save', side_effect=RuntimeError('insert failed')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(f'/api/athletes/{athlete.pk}/renew/', {'duration': 30}, format='json')
+        athlete.refresh_from_db()
+        self.assertEqual(athlete.fee_deadline_date, date.today() + timedelta(days=2))
+        self.assertFalse(athlete.payments.exists())
+
+    def test_rejects_empty_payload(self):
+        self.assertEqual(self.client.post('/api/athletes/bulk_renew/', [], format='json').status_code, 400)
+
+
+class ConditionalRequestTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+
+    def test_unchanged_poll_is_304_without_touching_big_tables(self):
+        make_athlete()
+        for url in ('/api/athletes/', '/api/shelves/', '/api/dashboard/', '/api/reports/revenue/'):
+            etag = self.client.get(url)['ETag']
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual([q['sql'] for q in ctx.captured_queries if 'gym_resourceversion' not in q['sql']], [], url)
+
+    def test_writes_change_the_etag(self):
+        athlete = make_athlete()
+        shelf = make_shelf()
+        etag = self.client.get('/api/athletes/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(athlete=athlete, amount=1000, payment_type='renewal')
+        self.assertEqual(self.client.get('/api/athletes/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get('/api/shelves/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            assign_locker(athlete, shelf.pk)
+        self.assertEqual(self.client.get('/api/shelves/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get('/api/athletes/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/athletes/bulk_renew/', [{'id': athlete.pk}], format='json')
+        self.assertEqual(self.client.get('/api/athletes/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_shelf_delete_changes_athlete_etag(self):
+        athlete = make_athlete()
+        shelf = make_shelf()
+        with self.captureOnCommitCallbacks(execute=True):
+            assign_locker(athlete, shelf.pk)
+        url = f'/api/athletes/{athlete.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            shelf.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['shelf'])
+
+    def test_different_query_gets_different_etag(self):
+        self.assertNotEqual(self.client.get('/api/athletes/')['ETag'],
+                            self.client.get('/api/athletes/?ordering=full_name')['ETag'])
+
+
+@mock.patch('gym.sync.SYNC_OVERLAP', timedelta(0))
+class SyncTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+
+    def sync(self, token=None, **params):
+        if token:
+            params['since'] = token
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def ids(self, rows):
+        return {row['id'] for row in rows}
+
+    def test_full_then_delta(self):
+        athlete = make_athlete()
+        payment = Payment.objects.create(athlete=athlete, amount=1000, payment_type='registration')
+        shelf = make_shelf()
+        first = self.sync()
+        self.assertTrue(first['full'])
+        self.assertEqual(self.ids(first['athletes']), {athlete.pk})
+        self.assertEqual(self.ids(first['payments']), {payment.pk})
+
+        unchanged = self.sync(first['token'])
+        self.assertEqual((unchanged['athletes'], unchanged['payments'], unchanged['shelves']), ([], [], []))
+
+        other = make_athlete()
+        assign_locker(other, shelf.pk)     # queryset updates on athlete and shelf
+        athlete_id, payment_id = athlete.pk, payment.pk
+        athlete.delete()                   # cascades to its payment
+        delta = self.sync(unchanged['token'])
+        self.assertFalse(delta['full'])
+        self.assertEqual(self.ids(delta['athletes']), {other.pk})
+        self.assertEqual(self.ids(delta['shelves']), {shelf.pk})
+        self.assertEqual(delta['deleted'], {'athletes': [athlete_id], 'payments': [payment_id], 'shelves': []})
+
+    def test_pages_through_backlog(self):
+        athletes = {make_athlete().pk for _ in range(5)}
+        seen, token = set(), None
+        for _ in range(5):
+            page = self.sync(token, limit=2)
+            seen |= self.ids(page['athletes'])
+            token = page['token']
+            if not page['has_more']:
+                break
+        self.assertEqual(seen, athletes)
+
+    def test_bad_and_expired_tokens(self):
+        self.assertEqual(self.client.get('/api/sync/', {'since': 'garbage'}).status_code, 400)
+        naive = dict.fromkeys(('athletes', 'payments', 'shelves', 'deleted'), ['2026-01-01T00:00:00', 0])
+        naive_token = urlsafe_b64encode(json.dumps(naive).encode()).decode().rstrip('=')
+        self.assertEqual(self.client.get('/api/sync/', {'since': naive_token}).status_code, 400)
+        token = self.sync()['token']
+        Tombstone.objects.create(resource='athletes', object_id=1)
+        with self.settings(GYM_SYNC_TOMBSTONE_DAYS=-1):
+            self.assertEqual(self.client.get('/api/sync/', {'since': token}).status_code, 410)
+
+
+class EventBrokerTests(SimpleTestCase):
+    async def test_fans_out_from_other_threads_and_filters(self):
+        broker = Broker()
+        shelves = broker.subscribe(['shelves'])
+        everything = broker.subscribe()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, broker.publish, {'resource': 'athletes'})
+        await loop.run_in_executor(None, broker.publish, {'resource': 'shelves', 'saved': [3], 'deleted': []})
+
+        frame = await asyncio.wait_for(shelves.get(), 1)
+        self.assertEqual(frame, b'event: change\ndata: {"resource":"shelves","saved":[3],"deleted":[]}\n\n')
+        self.assertIn(b'"athletes"', await asyncio.wait_for(everything.get(), 1))
+        shelves.close()
+        everything.close()
+        self.assertEqual(broker.subscriber_count, 0)
+
+    async def test_slow_subscriber_gets_resync(self):
+        broker = Broker(max_queue=2)
+        subscription = broker.subscribe()
+        for n in range(5):
+            broker.publish({'resource': 'payments', 'saved': [n], 'deleted': []})
+        await asyncio.sleep(0)
+        self.assertEqual(await subscription.get(), RESYNC_FRAME)
+        self.assertTrue(subscription.queue.empty())
+        broker.publish({'resource': 'payments'})
+        await asyncio.sleep(0)
+        self.assertIn(b'"payments"', await subscription.get())
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('frontdesk')
+        self.client = AsyncClient()
+        cache.clear()
+
+    def create_shelf(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return make_shelf()
+
+    async def test_stream_delivers_committed_changes(self):
+        response = await self.client.get(
+            '/api/events/', {'resources': 'shelves', 'ticket': issue_ticket(self.user)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        frames = aiter(response.streaming_content)
+        self.assertTrue((await anext(frames)).startswith(b'retry:'))
+
+        shelf = await sync_to_async(self.create_shelf)()
+        frame = await asyncio.wait_for(anext(frames), 1)
+        self.assertIn(f'"saved":[{shelf.pk}]'.encode(), frame)
+        await frames.aclose()
+
+    async def test_requires_ticket(self):
+        response = await self.client.get('/api/events/', {'ticket': 'nope'})
+        self.assertEqual(response.status_code, 401)
+        # Access tokens are not accepted in the query string
+        response = await self.client.get('/api/events/', {'token': str(AccessToken.for_user(self.user))})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_ticket_opens_one_stream(self):
+        ticket = issue_ticket(self.user)
+        response = await self.client.get('/api/events/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 200)
+        await aiter(response.streaming_content).aclose()
+        response = await self.client.get('/api/events/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_ticket_expires(self):
+        ticket = issue_ticket(self.user)
+        with override_settings(GYM_EVENTS_TICKET_TTL=-1):
+            response = await self.client.get('/api/events/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+
+    def test_ticket_endpoint(self):
+        client = APIClient()
+        self.assertEqual(client.post('/api/events/ticket/').status_code, 401)
+        client.force_authenticate(self.user)
+        response = client.post('/api/events/ticket/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['expires_in'], settings.GYM_EVENTS_TICKET_TTL)
+
+
+class ExpirySweepTests(APITestCase):
+    def setUp(self):
+        today = date.today()
+        self.lapsed = [make_athlete(fee_deadline_date=today - timedelta(days=40 + n)) for n in range(3)]
+        self.recent = make_athlete(fee_deadline_date=today - timedelta(days=5))
+        self.expired_shelf, self.current_shelf = make_shelf(), make_shelf()
+        self.holder, self.other = make_athlete(), make_athlete()
+        assign_locker(self.holder, self.expired_shelf.pk, {'locker_end_date': today - timedelta(days=1)})
+        assign_locker(self.other, self.current_shelf.pk, {'locker_end_date': today})
+
+    def test_sweeps_in_batches(self):
+        batches = []
+        report = sweep_expired(grace_days=30, batch_size=2, on_batch=lambda kind, ids: batches.append((kind, ids)))
+        self.assertEqual((report['athletes_deactivated'], report['lockers_released']), (3, 1))
+        self.assertEqual([kind for kind, _ in batches], ['athletes_deactivated'] * 2 + ['lockers_released'])
+
+        self.assertFalse(Athlete.objects.filter(pk__in=[a.pk for a in self.lapsed], is_active=True).exists())
+        self.recent.refresh_from_db()
+        self.assertTrue(self.recent.is_active)
+        self.expired_shelf.refresh_from_db()
+        self.holder.refresh_from_db()
+        self.assertEqual((self.expired_shelf.status, self.expired_shelf.locker_end_date), ('available', None))
+        self.assertIsNone(self.holder.shelf_id)
+        self.assertEqual(Shelf.objects.get(pk=self.current_shelf.pk).assigned_athlete_id, self.other.pk)
+
+    def test_dry_run_writes_report_only(self):
+        report_path = os.path.join(tempfile.mkdtemp(), 'sweep.jsonl')
+        call_command('sweep_expired', '--dry-run', '--grace-days', '30', '--report', report_path, stdout=StringIO())
+        lines = Path(report_path).read_text().splitlines()
+        self.assertIn('"kind": "summary"', lines[-1])
+        self.assertEqual(Athlete.objects.filter(is_active=False).count(), 0)
+        self.assertEqual(Shelf.objects.get(pk=self.expired_shelf.pk).status, 'assigned')
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        registry.reset()
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+
+    def test_records_route_queries_and_bytes(self):
+        make_athlete()
+        self.client.get('/api/athletes/')
+        body = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('gym_http_requests_total{route="athlete-list",method="GET",status="200"} 1', body)
+        self.assertIn('gym_http_request_queries_count{route="athlete-list",method="GET"} 1', body)
+        self.assertRegex(body, r'gym_http_response_bytes_sum\{route="athlete-list",method="GET"\} [1-9]')
+        self.assertNotIn('gym_http_request_queries_bucket{route="athlete-list",method="GET",le="0"} 1', body)
+
+    @override_settings(GYM_SLOW_QUERY_MS=0)
+    def test_logs_slow_queries(self):
+        def view(request):
+            Athlete.objects.count()
+            return HttpResponse('ok')
+
+        with self.assertLogs('gym.slow_queries', 'WARNING') as logs:
+            MetricsMiddleware(view)(RequestFactory().get('/x'))
+        self.assertIn('SELECT COUNT(*)', logs.output[0])
+
+    @override_settings(GYM_SLOW_QUERY_MS=0)
+    async def test_async_requests(self):
+        async def view(request):
+            await sync_to_async(Athlete.objects.count)()
+            return HttpResponse('ok')
+
+        middleware = MetricsMiddleware(view)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        with self.assertLogs('gym.slow_queries', 'WARNING') as logs:
+            response = await middleware(RequestFactory().get('/x'))
+        self.assertEqual(response.content, b'ok')
+        self.assertIn('SELECT COUNT(*)', logs.output[0])
+        self.assertIn('gym_http_request_queries_sum{route="unmatched",method="GET"} 1', registry.render())
+
+    @override_settings(GYM_METRICS_TOKEN='s3cret')
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+
+
+class BenchmarkTests(APITestCase):
+    def test_seed_command_and_flows(self):
+        call_command('seed_gym', '--athletes', '40', '--payments-per-athlete', '3', '--shelves', '10',
+                     stdout=StringIO())
+        self.assertEqual(Athlete.objects.count(), 40)
+        self.assertEqual(Shelf.objects.filter(status='assigned').count(), 5)
+        self.assertEqual(RevenueRollup.objects.filter(granularity='day').aggregate(n=Sum('payment_count'))['n'], Payment.objects.count())
+
+        self.client.force_authenticate(User.objects.create_user('benchmark'))
+        results = run_flows(self.client, repeat=2, warmup=0)
+        self.assertEqual(len(results), 7)
+        for name, flow in results.items():
+            self.assertEqual(flow['errors'], 0, name)
+            self.assertGreater(flow['queries'], 0, name)
+
+    def test_compare_flags_slowdowns_and_extra_queries(self):
+        baseline = {'list': {'p50': 10, 'queries': 2}, 'renew': {'p50': 10, 'queries': 5}}
+        current = {'list': {'p50': 10.5, 'queries': 3}, 'renew': {'p50': 20, 'queries': 5}}
+        self.assertEqual(compare_results(current, baseline), [
+            'list: 2 -> 3 queries', 'renew: p50 10 -> 20 ms',
+        ])
+
+
+class AlertsEndpointTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+        today = date.today()
+        self.overdue = make_athlete(fee_deadline_date=today - timedelta(days=2))
+        self.expiring = make_athlete(fee_deadline_date=today + timedelta(days=3))
+        make_athlete(fee_deadline_date=today + timedelta(days=4))
+        make_athlete(fee_deadline_date=today - timedelta(days=9), is_active=False)
+
+    def test_lists_urgent_athletes_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/alerts/')
+        self.assertEqual(len(queries), 2)   # resource version + the alert range scan
+        self.assertEqual(
+            [(row['id'], row['days_left']) for row in response.data['results']],
+            [(self.overdue.pk, -2), (self.expiring.pk, 3)],
+        )
+        self.assertEqual(set(response.data['results'][0]), {
+            'id', 'full_name', 'days_left', 'avatar', 'gym_type', 'contact_number'})
+
+    def test_since_skips_the_query_until_athletes_change(self):
+        version = self.client.get('/api/alerts/').data['version']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/alerts/', {'since': version})
+        self.assertEqual(response.data, {'changed': False, 'version': version})
+        self.assertEqual(len(queries), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.expiring.full_name = 'Renamed'
+            self.expiring.save()
+        response = self.client.get('/api/alerts/', {'since': version})
+        self.assertTrue(response.data['changed'])
+        self.assertNotEqual(response.data['version'], version)
+
+
+class AthletePaginationTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+        self.athletes = [make_athlete(full_name='Same Name', is_active=n % 3 != 0) for n in range(7)]
+
+    def walk(self, url):
+        rows = []
+        while url:
+            response = self.client.get(url)
+            rows += response.data['results']
+            url = response.data['next']
+        return rows
+
+    def test_ties_on_non_unique_ordering(self):
+        for ordering, key in (('is_active', lambda a: (a.is_active, a.pk)),
+                              ('-full_name', lambda a: (a.full_name, -a.pk))):
+            rows = self.walk(f'/api/athletes/?ordering={ordering}&page_size=2')
+            expected = [a.pk for a in sorted(self.athletes, key=key)]
+            self.assertEqual([row['id'] for row in rows], expected, ordering)
+
+    def test_previous_link(self):
+        first = self.client.get('/api/athletes/?ordering=is_active&page_size=3')
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual([row['id'] for row in back.data['results']],
+                         [row['id'] for row in first.data['results']])
+        self.assertIsNotNone(back.data['next'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', urlsafe_b64encode(b'{"p": [1]}').decode(), urlsafe_b64encode(b'[]').decode()):
+            response = self.client.get('/api/athletes/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+class PaymentLedgerTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+        self.fitness = make_athlete(gym_type='fitness')
+        self.bodybuilder = make_athlete(gym_type='bodybuilding')
+        today = date.today()
+        rows = [
+            (self.fitness, 1000, 'registration', today - timedelta(days=40)),
+            (self.fitness, 1000, 'renewal', today - timedelta(days=10)),
+            (self.bodybuilder, 700, 'registration', today - timedelta(days=10)),
+            (self.bodybuilder, 700, 'renewal', today),
+        ]
+        for athlete, amount, kind, day in rows:
+            payment = Payment.objects.create(athlete=athlete, amount=amount, payment_type=kind)
+            # payment_date is auto_now_add
+            Payment.objects.filter(pk=payment.pk).update(payment_date=day)
+
+    def test_keyset_pages_newest_first(self):
+        seen = []
+        url = '/api/payments/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            seen += [(row['payment_date'], row['id']) for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(response.data['results'][-1]['athlete_name'], self.fitness.full_name)
+
+    def test_filters(self):
+        week_ago = (date.today() - timedelta(days=7)).isoformat()
+        cases = {
+            f'payment_date_before={week_ago}': 3,
+            'payment_type=renewal': 2,
+            f'athlete={self.bodybuilder.pk}': 2,
+            'gym_type=bodybuilding&payment_type=registration': 1,
+        }
+        for query, expected in cases.items():
+            response = self.client.get(f'/api/payments/?{query}')
+            self.assertEqual(len(response.data['results']), expected, query)
+
+    def test_summary_is_aggregated_in_sql(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/payments/summary/', {'payment_type': 'renewal'})
+        self.assertEqual(len(queries), 3)   # resource versions, totals, months
+        self.assertEqual((response.data['total'], response.data['count']), (Decimal('1700'), 2))
+        self.assertEqual(response.data['by_gym_type'], {'fitness': Decimal('1000'), 'bodybuilding': Decimal('700')})
+        self.assertEqual(sum(row['count'] for row in response.data['by_month']), 2)
+
+    def test_export_streams_csv(self):
+        response = self.client.get('/api/payments/export/', {'gym_type': 'fitness'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['id', 'payment_date', 'payment_type', 'amount'])
+        self.assertEqual(len(lines), 3)
+
+
+class PaymentSummaryTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+
+    def assertSummary(self, athlete, count, total, last=None):
+        athlete.refresh_from_db()
+        self.assertEqual((athlete.payment_count, athlete.total_paid, athlete.last_payment_date),
+                         (count, Decimal(total), last if count else None))
+
+    def test_summary_follows_every_write_path(self):
+        today = date.today()
+        response = self.client.post('/api/athletes/', {
+            'full_name': 'Summary', 'gym_type': 'fitness', 'gym_time': 'morning'}, format='json')
+        self.assertEqual((response.data['payment_count'], response.data['total_paid']), (1, '1000.00'))
+        athlete = Athlete.objects.get(pk=response.data['id'])
+        self.assertSummary(athlete, 1, 1000, today)
+
+        response = self.client.post(f'/api/athletes/{athlete.pk}/renew/', {'duration': 60}, format='json')
+        self.assertEqual(response.data['athlete']['payment_count'], 2)
+        self.assertSummary(athlete, 2, 3000, today)
+
+        self.client.post('/api/athletes/bulk_renew/', [{'id': athlete.pk}], format='json')
+        self.assertSummary(athlete, 3, 4000, today)
+
+        payment = athlete.payments.order_by('pk').first()
+        payment.amount = 500
+        payment.save()
+        self.assertSummary(athlete, 3, 3500, today)
+        payment.delete()
+        self.assertSummary(athlete, 2, 3000, today)
+        athlete.payments.all().delete()
+        self.assertSummary(athlete, 0, 0)
+
+    def test_import_sets_summary(self):
+        self.client.post('/api/athletes/bulk/', b'full_name,gym_type,gym_time\nOmid,fitness,night\n',
+                         content_type='text/csv')
+        self.assertSummary(Athlete.objects.get(full_name='Omid'), 1, 1000, date.today())
+
+    def test_payments_sub_resource_is_paginated(self):
+        athlete = make_athlete()
+        other = make_athlete()
+        for n in range(5):
+            Payment.objects.create(athlete=athlete, amount=100 + n, payment_type='renewal')
+        Payment.objects.create(athlete=other, amount=1, payment_type='renewal')
+
+        detail = self.client.get(f'/api/athletes/{athlete.pk}/')
+        self.assertNotIn('payments', detail.data)
+        self.assertEqual((detail.data['payment_count'], detail.data['total_paid']), (5, '510.00'))
+
+        seen, url = [], f'/api/athletes/{athlete.pk}/payments/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, sorted(athlete.payments.values_list('pk', flat=True), reverse=True))
+        self.assertEqual(self.client.get('/api/athletes/999999/payments/').status_code, 404)
+
+
+class RepresentationCacheTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('frontdesk'))
+        representation_cache().clear()
+        registry.reset()
+        self.athletes = [make_athlete(shelf=make_shelf()) for _ in range(4)]
+
+    def lookups(self, serializer):
+        counters = registry.counters['gym_representation_cache_total']
+        return {result: counters.get((('serializer', serializer), ('result', result)), 0)
+                for result in ('hit', 'miss')}
+
+    def test_only_changed_rows_are_serialized_again(self):
+        first = self.client.get('/api/athletes/').data['results']
+        self.assertEqual(self.lookups('AthleteSerializer'), {'hit': 0, 'miss': 4})
+
+        changed = Athlete.objects.get(pk=self.athletes[0].pk)
+        changed.notes = 'Moved to the night shift'
+        changed.save()
+        Payment.objects.create(athlete=self.athletes[1], amount=500, payment_type='renewal')
+        registry.reset()
+        second = self.client.get('/api/athletes/').data['results']
+        self.assertEqual(self.lookups('AthleteSerializer'), {'hit': 2, 'miss': 2})
+
+        by_id = {row['id']: row for row in second}
+        self.assertEqual(by_id[changed.pk]['notes'], 'Moved to the night shift')
+        self.assertEqual(by_id[self.athletes[1].pk]['payment_count'], 1)
+        self.assertEqual([row for row in second if row['id'] not in (changed.pk, self.athletes[1].pk)],
+                         [row for row in first if row['id'] not in (changed.pk, self.athletes[1].pk)])
+
+    def test_cached_rows_match_fresh_serialization(self):
+        self.client.get('/api/shelves/')
+        cached = self.client.get('/api/shelves/').data
+        self.assertEqual(self.lookups('ShelfSerializer'), {'hit': 4, 'miss': 4})
+        representation_cache().clear()
+        self.assertEqual(self.client.get('/api/shelves/').data, cached)
+
+    def test_shelf_follows_assigned_athlete_rename(self):
+        self.client.get('/api/shelves/')
+        athlete = Athlete.objects.get(pk=self.athletes[2].pk)
+        athlete.full_name = 'Renamed Athlete'
+        athlete.save()
+        names = {row['athlete_name'] for row in self.client.get('/api/shelves/').data}
+        self.assertIn('Renamed Athlete', names)
+
+
+class FastJSONTests(SimpleTestCase):
+    payload = {
+        'name': 'Ahmad   Azizi – 🏋',
+        'fee': Decimal('1000.50'),
+        'day': date(2026, 1, 2),
+        'moment': datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+        'naive': datetime(2026, 1, 2, 3, 4, 5),
+        'rows': [{'id': 1, 'amount': '700.00', 'active': True, 'shelf': None}],
+        'by_id': {7: 'int keys fall back to the stdlib'},
+    }
+
+    def test_renders_the_same_bytes_as_drf(self):
+        for data in (self.payload, {'plain': [1, 2.5, 'x'], 'big': 10 ** 30}, []):
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(self.payload, 'application/json; indent=4'),
+                         JSONRenderer().render(self.payload, 'application/json; indent=4'))
+        with mock.patch('gymsystem.renderers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+
+    def test_parses_the_same_values_as_drf(self):
+        body = JSONRenderer().render(self.payload)
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+        # Integers beyond 64 bits come back as floats, as orjson reads them
+        self.assertEqual(FastJSONParser().parse(BytesIO(b'{"big": 1000000000000000000000000000000}')),
+                         {'big': 1e30})
+        for invalid in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaisesMessage(ParseError, 'JSON parse error'):
+                FastJSONParser().parse(BytesIO(invalid))
@@ -0,0 +1,125 @@
+"""
+Resource versions for HTTP conditional requests.
+
+``ResourceVersion`` holds one tiny row per API resource (athletes, payments,
+shelves). Every change to those tables bumps the matching counter: model
+signals cover ``save()``/``delete()``, and the bulk and queryset-update paths
+(bulk import/renew, the locker service, photo processing, ...) call
+``bump_versions`` themselves. Bumps are written after the transaction
+commits and coalesced, so a cascade delete of a hundred payments costs one
+UPDATE. The same flush publishes the live change events (``gym.events``).
+
+Views build an ETag and Last-Modified from these counters, which lets them
+answer an unchanged poll with 304 after a single primary-key lookup on
+``ResourceVersion`` -- the athlete, payment and shelf tables are not touched.
+"""
+from datetime import date, datetime, time
+import hashlib
+import threading
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .events import publish_changes
+from .models import Athlete, Payment, ResourceVersion, Shelf
+
+ATHLETES = 'athletes'
+PAYMENTS = 'payments'
+SHELVES = 'shelves'
+
+_MODEL_RESOURCES = {Athlete: ATHLETES, Payment: PAYMENTS, Shelf: SHELVES}
+_pending = threading.local()
+
+
+def resource_for_model(model):
+    return _MODEL_RESOURCES[model]
+
+
+def bump_versions(*resources):
+    """Mark ``resources`` as changed once the current transaction commits."""
+    pending = getattr(_pending, 'resources', None)
+    if pending is None:
+        pending = _pending.resources = set()
+    pending.update(resources)
+    # Every call registers a flush; the first one to run writes all pending
+    # bumps and the rest find nothing to do. A rolled-back transaction's
+    # resources are simply bumped with the next commit.
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    pending = getattr(_pending, 'resources', None)
+    if not pending:
+        return
+    _pending.resources = set()
+    now = timezone.now()
+    for resource in sorted(pending):
+        _bump(resource, now)
+    publish_changes(pending)
+
+
+def _bump(resource, now):
+    row = ResourceVersion.objects.filter(resource=resource)
+    if row.update(version=F('version') + 1, updated_at=now):
+        return
+    try:
+        with transaction.atomic():
+            ResourceVersion.objects.create(resource=resource, version=1, updated_at=now)
+    except IntegrityError:
+        row.update(version=F('version') + 1, updated_at=now)
+
+
+def get_versions(resources):
+    """``({resource: version}, last_modified)`` for ``resources``, in one query."""
+    rows = ResourceVersion.objects.filter(resource__in=resources).values_list('resource', 'version', 'updated_at')
+    versions = dict.fromkeys(resources, 0)
+    last_modified = None
+    for resource, version, updated_at in rows:
+        versions[resource] = version
+        last_modified = max(last_modified, updated_at) if last_modified else updated_at
+    return versions, last_modified
+
+
+class ConditionalGetMixin:
+    """
+    Answer GETs with 304 when the resources a view depends on are unchanged.
+
+    Set ``version_resources`` to the resources the representation is built
+    from, and ``versions_vary_by_day`` when it also depends on today's date
+    (``days_left``, fee status). Wrap handlers with ``conditional_get``.
+    """
+    version_resources = ()
+    versions_vary_by_day = False
+
+    def get_validators(self, request):
+        versions, last_modified = get_versions(self.version_resources)
+        # Handlers may use them, e.g. to answer ?since= without another query
+        self.resource_versions = versions
+        parts = [f'{resource}:{version}' for resource, version in sorted(versions.items())]
+        parts.append(request.get_full_path())
+        parts.append(request.headers.get('Accept', ''))
+        if self.versions_vary_by_day:
+            today = date.today()
+            parts.append(today.isoformat())
+            midnight = timezone.make_aware(datetime.combine(today, time.min))
+            last_modified = max(last_modified, midnight) if last_modified else midnight
+        digest = hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+        return f'W/"{digest}"', last_modified
+
+    def conditional_get(self, request, handler, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            # Let clients keep the body but always revalidate
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+        return response
@@ -1,127 +1,103 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.filters import OrderingFilter
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.contrib.auth import authenticate
-from django.db.models import Sum, Count
-from django.db.models.functions import TruncMonth
+from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from django.utils.dateparse import parse_date
 from datetime import date, timedelta
+from decimal import Decimal
 
-from .models import Athlete, Shelf, Payment
-from .serializers import AthleteSerializer, ShelfSerializer, PaymentSerializer
-from .filters import AthleteFilter
+from .models import Athlete, Shelf, Payment, RevenueRollup
+from .serializers import (
+    AlertSerializer, AthleteSerializer, ShelfSerializer, PaymentSerializer,
+    PaymentLedgerSerializer,
+)
+from .filters import AthleteFilter, PaymentFilter
+from .pagination import AthleteCursorPagination, PaymentCursorPagination
+from .search import AthleteSearchFilter
+from .dashboard import get_dashboard_snapshot
+from .alerts import alert_athletes, alerts_version
+from .lockers import assign_locker, parse_terms, release_locker
+from .fee_status import ensure_fee_statuses_current, fee_status_counts
+from .events import event_stream, get_broker, issue_ticket, redeem_ticket
+from .sync import InvalidSyncToken, SyncTokenExpired, sync_changes
+from .versions import ATHLETES, PAYMENTS, SHELVES, ConditionalGetMixin
+from .bulk import (
+    MAX_RENEWALS, detect_format, import_athletes, iter_athlete_csv, iter_payment_csv, iter_rows, renew_athletes, renewal_amount,
+)
 
 
-class AthleteViewSet(viewsets.ModelViewSet):
+class AthleteViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Athlete.objects.all()
     serializer_class = AthleteSerializer
     filterset_class = AthleteFilter
-    search_fields = ['full_name', 'father_name', 'contact_number']
-    ordering_fields = ['registration_date', 'fee_deadline_date', 'full_name', 'is_active']
+    filter_backends = [DjangoFilterBackend, AthleteSearchFilter, OrderingFilter]
+    ordering_fields = ['registration_date', 'fee_deadline_date', 'full_name', 'is_active', 'fee_status']
     ordering = ['-registration_date']
+    pagination_class = AthleteCursorPagination
+    # Athletes carry payment summaries (and list their payments); days_left changes daily
+    version_resources = (ATHLETES, PAYMENTS)
+    versions_vary_by_day = True
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(request, super().retrieve, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'fee_status_counts'):
+            # Filtering, ordering and counting use the stored bucket. The first
+            # such read of a day advances stale buckets (an UPDATE) in case the
+            # daily advance_fee_status command has not run; see gym.fee_status
+            ensure_fee_statuses_current()
+        return queryset
     
     def perform_create(self, serializer):
-        # First save without athlete.shelf to get the athlete instance
-        athlete = serializer.save()
-        
-        # Create initial registration payment
-        Payment.objects.create(
-            athlete=athlete,
-            amount=athlete.final_fee,
-            payment_type='registration',
-            notes='Initial registration fee'
-        )
-        
-        # Handle locker assignment after athlete is saved
-        shelf_id = self.request.data.get('shelf')
-        if shelf_id:
-            try:
-                shelf = Shelf.objects.get(id=shelf_id)
-                athlete.shelf = shelf
-                athlete.save()
-                
-                # Update locker fields
-                locker_duration = self.request.data.get('locker_duration_months')
-                locker_price = self.request.data.get('locker_price')
-                locker_end_date = self.request.data.get('locker_end_date')
-                
-                if locker_duration:
-                    shelf.locker_duration_months = int(locker_duration)
-                if locker_price:
-                    shelf.locker_price = float(locker_price)
-                if locker_end_date:
-                    shelf.locker_end_date = locker_end_date
-                if not shelf.locker_start_date:
-                    shelf.locker_start_date = date.today()
-                
-                shelf.assigned_athlete = athlete
-                shelf.status = 'assigned'
-                shelf.save()
-            except Shelf.DoesNotExist:
-                pass
+        # The locker is assigned through the locker service, not the serializer
+        shelf = serializer.validated_data.pop('shelf', None)
+
+        with transaction.atomic():
+            athlete = serializer.save()
+            
+            # Create initial registration payment
+            Payment.objects.create(
+                athlete=athlete,
+                amount=athlete.final_fee,
+                payment_type='registration',
+                notes='Initial registration fee'
+            )
+            
+            if shelf:
+                assign_locker(athlete, shelf.pk, parse_terms(self.request.data))
     
     def perform_update(self, serializer):
-        # Get the old shelf before updating
-        old_shelf = serializer.instance.shelf if serializer.instance else None
-        
-        # Save the athlete
-        athlete = serializer.save()
-        
-        # Get the new shelf from request data
-        new_shelf_id = self.request.data.get('shelf')
-        
-        # Handle shelf changes
-        if new_shelf_id:
-            try:
-                new_shelf = Shelf.objects.get(id=int(new_shelf_id))
-                
-                # If changing from one shelf to another, unassign the old one
-                if old_shelf and old_shelf != new_shelf:
-                    old_shelf.assigned_athlete = None
-                    old_shelf.status = 'available'
-                    old_shelf.locker_duration_months = None
-                    old_shelf.locker_price = None
-                    old_shelf.locker_end_date = None
-                    old_shelf.locker_start_date = None
-                    old_shelf.save()
-                
-                # Assign new shelf
-                athlete.shelf = new_shelf
-                athlete.save()
-                
-                # Update locker fields
-                locker_duration = self.request.data.get('locker_duration_months')
-                locker_price = self.request.data.get('locker_price')
-                locker_end_date = self.request.data.get('locker_end_date')
-                
-                if locker_duration:
-                    new_shelf.locker_duration_months = int(locker_duration)
-                if locker_price:
-                    new_shelf.locker_price = float(locker_price)
-                if locker_end_date:
-                    new_shelf.locker_end_date = locker_end_date
-                if not new_shelf.locker_start_date:
-                    new_shelf.locker_start_date = date.today()
-                
-                new_shelf.assigned_athlete = athlete
-                new_shelf.status = 'assigned'
-                new_shelf.save()
-                
-            except (Shelf.DoesNotExist, ValueError):
-                pass
-        else:
-            # Unassigning the shelf
-            if old_shelf:
-                old_shelf.assigned_athlete = None
-                old_shelf.status = 'available'
-                old_shelf.locker_duration_months = None
-                old_shelf.locker_price = None
-                old_shelf.locker_end_date = None
-                old_shelf.locker_start_date = None
-                old_shelf.save()
-                athlete.shelf = None
-                athlete.save()
+        # A full update without a shelf unassigns it; a partial one leaves it alone
+        shelf_given = 'shelf' in serializer.validated_data or not serializer.partial
+        shelf = serializer.validated_data.pop('shelf', None)
+
+        with transaction.atomic():
+            athlete = serializer.save()
+            if not shelf_given:
+                return
+            if shelf:
+                assign_locker(athlete, shelf.pk, parse_terms(self.request.data))
+            elif athlete.shelf_id:
+                release_locker(athlete.shelf_id, athlete)
     
     @action(detail=True, methods=['post'])
     def renew(self, request, pk=None):
@@ -129,23 +105,21 @@ class AthleteViewSet(viewsets.ModelViewSet):
         athlete = self.get_object()
         duration_days = int(request.data.get('duration', 30))
         
-        # Calculate amount based on duration? 
-        # For now, just use final_fee * (duration/30) roughly? Or just final_fee.
-        # Assuming final_fee is monthly.
-        months = max(1, round(duration_days / 30))
-        amount = athlete.final_fee * months
+        # final_fee is monthly
+        amount = renewal_amount(athlete.final_fee, duration_days)
         
-        athlete.fee_start_date = date.today()
-        athlete.fee_deadline_date = date.today() + timedelta(days=duration_days)
-        athlete.save()
-        
-        # Create Renewal Payment
-        Payment.objects.create(
-            athlete=athlete,
-            amount=amount,
-            payment_type='renewal',
-            notes=f'Renewed for {duration_days} days'
-        )
+        # The new dates and the renewal payment commit together or not at all
+        with transaction.atomic():
+            athlete.fee_start_date = date.today()
+            athlete.fee_deadline_date = date.today() + timedelta(days=duration_days)
+            athlete.save(update_fields=['fee_start_date', 'fee_deadline_date'])
+
+            Payment.objects.create(
+                athlete=athlete,
+                amount=amount,
+                payment_type='renewal',
+                notes=f'Renewed for {duration_days} days'
+            )
         
         serializer = self.get_serializer(athlete)
         return Response({
@@ -153,97 +127,325 @@ class AthleteViewSet(viewsets.ModelViewSet):
             'athlete': serializer.data
         }, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['get'])
+    def payments(self, request, pk=None):
+        """This athlete's payment history, newest first, keyset-paginated"""
+        return self.conditional_get(request, self._payments)
+
+    def _payments(self, request):
+        athlete = self.get_object()
+        paginator = PaymentCursorPagination()
+        # No view: the athlete list's OrderingFilter does not apply to payments
+        page = paginator.paginate_queryset(athlete.payments.all(), request)
+        return paginator.get_paginated_response(PaymentSerializer(page, many=True).data)
+
+    @action(detail=False, methods=['post'])
+    def bulk_renew(self, request):
+        """
+        Renew many memberships in one transaction. Body: a list of
+        {"id": <athlete id>, "duration": <days, default 30>} (or {"items": [...]}).
+        """
+        items = request.data.get('items') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Expected a non-empty list of {"id", "duration"} items'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_RENEWALS:
+            return Response({'error': f'At most {MAX_RENEWALS} renewals per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = renew_athletes(items)
+        renewed = sum(1 for result in results if result['status'] == 'renewed')
+        return Response(
+            {'renewed': renewed, 'failed': len(results) - renewed, 'results': results},
+            status=status.HTTP_200_OK if renewed else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=False, methods=['get'])
+    def fee_status_counts(self, request):
+        """Number of athletes in each fee status bucket (honours the list filters)"""
+        return self.conditional_get(request, self._fee_status_counts)
+
+    def _fee_status_counts(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        counts = fee_status_counts(queryset)
+        counts['total'] = sum(counts.values())
+        return Response(counts)
+
     @action(detail=True, methods=['post'])
     def toggle_status(self, request, pk=None):
         """Toggle active/inactive status"""
         athlete = self.get_object()
         athlete.is_active = not athlete.is_active
-        athlete.save()
+        athlete.save(update_fields=['is_active'])
         serializer = self.get_serializer(athlete)
         return Response(serializer.data)
 
-class ShelfViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get', 'post'], url_path='bulk')
+    def bulk(self, request):
+        """GET streams the (filtered) roster as CSV; POST imports CSV or NDJSON rows"""
+        if request.method == 'GET':
+            queryset = self.filter_queryset(self.get_queryset())
+            response = StreamingHttpResponse(iter_athlete_csv(queryset), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="athletes.csv"'
+            return response
+
+        # Either a multipart upload in "file" or the raw request body
+        upload = request.FILES.get('file') if request.content_type.startswith('multipart/') else None
+        if upload is not None:
+            rows = iter_rows(upload, detect_format(upload.content_type, upload.name))
+        else:
+            rows = iter_rows(request._request, detect_format(request.content_type))
+
+        result = import_athletes(rows)
+        response_status = status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
 
-    queryset = Shelf.objects.all()
+class ShelfViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+
+    queryset = Shelf.objects.select_related('assigned_athlete')
 
     serializer_class = ShelfSerializer
+    version_resources = (SHELVES, ATHLETES)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(request, super().retrieve, *args, **kwargs)
+
+    @action(detail=True, methods=['post'])
+    def assign(self, request, pk=None):
+        """Assign this locker to an athlete (and release the athlete's previous one)"""
+        try:
+            athlete = Athlete.objects.get(pk=int(request.data.get('athlete')))
+        except (Athlete.DoesNotExist, TypeError, ValueError):
+            return Response({'error': 'A valid athlete id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            shelf = assign_locker(athlete, int(pk), parse_terms(request.data))
+        except (Shelf.DoesNotExist, ValueError):
+            return Response({'error': 'Shelf not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(self.get_serializer(shelf).data)
+
+    @action(detail=True, methods=['post'])
+    def release(self, request, pk=None):
+        """Free this locker"""
+        shelf = self.get_object()
+        release_locker(shelf.pk)
+        shelf.refresh_from_db()
+        return Response(self.get_serializer(shelf).data)
+
+class PaymentViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    The payment ledger. Read-only: payments are written by registration and
+    renewal, which also move the fee dates. gym_type is the one recorded with
+    each payment, as in the revenue rollup.
+    """
+    queryset = Payment.objects.annotate(athlete_name=F('athlete__full_name'))
+    serializer_class = PaymentLedgerSerializer
+    filterset_class = PaymentFilter
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    ordering_fields = ['payment_date']
+    ordering = ['-payment_date']
+    pagination_class = PaymentCursorPagination
+    version_resources = (PAYMENTS, ATHLETES)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(request, super().retrieve, *args, **kwargs)
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Totals of the filtered payments, overall, by type and by month"""
+        return self.conditional_get(request, self._summary)
+
+    def _summary(self, request):
+        payments = self.filter_queryset(Payment.objects.all()).order_by()
+        totals = payments.aggregate(
+            total=Coalesce(Sum('amount'), Value(Decimal('0'))),
+            count=Count('pk'),
+            average=Avg('amount'),
+            first=Min('payment_date'),
+            last=Max('payment_date'),
+            **{f'type_{key}': Sum('amount', filter=Q(payment_type=key)) for key, _ in Payment.PAYMENT_TYPES},
+            **{f'gym_{key}': Sum('amount', filter=Q(gym_type=key)) for key, _ in Athlete.GYM_TYPE_CHOICES},
+        )
+        months = payments.annotate(month=TruncMonth('payment_date')).values('month')\
+            .annotate(total=Sum('amount'), count=Count('pk')).order_by('month')
+        return Response({
+            'total': totals['total'],
+            'count': totals['count'],
+            'average': totals['average'],
+            'first_payment_date': totals['first'],
+            'last_payment_date': totals['last'],
+            'by_payment_type': {key: totals[f'type_{key}'] or 0 for key, _ in Payment.PAYMENT_TYPES},
+            'by_gym_type': {key: totals[f'gym_{key}'] or 0 for key, _ in Athlete.GYM_TYPE_CHOICES},
+            'by_month': [
+                {'month': row['month'].strftime('%Y-%m'), 'total': row['total'], 'count': row['count']}
+                for row in months
+            ],
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the filtered ledger as CSV, oldest first, in constant memory"""
+        queryset = self.filter_queryset(Payment.objects.all())
+        response = StreamingHttpResponse(iter_payment_csv(queryset), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="payments.csv"'
+        return response
+
+
+class DashboardStatsView(ConditionalGetMixin, APIView):
+    version_resources = (ATHLETES, PAYMENTS, SHELVES)
+    versions_vary_by_day = True
 
-class DashboardStatsView(APIView):
     def get(self, request):
+        return self.conditional_get(request, lambda request: Response(get_dashboard_snapshot()))
+
+
+class AlertsView(ConditionalGetMixin, APIView):
+    """
+    Expiring and overdue athletes for the alert badge. Pass the returned
+    version back as ?since= to get {"changed": false} while nothing moved.
+    """
+    version_resources = (ATHLETES,)
+    versions_vary_by_day = True
+
+    def get(self, request):
+        return self.conditional_get(request, self._alerts)
+
+    def _alerts(self, request):
+        version = alerts_version(self.resource_versions[ATHLETES])
+        if request.query_params.get('since') == version:
+            return Response({'changed': False, 'version': version})
+        alerts = AlertSerializer(alert_athletes(), many=True, context={'request': request}).data
+        return Response({'changed': True, 'version': version, 'count': len(alerts), 'results': alerts})
+
+
+class RevenueReportView(ConditionalGetMixin, APIView):
+    """Revenue per day or month, read only from the RevenueRollup table"""
+    version_resources = (PAYMENTS,)
+
+    def get(self, request):
+        return self.conditional_get(request, self._report)
+
+    def _report(self, request):
+        granularity = request.query_params.get('granularity', 'month')
+        if granularity not in dict(RevenueRollup.GRANULARITY_CHOICES):
+            return Response({'error': "granularity must be 'day' or 'month'"}, status=status.HTTP_400_BAD_REQUEST)
+
         today = date.today()
-        
-        # 1. Basic Stats
-        total_athletes = Athlete.objects.count()
-        active_count = Athlete.objects.filter(is_active=True).count()
-        inactive_count = total_athletes - active_count
-        
-        # Income (Total from Payments)
-        total_income = Payment.objects.aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        # Shelves
-        total_shelves = Shelf.objects.count()
-        available_shelves = Shelf.objects.filter(status='available').count()
-        
-        # 2. Revenue Trend (Last 6 Months)
-        six_months_ago = today - timedelta(days=180)
-        revenue_trend = Payment.objects.filter(payment_date__gte=six_months_ago)\
-            .annotate(month=TruncMonth('payment_date'))\
-            .values('month')\
-            .annotate(total=Sum('amount'))\
-            .order_by('month')
-            
-        trend_data = []
-        for entry in revenue_trend:
-            trend_data.append({
-                'name': entry['month'].strftime('%b'),
-                'amount': float(entry['total'])
+        try:
+            end = parse_date(request.query_params.get('to') or today.isoformat())
+            start = parse_date(request.query_params.get('from') or (end - timedelta(days=365)).isoformat())
+        except ValueError:
+            end = start = None
+        if end is None or start is None:
+            return Response({'error': 'from and to must be dates in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+        if granularity == 'month':
+            start = start.replace(day=1)
+
+        rows = RevenueRollup.objects.filter(
+            granularity=granularity,
+            period_start__gte=start,
+            period_start__lte=end,
+        ).values_list('period_start', 'payment_type', 'gym_type', 'total', 'payment_count')
+
+        periods = {}
+        for period_start, payment_type, gym_type, total, count in rows:
+            entry = periods.setdefault(period_start, {
+                'period': period_start,
+                'total': 0,
+                'count': 0,
+                'by_payment_type': {key: 0 for key, _ in Payment.PAYMENT_TYPES},
+                'by_gym_type': {key: 0 for key, _ in Athlete.GYM_TYPE_CHOICES},
             })
-            
-        # 3. Distributions
-        gym_type_dist = [
-            {'name': 'Fitness', 'value': Athlete.objects.filter(gym_type='fitness', is_active=True).count()},
-            {'name': 'Bodybuilding', 'value': Athlete.objects.filter(gym_type='bodybuilding', is_active=True).count()}
-        ]
-        
-        gym_time_dist = [
-            {'name': 'Morning', 'value': Athlete.objects.filter(gym_time='morning', is_active=True).count()},
-            {'name': 'Afternoon', 'value': Athlete.objects.filter(gym_time='afternoon', is_active=True).count()},
-            {'name': 'Night', 'value': Athlete.objects.filter(gym_time='night', is_active=True).count()},
-        ]
-        
-        status_dist = [
-            {'name': 'Active', 'value': active_count},
-            {'name': 'Inactive', 'value': inactive_count}
-        ]
-        
-        # 4. Critical Alerts (Expiring or Overdue)
-        critical_athletes = Athlete.objects.filter(
-            fee_deadline_date__lte=today + timedelta(days=3),
-            is_active=True
-        )
-        critical_data = sorted(AthleteSerializer(critical_athletes, many=True).data, key=lambda x: x['days_left'])
-        
+            entry['total'] += total
+            entry['count'] += count
+            entry['by_payment_type'][payment_type] += total
+            entry['by_gym_type'][gym_type] += total
+
         return Response({
-            'stats': {
-                'total': total_athletes,
-                'active': active_count,
-                'inactive': inactive_count,
-                'income': total_income,
-                'shelves_total': total_shelves,
-                'shelves_available': available_shelves,
-            },
-            'trends': {
-                'revenue': trend_data,
-            },
-            'distributions': {
-                'type': gym_type_dist,
-                'time': gym_time_dist,
-                'status': status_dist
-            },
-            'alerts': critical_data
+            'granularity': granularity,
+            'from': start,
+            'to': end,
+            'results': [periods[key] for key in sorted(periods)],
         })
 
 
+class SyncView(APIView):
+    """
+    Delta sync: GET /api/sync/ for everything, then /api/sync/?since=<token>
+    for what changed since. See gym.sync for the token semantics.
+    """
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 1000)), 1), 5000)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            payload = sync_changes(request.query_params.get('since'), limit, {'request': request})
+        except InvalidSyncToken as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except SyncTokenExpired:
+            return Response({'error': 'Sync token is too old; run a full sync (omit "since")'},
+                            status=status.HTTP_410_GONE)
+        return Response(payload)
+
+
+class EventStreamView(View):
+    """
+    Server-sent change events: GET /api/events/?resources=athletes,shelves.
+    See gym.events. EventSource cannot send headers, so browsers authenticate
+    with a stream ticket (?ticket=, from EventTicketView) instead of the
+    access token, which would otherwise end up in access logs.
+    """
+    resources = (ATHLETES, PAYMENTS, SHELVES)
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({'error': 'Live events need the ASGI server (gymsystem.asgi)'}, status=501)
+        if not await self.authenticate_stream(request):
+            return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'},
+                                status=401)
+        resources = [name for name in request.GET.get('resources', '').split(',') if name]
+        unknown = set(resources) - set(self.resources)
+        if unknown:
+            return JsonResponse({'error': f'Unknown resources: {", ".join(sorted(unknown))}'}, status=400)
+
+        subscription = get_broker().subscribe(resources)
+        response = StreamingHttpResponse(
+            event_stream(subscription, settings.GYM_EVENTS_KEEPALIVE), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def authenticate_stream(self, request):
+        ticket = request.GET.get('ticket')
+        if ticket is not None:
+            return await sync_to_async(redeem_ticket)(ticket)
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = header and authentication.get_raw_token(header)
+        if not raw_token:
+            return None
+        try:
+            validated = authentication.get_validated_token(raw_token)
+            return await sync_to_async(authentication.get_user)(validated)
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            return None
+
+
+class EventTicketView(APIView):
+    """POST /api/events/ticket/: a single-use ticket for opening the event stream"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response({'ticket': issue_ticket(request.user), 'expires_in': settings.GYM_EVENTS_TICKET_TTL})
+
+
 class ChangePasswordView(APIView):
     permission_classes = [IsAuthenticated]
 
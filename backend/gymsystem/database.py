@@ -0,0 +1,115 @@
+"""
+Database profiles, selected with the ``GYM_DB_PROFILE`` environment variable.
+
+``sqlite`` (default)
+    The SQLite file tuned for a small multi-user deployment: WAL journaling
+    so readers are not blocked while a payment is written, ``synchronous=NORMAL``
+    (safe with WAL), a busy timeout, memory-mapped I/O, a larger page cache,
+    ``BEGIN IMMEDIATE`` transactions and persistent connections.
+``sqlite-plain``
+    The stock Django SQLite setup (rollback journal, a connection per
+    request). Kept as a baseline for ``manage.py loadtest``.
+``postgres``
+    PostgreSQL with psycopg 3 connection pooling; configured with the
+    ``GYM_DB_NAME``/``USER``/``PASSWORD``/``HOST``/``PORT`` and
+    ``GYM_DB_POOL_MIN``/``GYM_DB_POOL_MAX`` variables.
+
+Per-connection PRAGMAs are applied by a ``connection_created`` receiver,
+reading them from the ``PRAGMAS`` entry of the database settings.
+``retry_when_locked`` re-runs a unit of work that SQLite refused with
+"database is locked".
+"""
+import os
+import random
+import time
+
+from django.db import OperationalError
+from django.db.backends.signals import connection_created
+
+PROFILES = ('sqlite', 'sqlite-plain', 'postgres')
+RETRY_ATTEMPTS = 8
+RETRY_BACKOFF = 0.02
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,            # ms, also covers the sqlite3 module's own timeout
+    'mmap_size': 256 * 1024 * 1024,   # bytes
+    'cache_size': -64000,             # negative = KiB, i.e. ~64 MB
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+
+
+def _env(name, default=None):
+    return os.environ.get(f'GYM_DB_{name}', default)
+
+
+def database_settings(base_dir, profile=None):
+    """Return the ``DATABASES['default']`` dict for ``profile``."""
+    profile = profile or os.environ.get('GYM_DB_PROFILE', 'sqlite')
+    if profile not in PROFILES:
+        raise ValueError(f'GYM_DB_PROFILE must be one of {", ".join(PROFILES)}, not {profile!r}')
+
+    if profile == 'postgres':
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': _env('NAME', 'gym'),
+            'USER': _env('USER', 'gym'),
+            'PASSWORD': _env('PASSWORD', ''),
+            'HOST': _env('HOST', 'localhost'),
+            'PORT': _env('PORT', '5432'),
+            # Pooled connections are returned to the pool after each request,
+            # so persistent connections must stay off
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(_env('POOL_MIN', 2)),
+                    'max_size': int(_env('POOL_MAX', 10)),
+                    'timeout': 10,
+                },
+            },
+            'PROFILE': profile,
+        }
+
+    database = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': _env('NAME', base_dir / 'db.sqlite3'),
+        'PROFILE': profile,
+    }
+    if profile == 'sqlite':
+        database.update({
+            'CONN_MAX_AGE': int(_env('CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'timeout': 20,
+                # Take the write lock up front instead of upgrading a read
+                # transaction, which fails immediately under WAL contention
+                'transaction_mode': 'IMMEDIATE',
+            },
+            'PRAGMAS': SQLITE_PRAGMAS,
+        })
+    return database
+
+
+def retry_when_locked(func):
+    """Re-run ``func`` (an atomic unit of work) if SQLite reports the database as locked."""
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            return func()
+        except OperationalError as exc:
+            if 'locked' not in str(exc) or attempt == RETRY_ATTEMPTS - 1:
+                raise
+            time.sleep(RETRY_BACKOFF * (2 ** attempt) * random.random())
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    pragmas = connection.settings_dict.get('PRAGMAS')
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+connection_created.connect(apply_pragmas, dispatch_uid='gymsystem.database.apply_pragmas')
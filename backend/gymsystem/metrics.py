@@ -0,0 +1,216 @@
+"""
+Request metrics in Prometheus text format.
+
+``MetricsMiddleware`` times every request and, through a connection
+``execute_wrapper``, counts and times the SQL it runs. Per route (the URL
+name, e.g. ``athlete-list``) and method it keeps in-memory histograms of wall
+time, query count, query time and response size; ``/api/metrics/`` renders
+them for Prometheus to scrape. Counters live in this process only and start
+from zero on restart, which Prometheus handles as a counter reset.
+
+The middleware is sync and async capable, so under ASGI it does not force
+async views and the event stream through a thread.
+
+Any statement slower than ``GYM_SLOW_QUERY_MS`` is logged to the
+``gym.slow_queries`` logger together with its route and SQL.
+
+The endpoint is open to local addresses; with ``GYM_METRICS_TOKEN`` set it
+instead requires ``Authorization: Bearer <token>``.
+"""
+from bisect import bisect_left
+from contextlib import ExitStack
+import hmac
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+slow_query_logger = logging.getLogger('gym.slow_queries')
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+SQL_LOG_LIMIT = 2000
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    """Counters and histograms keyed by label tuples; thread-safe."""
+
+    # name: (help, buckets)
+    HISTOGRAMS = {
+        'gym_http_request_duration_seconds': ('Wall time of requests, in seconds', SECONDS_BUCKETS),
+        'gym_http_request_queries': ('Database queries per request', QUERY_BUCKETS),
+        'gym_http_request_db_seconds': ('Time spent in database queries per request, in seconds', SECONDS_BUCKETS),
+        'gym_http_response_bytes': ('Size of non-streaming response bodies, in bytes', BYTES_BUCKETS),
+    }
+    COUNTERS = {
+        'gym_http_requests_total': 'Requests by route, method and status',
+        'gym_db_slow_queries_total': 'Queries slower than GYM_SLOW_QUERY_MS',
+        'gym_representation_cache_total': 'Row representation cache lookups by serializer and result',
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {name: {} for name in self.HISTOGRAMS}
+            self.counters = {name: {} for name in self.COUNTERS}
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            series = self.histograms[name]
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(self.HISTOGRAMS[name][1])
+            histogram.observe(value)
+
+    def increment(self, name, labels, amount=1):
+        with self._lock:
+            series = self.counters[name]
+            series[labels] = series.get(labels, 0) + amount
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, help_text in self.COUNTERS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for labels, value in sorted(self.counters[name].items()):
+                    lines.append(f'{name}{_labels(labels)} {value}')
+            for name, (help_text, buckets) in self.HISTOGRAMS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for labels, histogram in sorted(self.histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip((*buckets, '+Inf'), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_labels(labels + (("le", str(bound)),))} {cumulative}')
+                    lines.append(f'{name}_sum{_labels(labels)} {histogram.sum:g}')
+                    lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+registry = Registry()
+
+
+class QueryTimer:
+    """``execute_wrapper`` that counts and times the statements of one request."""
+
+    def __init__(self, slow_seconds):
+        self.slow_seconds = slow_seconds
+        self.count = 0
+        self.seconds = 0.0
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if self.slow_seconds is not None and elapsed >= self.slow_seconds:
+                self.slow.append((elapsed, sql))
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        threshold = settings.GYM_SLOW_QUERY_MS
+        self.slow_seconds = threshold / 1000 if threshold is not None else None
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer(self.slow_seconds)
+        started = time.perf_counter()
+        with self.wrap_connections(timer):
+            response = self.get_response(request)
+        self.record(request, response, timer, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer(self.slow_seconds)
+        started = time.perf_counter()
+        # Connections are per thread: wrap the ones of the thread that
+        # sync_to_async runs this request's queries in
+        stack = await sync_to_async(self.wrap_connections)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.record(request, response, timer, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def wrap_connections(timer):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        return stack
+
+    def record(self, request, response, timer, elapsed):
+        route = _route(request)
+        labels = (('route', route), ('method', request.method))
+        registry.increment('gym_http_requests_total', labels + (('status', response.status_code),))
+        registry.observe('gym_http_request_duration_seconds', labels, elapsed)
+        registry.observe('gym_http_request_queries', labels, timer.count)
+        registry.observe('gym_http_request_db_seconds', labels, timer.seconds)
+        if not response.streaming:
+            registry.observe('gym_http_response_bytes', labels, len(response.content))
+        for seconds, sql in timer.slow:
+            registry.increment('gym_db_slow_queries_total', (('route', route),))
+            slow_query_logger.warning(
+                'Slow query (%.1f ms) in %s %s: %s', seconds * 1000, request.method, route, sql[:SQL_LOG_LIMIT])
+
+
+def metrics_view(request):
+    token = settings.GYM_METRICS_TOKEN
+    if token:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        allowed = hmac.compare_digest(supplied.encode(), token.encode())
+    else:
+        allowed = request.META.get('REMOTE_ADDR') in LOCAL_ADDRESSES
+    if not allowed:
+        return HttpResponseForbidden('Metrics are only available locally or with GYM_METRICS_TOKEN')
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
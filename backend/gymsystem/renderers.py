@@ -0,0 +1,71 @@
+"""
+orjson-backed JSON renderer and parser for the API.
+
+Both are drop-in replacements for DRF's ``JSONRenderer``/``JSONParser``:
+compact separators, UTF-8 without ``\\u`` escapes (``UNICODE_JSON``),
+``\\u2028``/``\\u2029`` escaped, and anything orjson does not encode itself
+-- Decimal, date, datetime (``Z`` for UTC), time, lazy strings, querysets --
+converted by DRF's own ``JSONEncoder.default``. Whenever orjson cannot take
+the input as is (a non-string dict key, an integer beyond 64 bits, invalid
+JSON, a non-UTF-8 request) or the output is indented (browsable API,
+``; indent=``), they fall back to the stdlib implementation, which also
+supplies the error.
+
+Deliberate differences, all on numbers: NaN and infinity render as ``null``
+instead of raising, some floats are spelled differently (``1e16`` rather
+than ``1e+16``), and integers in a request beyond 64 bits are parsed as
+floats. orjson is optional; without it both classes behave exactly like
+DRF's.
+"""
+from io import BytesIO
+import codecs
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib json module is used instead
+    orjson = None
+
+# Dates and times go through DRF's encoder so their format matches exactly
+DUMPS_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=DUMPS_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Keep the output a strict JavaScript subset, as JSONRenderer does
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        # orjson only reads UTF-8 and always rejects NaN/Infinity (STRICT_JSON)
+        if orjson is None or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # The stdlib parser decides: it reports the error (in DRF's
+            # wording) or accepts what orjson does not, e.g. lone surrogates
+            return super().parse(BytesIO(body), media_type, parser_context)
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -56,6 +59,17 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
+    # orjson when installed; same output as DRF's apart from NaN and some
+    # float spellings (gymsystem/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'gymsystem.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'gymsystem.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 # JWT Settings
@@ -68,6 +82,7 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    "gymsystem.metrics.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -100,14 +115,67 @@ WSGI_APPLICATION = "gymsystem.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Pick a profile with GYM_DB_PROFILE (sqlite, sqlite-plain, postgres); see
+# gymsystem/database.py for what each one configures.
 
 DATABASES = {
+    "default": database_settings(BASE_DIR),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Point this at a shared backend (Redis, memcached, database) when running
+# more than one worker process so dashboard invalidation reaches all of them.
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "gymsystem",
+    },
+    # Serialized athlete/shelf rows (gym/representations.py). Locmem keeps
+    # entries in LRU order; culling one entry at a time (CULL_FREQUENCY equal
+    # to MAX_ENTRIES) makes it evict exactly the least recently used. Swap in
+    # FileBasedCache or RedisCache to share entries between processes.
+    "representations": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "gym-representations",
+        "TIMEOUT": 86400,
+        "OPTIONS": {"MAX_ENTRIES": 20000, "CULL_FREQUENCY": 20000},
+    },
 }
 
+# Upper bound on how long a dashboard snapshot is served; signals invalidate
+# it sooner whenever an athlete, payment or shelf changes.
+GYM_DASHBOARD_CACHE_TIMEOUT = 300
+
+# Cache alias and lifetime of serialized list rows; entries are keyed by row
+# version, so the timeout only bounds how long dead entries linger
+GYM_REPRESENTATION_CACHE = "representations"
+GYM_REPRESENTATION_CACHE_TIMEOUT = 86400
+
+# How long deletes are remembered for /api/sync/; older sync tokens get a 410
+GYM_SYNC_TOMBSTONE_DAYS = 90
+
+# manage.py sweep_expired (gym/sweeps.py): athletes this many days past their
+# fee deadline are deactivated; candidates are processed in batches
+GYM_SWEEP_GRACE_DAYS = 30
+GYM_SWEEP_BATCH_SIZE = 500
+
+# Request metrics at /api/metrics/ (gymsystem/metrics.py). Open to localhost
+# unless a token is set; queries slower than GYM_SLOW_QUERY_MS are logged
+# to "gym.slow_queries" (None turns that off).
+GYM_METRICS_TOKEN = os.environ.get('GYM_METRICS_TOKEN', '')
+GYM_SLOW_QUERY_MS = 200
+
+# Live change events on /api/events/ (gym/events.py). The in-process backend
+# serves a single ASGI worker; several workers need a shared backend.
+GYM_EVENTS_BACKEND = 'gym.events.InProcessBackend'
+GYM_EVENTS_MAX_QUEUE = 100
+GYM_EVENTS_KEEPALIVE = 15
+# Seconds a stream ticket (POST /api/events/ticket/) stays valid
+GYM_EVENTS_TICKET_TTL = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -148,9 +216,15 @@ STATICFILES_DIRS = [
     BASE_DIR.parent / 'frontend' / 'dist',
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# Built React app, served by gymsystem/spa.py
+SPA_INDEX_FILE = str(BASE_DIR.parent / 'frontend' / 'dist' / 'index.html')
+SPA_ASSETS_DIR = str(STATIC_ROOT / 'assets')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Worker threads for athlete photo processing (gym/images.py); 0 runs it inline
+GYM_IMAGE_WORKERS = 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,154 @@
+"""
+Serving the built React app (``frontend/dist``) from Django.
+
+``index.html`` is read once and kept in memory, together with gzip (and,
+if the ``brotli`` package is installed, brotli) encodings of it. The file is
+only re-read when its mtime changes, e.g. after ``npm run build``. It is
+served with ``Cache-Control: no-cache`` and an ETag so browsers revalidate it
+cheaply and always pick up new asset names.
+
+Files under ``assets/`` carry a content hash in their names, so they are
+served as immutable for a year. When a ``.br`` or ``.gz`` sibling exists
+(see ``manage.py compress_assets``) and the client accepts that encoding,
+the pre-compressed bytes are sent instead.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # optional; pre-built .br files are still served
+    brotli = None
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# Preferred first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def accepted_encodings(request):
+    """Encodings the client accepts (q > 0), from the Accept-Encoding header."""
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q=') and _is_zero(quality[2:]):
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _is_zero(value):
+    try:
+        return float(value) == 0
+    except ValueError:
+        return False
+
+
+def _not_modified(request, etag):
+    return etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]
+
+
+class IndexShell:
+    """In-memory copy of index.html, reloaded when the file changes on disk."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._variants = {}
+
+    def _load(self, path):
+        stat = os.stat(path)
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        if key == self._key:
+            return self._variants
+        with self._lock:
+            if key != self._key:
+                body = Path(path).read_bytes()
+                etag = hashlib.md5(body, usedforsecurity=False).hexdigest()
+                variants = {None: (body, f'"{etag}"')}
+                variants['gzip'] = (gzip.compress(body, 9, mtime=0), f'"{etag}-gzip"')
+                if brotli:
+                    variants['br'] = (brotli.compress(body), f'"{etag}-br"')
+                self._variants, self._key = variants, key
+        return self._variants
+
+    def response(self, request):
+        try:
+            variants = self._load(settings.SPA_INDEX_FILE)
+        except FileNotFoundError:
+            raise Http404('The frontend has not been built (frontend/dist/index.html is missing).')
+
+        accepted = accepted_encodings(request)
+        encoding = next((coding for coding, _ in ENCODINGS if coding in accepted and coding in variants), None)
+        body, etag = variants[encoding]
+
+        if _not_modified(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='text/html; charset=utf-8')
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Cache-Control'] = REVALIDATE
+        response['Vary'] = 'Accept-Encoding'
+        return response
+
+
+index_shell = IndexShell()
+
+
+def index_view(request):
+    return index_shell.response(request)
+
+
+def asset_view(request, path):
+    root = settings.SPA_ASSETS_DIR
+    try:
+        full_path = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found')
+
+    accepted = accepted_encodings(request)
+    encoding = None
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(full_path + suffix):
+            encoding, served_path = coding, full_path + suffix
+            break
+    else:
+        served_path = full_path
+
+    if not os.path.isfile(served_path):
+        raise Http404('Not found')
+    stat = os.stat(served_path)
+
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+    if _not_modified(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(full_path)
+        response = FileResponse(
+            open(served_path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+            filename=os.path.basename(full_path),
+        )
+        response['Content-Length'] = stat.st_size
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Cache-Control'] = IMMUTABLE
+    response['Vary'] = 'Accept-Encoding'
+    return response
@@ -19,26 +19,27 @@ from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
-from django.http import HttpResponse
-from django.views.static import serve
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from gym.views import AthleteViewSet, ShelfViewSet, DashboardStatsView, ChangePasswordView
-from pathlib import Path
+from gym.views import AthleteViewSet, PaymentViewSet, ShelfViewSet, DashboardStatsView, AlertsView, RevenueReportView, SyncView, EventStreamView, EventTicketView, ChangePasswordView
+from gymsystem.metrics import metrics_view
+from gymsystem.spa import asset_view, index_view
 
 router = DefaultRouter()
 router.register(r'athletes', AthleteViewSet)
 router.register(r'shelves', ShelfViewSet)
-
-def index_view(request):
-    index_path = Path(settings.BASE_DIR).parent / 'frontend' / 'dist' / 'index.html'
-    with open(index_path, 'r', encoding='utf-8') as f:
-        return HttpResponse(f.read())
+router.register(r'payments', PaymentViewSet)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('api/', include(router.urls)),
     path('api/dashboard/', DashboardStatsView.as_view(), name='dashboard'),
+    path('api/alerts/', AlertsView.as_view(), name='alerts'),
+    path('api/reports/revenue/', RevenueReportView.as_view(), name='revenue_report'),
+    path('api/sync/', SyncView.as_view(), name='sync'),
+    path('api/events/', EventStreamView.as_view(), name='events'),
+    path('api/events/ticket/', EventTicketView.as_view(), name='event-ticket'),
+    path('api/metrics/', metrics_view, name='metrics'),
     path('api/change-password/', ChangePasswordView.as_view(), name='change_password'),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -46,8 +47,8 @@ urlpatterns = [
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
-# Serve static files (frontend build)
-urlpatterns += [re_path(r'^assets/(?P<path>.*)$', serve, {'document_root': settings.STATIC_ROOT / 'assets'})]
+# Serve static files (frontend build): hashed, immutable, pre-compressed when available
+urlpatterns += [re_path(r'^assets/(?P<path>.*)$', asset_view)]
 
 # Catch-all: serve index.html for all other routes (SPA support)
 urlpatterns += [re_path(r'^.*$', index_view)]
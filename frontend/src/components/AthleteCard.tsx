@@ -2,19 +2,12 @@ import { CreditCard, Delete, Edit, Person, Schedule, Storage, ToggleOff, ToggleO
 import { Avatar, Box, Card, CardContent, Chip, IconButton, Tooltip, Typography } from '@mui/material';
 import React, { useMemo } from 'react';
 
-interface Payment {
-  id: number;
-  amount: number;
-  payment_date: string;
-  payment_type: 'registration' | 'renewal';
-  notes: string;
-}
-
 interface Athlete {
   id: number;
   full_name: string;
   father_name: string;
   photo: string | null;
+  thumbnails?: { sm: string; md: string } | null;
   registration_date: string;
   fee_deadline_date: string;
   gym_type: string;
@@ -27,7 +20,9 @@ interface Athlete {
   shelf: number | null;
   days_left: number;
   is_active: boolean;
-  payments: Payment[];
+  payment_count: number;
+  total_paid: number;
+  last_payment_date: string | null;
 }
 
 interface Shelf {
@@ -68,6 +63,8 @@ const AthleteCard: React.FC<AthleteCardProps> = React.memo(({
 }) => {
   // Memoize shelf lookup - O(1) instead of O(n) find()
   const athleteShelf = useMemo(() => shelf, [shelf?.id, athlete.shelf]);
+  // Card-sized thumbnail instead of the full upload once it has been processed
+  const cardPhoto = athlete.thumbnails?.md ?? athlete.photo;
 
   return (
     <Card
@@ -102,8 +99,8 @@ const AthleteCard: React.FC<AthleteCardProps> = React.memo(({
       <Box sx={{
         position: 'relative',
         height: 220,
-        background: athlete.photo
-          ? `url(${athlete.photo.startsWith('http') ? athlete.photo : `http://localhost:8000${athlete.photo}`})`
+        background: cardPhoto
+          ? `url(${cardPhoto.startsWith('http') ? cardPhoto : `http://localhost:8000${cardPhoto}`})`
           : 'linear-gradient(135deg, #6366f1 0%, #8b5cf6 100%)',
         backgroundSize: 'cover',
         backgroundPosition: 'center',
@@ -1,6 +1,7 @@
 import { AccountBox, Cancel, CheckCircle, History, Warning } from '@mui/icons-material';
 import { Avatar, Box, Button, Card, CardContent, Chip, Dialog, DialogActions, DialogContent, DialogTitle, Grid, Paper, Table, TableBody, TableCell, TableContainer, TableHead, TableRow, Typography } from '@mui/material';
-import React, { useMemo } from 'react';
+import axios from 'axios';
+import React, { useEffect, useMemo, useState } from 'react';
 
 interface Payment {
   id: number;
@@ -27,7 +28,9 @@ interface Athlete {
   shelf: number | null;
   days_left: number;
   is_active: boolean;
-  payments: Payment[];
+  payment_count: number;
+  total_paid: number;
+  last_payment_date: string | null;
 }
 
 interface Shelf {
@@ -86,6 +89,34 @@ const AthleteProfile: React.FC<AthleteProfileProps> = React.memo(({
     return shelves.find(s => s.id === Number(athlete.shelf)) || null;
   }, [athlete?.shelf, shelves]);
 
+  // Payment history is a paginated sub-resource, newest first
+  const [payments, setPayments] = useState<Payment[]>([]);
+  const [nextPaymentsUrl, setNextPaymentsUrl] = useState<string | null>(null);
+  const [loadingPayments, setLoadingPayments] = useState(false);
+
+  const loadPayments = async (url: string, append: boolean) => {
+    setLoadingPayments(true);
+    try {
+      const token = localStorage.getItem('token');
+      const response = await axios.get(url, { headers: { Authorization: `Bearer ${token}` } });
+      const page: Payment[] = response.data.results || [];
+      setPayments(previous => (append ? [...previous, ...page] : page));
+      setNextPaymentsUrl(response.data.next);
+    } catch (error) {
+      console.error('Error fetching payments:', error);
+    } finally {
+      setLoadingPayments(false);
+    }
+  };
+
+  useEffect(() => {
+    setPayments([]);
+    setNextPaymentsUrl(null);
+    if (open && athlete?.id) {
+      loadPayments(`http://localhost:8000/api/athletes/${athlete.id}/payments/?page_size=20`, false);
+    }
+  }, [open, athlete?.id, athlete?.payment_count]);
+
   if (!athlete) return null;
 
   return (
@@ -297,6 +328,9 @@ const AthleteProfile: React.FC<AthleteProfileProps> = React.memo(({
           {/* Payment History Table */}
           <Typography variant="h6" sx={{ mt: 4, mb: 2, display: 'flex', alignItems: 'center', gap: 1, color: '#6366f1', fontWeight: 700 }}>
             <History /> Payment History
+            <Typography component="span" variant="body2" sx={{ ml: 'auto', color: 'text.secondary', fontWeight: 600 }}>
+              {athlete.payment_count} payments · {athlete.total_paid} AFN
+            </Typography>
           </Typography>
           <TableContainer component={Paper} elevation={0} sx={{ border: '1px solid #e3e8ee', borderRadius: 3 }}>
             <Table size="small">
@@ -309,8 +343,8 @@ const AthleteProfile: React.FC<AthleteProfileProps> = React.memo(({
                 </TableRow>
               </TableHead>
               <TableBody>
-                {athlete.payments && athlete.payments.length > 0 ? (
-                  athlete.payments.map((payment) => (
+                {payments.length > 0 ? (
+                  payments.map((payment) => (
                     <TableRow key={payment.id} hover>
                       <TableCell>{payment.payment_date}</TableCell>
                       <TableCell sx={{ textTransform: 'capitalize' }}>
@@ -329,13 +363,20 @@ const AthleteProfile: React.FC<AthleteProfileProps> = React.memo(({
                 ) : (
                   <TableRow>
                     <TableCell colSpan={4} align="center" sx={{ py: 4, color: 'text.secondary' }}>
-                      No payment history found
+                      {loadingPayments ? 'Loading payments...' : 'No payment history found'}
                     </TableCell>
                   </TableRow>
                 )}
               </TableBody>
             </Table>
           </TableContainer>
+          {nextPaymentsUrl && (
+            <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+              <Button onClick={() => loadPayments(nextPaymentsUrl, true)} disabled={loadingPayments} sx={buttonSecondarySx}>
+                {loadingPayments ? 'Loading...' : 'Load more'}
+              </Button>
+            </Box>
+          )}
         </Box>
       </DialogContent>
       <DialogActions sx={{ px: 4, pb: 4, bgcolor: '#f8fafc' }}>
@@ -10,19 +10,12 @@ import AthleteCard, { CARD_HEIGHT, GRID_GAP } from './AthleteCard';
 import AthleteProfile from './AthleteProfile';
 import AthleteRegistrationModal from './AthleteRegistrationModal';
 
-interface Payment {
-  id: number;
-  amount: number;
-  payment_date: string;
-  payment_type: 'registration' | 'renewal';
-  notes: string;
-}
-
 interface Athlete {
   id: number;
   full_name: string;
   father_name: string;
   photo: string | null;
+  thumbnails?: { sm: string; md: string } | null;
   registration_date: string;
   fee_deadline_date: string;
   gym_type: string;
@@ -35,7 +28,9 @@ interface Athlete {
   shelf: number | null;
   days_left: number;
   is_active: boolean;
-  payments: Payment[];
+  payment_count: number;
+  total_paid: number;
+  last_payment_date: string | null;
 }
 
 interface Shelf {
@@ -179,6 +174,9 @@ const CARD_MIN_WIDTH = 320;
 const Athletes: React.FC = () => {
   const location = useLocation();
   const [athletes, setAthletes] = useState<Athlete[]>([]);
+  const [nextUrl, setNextUrl] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const listRequest = useRef(0);
   const [shelves, setShelves] = useState<Shelf[]>([]);
   const [open, setOpen] = useState(false);
   const [editing, setEditing] = useState<Athlete | null>(null);
@@ -210,9 +208,20 @@ const Athletes: React.FC = () => {
   const [profileAthlete, setProfileAthlete] = useState<Athlete | null>(null);
   const [hasOpenedProfile, setHasOpenedProfile] = useState(false);
 
+  const fetchAthletePage = async (url: string) => {
+    const token = localStorage.getItem('token');
+    const response: { data: Athlete[] | { next: string | null; results: Athlete[] } } = await axios.get(url, {
+      headers: { Authorization: `Bearer ${token}` }
+    });
+    if (Array.isArray(response.data)) return { results: response.data, next: null };
+    return { results: response.data.results || [], next: response.data.next };
+  };
+
+  // The list endpoint is cursor-paginated: a refresh loads the first page and
+  // further pages are fetched as the grid scrolls (loadMoreAthletes).
   const fetchAthletes = async () => {
+    const request = ++listRequest.current;
     try {
-      const token = localStorage.getItem('token');
       const params = new URLSearchParams();
 
       if (searchQuery) params.append('search', searchQuery);
@@ -221,13 +230,35 @@ const Athletes: React.FC = () => {
       if (filterFeeStatus) params.append('fee_status', filterFeeStatus);
       params.append('ordering', '-registration_date');
 
-      const response = await axios.get(`http://localhost:8000/api/athletes/?${params.toString()}`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      setAthletes(Array.isArray(response.data) ? response.data : (response.data.results || []));
+      const page = await fetchAthletePage(`http://localhost:8000/api/athletes/?${params.toString()}`);
+      // Filters may have changed while this page was loading
+      if (request !== listRequest.current) return;
+      setAthletes(page.results);
+      setNextUrl(page.next);
     } catch (error) {
       console.error('Error fetching athletes:', error);
+      if (request !== listRequest.current) return;
       setAthletes([]);
+      setNextUrl(null);
+    }
+  };
+
+  const loadMoreAthletes = async () => {
+    if (!nextUrl || loadingMore) return;
+    const request = listRequest.current;
+    setLoadingMore(true);
+    try {
+      const page = await fetchAthletePage(nextUrl);
+      if (request !== listRequest.current) return;
+      setAthletes(prev => {
+        const seen = new Set(prev.map(a => a.id));
+        return [...prev, ...page.results.filter(a => !seen.has(a.id))];
+      });
+      setNextUrl(page.next);
+    } catch (error) {
+      console.error('Error fetching more athletes:', error);
+    } finally {
+      setLoadingMore(false);
     }
   };
 
@@ -244,6 +275,7 @@ const Athletes: React.FC = () => {
     }
   };
 
+  // List rows are complete; the profile pages in the payment history itself.
   const openProfile = (athlete: Athlete) => {
     setProfileAthlete(athlete);
     setProfileOpen(true);
@@ -272,8 +304,7 @@ const Athletes: React.FC = () => {
       if (athlete) {
         // Use requestAnimationFrame to avoid synchronous setState
         requestAnimationFrame(() => {
-          setProfileAthlete(athlete);
-          setProfileOpen(true);
+          openProfile(athlete);
           setHasOpenedProfile(true);
         });
         // Clear the state to prevent re-opening on data updates
@@ -634,7 +665,7 @@ const Athletes: React.FC = () => {
               Manage your gym members and their information
             </Typography>
             <Chip
-              label={`Total Members: ${athletes.length}`}
+              label={`Total Members: ${athletes.length}${nextUrl ? '+' : ''}`}
               sx={{
                 fontSize: '0.95rem',
                 py: 1,
@@ -881,7 +912,7 @@ const Athletes: React.FC = () => {
           <Box>
             <Box sx={{ mb: 3, display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
               <Typography variant="h6" fontWeight={700} color="#1e293b">
-                Athletes ({athletes.length})
+                Athletes ({athletes.length}{nextUrl ? '+' : ''})
               </Typography>
             </Box>
 
@@ -896,14 +927,22 @@ const Athletes: React.FC = () => {
                 style={{ height: gridHeight, width: '100%' }}
                 cellComponent={renderCardCell}
                 cellProps={gridCellProps}
+                onCellsRendered={({ rowStopIndex }) => {
+                  if (rowStopIndex >= rowCount - 2) loadMoreAthletes();
+                }}
               >
               </VirtualGrid>
             </Box>
             {/* Show count of displayed items */}
             <Box sx={{ textAlign: 'center', py: 2 }}>
               <Typography variant="body2" color="text.secondary">
-                Showing {sortedAthletes.length} of {sortedAthletes.length} athletes
+                Showing {sortedAthletes.length} athletes{nextUrl ? ', scroll for more' : ''}
               </Typography>
+              {nextUrl && (
+                <Button onClick={loadMoreAthletes} disabled={loadingMore} sx={{ mt: 1 }}>
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+              )}
             </Box>
           </Box>
         </Fade>
@@ -4,6 +4,7 @@ import axios from 'axios';
 import React, { useEffect, useState } from 'react';
 import { Area, AreaChart, Bar, BarChart, CartesianGrid, Cell, Legend, Pie, PieChart, ResponsiveContainer, Tooltip, XAxis, YAxis } from 'recharts';
 import { useAlerts } from '../context/AlertsContext';
+import { subscribeToChanges } from '../context/liveChanges';
 
 interface TrendData {
   name: string;
@@ -22,6 +23,7 @@ interface AlertData {
   gym_type: string;
   contact_number: string;
   photo: string | null;
+  thumbnails?: { sm: string; md: string } | null;
 }
 
 interface StatsData {
@@ -64,7 +66,12 @@ const Dashboard: React.FC = () => {
       }
     };
     fetchStats();
-    setTimeout(() => setLoaded(true), 100);
+    const timer = setTimeout(() => setLoaded(true), 100);
+    const unsubscribe = subscribeToChanges(['athletes', 'payments', 'shelves'], fetchStats);
+    return () => {
+      unsubscribe();
+      clearTimeout(timer);
+    };
   }, []);
 
   if (!data) {
@@ -484,7 +491,7 @@ const Dashboard: React.FC = () => {
                                 <TableCell sx={{ py: 2.5 }}>
                                   <Box sx={{ display: 'flex', alignItems: 'center' }}>
                                     <Avatar
-                                      src={alert.photo ? `http://localhost:8000${alert.photo}` : undefined}
+                                      src={alert.photo ? `http://localhost:8000${alert.thumbnails?.sm ?? alert.photo}` : undefined}
                                       sx={{
                                         width: 44,
                                         height: 44,
@@ -2,8 +2,9 @@ import { Dashboard, FitnessCenter, Logout, Notifications, Storage, VpnKey } from
 import LinkedInIcon from '@mui/icons-material/LinkedIn';
 import { Avatar, Badge, Box, Button, Container, Fade, IconButton, Link, Menu, MenuItem, Slide, Typography, Zoom } from '@mui/material';
 import axios from 'axios';
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useLocation, useNavigate } from 'react-router-dom';
+import { subscribeToChanges } from '../context/liveChanges';
 import ChangePassword from './ChangePassword';
 
 interface LayoutProps {
@@ -14,9 +15,9 @@ interface AlertData {
   id: number;
   full_name: string;
   days_left: number;
+  avatar: string | null;
   gym_type: string;
   contact_number: string;
-  photo: string | null;
 }
 
 const Layout: React.FC<LayoutProps> = ({ children }) => {
@@ -29,15 +30,20 @@ const Layout: React.FC<LayoutProps> = ({ children }) => {
   const [changePasswordOpen, setChangePasswordOpen] = useState(false);
   const [loaded, setLoaded] = useState(false);
 
-  // fetch alerts
+  // fetch alerts; the server answers "unchanged" while our version is current
+  const alertsVersion = useRef<string | null>(null);
   const fetchAlerts = async () => {
     const token = localStorage.getItem('token');
     if (!token) return;
     try {
-      const response = await axios.get('http://localhost:8000/api/dashboard/', {
-        headers: { Authorization: `Bearer ${token}` }
+      const response = await axios.get('http://localhost:8000/api/alerts/', {
+        headers: { Authorization: `Bearer ${token}` },
+        params: alertsVersion.current ? { since: alertsVersion.current } : {},
       });
-      setAlerts(response.data.alerts || []);
+      if (response.data.changed) {
+        setAlerts(response.data.results);
+      }
+      alertsVersion.current = response.data.version;
     } catch (error) {
       console.error("Error fetching alerts:", error);
     }
@@ -49,11 +55,14 @@ const Layout: React.FC<LayoutProps> = ({ children }) => {
     };
     loadData();
     const timer = setTimeout(() => setLoaded(true), 100);
-    // Refresh alerts every 10 seconds
+    // Refresh alerts when athletes change (every 10 seconds while live events
+    // are unavailable), plus a cheap "since" poll for the day rolling over
+    const unsubscribe = subscribeToChanges(['athletes'], loadData, { pollMs: 10000 });
     const interval = setInterval(() => {
       loadData();
-    }, 10000);
+    }, 60000);
     return () => {
+      unsubscribe();
       clearInterval(interval);
       clearTimeout(timer);
     };
@@ -304,7 +313,7 @@ const Layout: React.FC<LayoutProps> = ({ children }) => {
               <MenuItem onClick={() => handleAlertClick(alert)} sx={{ py: 1.5 }}>
                 <Box sx={{ display: 'flex', alignItems: 'center', width: '100%' }}>
                   <Avatar
-                    src={alert.photo ? (alert.photo.startsWith('http') ? alert.photo : `http://localhost:8000${alert.photo}`) : undefined}
+                    src={alert.avatar ?? undefined}
                     alt={alert.full_name}
                     sx={{ 
                       width: 44, 
@@ -314,7 +323,7 @@ const Layout: React.FC<LayoutProps> = ({ children }) => {
                       borderColor: alert.days_left < 0 ? '#ef4444' : alert.days_left <= 3 ? '#f59e0b' : '#10b981',
                     }}
                   >
-                    {!alert.photo && alert.full_name.charAt(0).toUpperCase()}
+                    {!alert.avatar && alert.full_name.charAt(0).toUpperCase()}
                   </Avatar>
                   <Box sx={{ flex: 1 }}>
                     <Typography variant="subtitle2" fontWeight={700} sx={{ color: '#1e293b' }}>
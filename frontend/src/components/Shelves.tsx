@@ -3,6 +3,7 @@ import { Avatar, Box, Button, Card, CardContent, Chip, Container, Dialog, Dialog
 import axios from 'axios';
 import React, { useEffect, useState } from 'react';
 import toast from 'react-hot-toast';
+import { subscribeToChanges } from '../context/liveChanges';
 
 interface Shelf {
   id: number;
@@ -40,7 +41,13 @@ const Shelves: React.FC = () => {
       await fetchShelves();
     };
     loadData();
-    setTimeout(() => setLoaded(true), 100);
+    const timer = setTimeout(() => setLoaded(true), 100);
+    // Locker assignments from other terminals show up without a reload
+    const unsubscribe = subscribeToChanges(['shelves', 'athletes'], loadData);
+    return () => {
+      unsubscribe();
+      clearTimeout(timer);
+    };
   }, []);
 
   const handleOpen = (shelf?: Shelf) => {
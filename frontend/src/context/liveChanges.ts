@@ -0,0 +1,102 @@
+// Live change events from /api/events/ (server-sent events).
+// Calls onChange (debounced) whenever one of the given resources changes, or
+// after a resync / reconnect when some changes may have been missed.
+// While the stream is unavailable (WSGI server, network trouble) it calls
+// onChange every pollMs instead, if given, and keeps retrying the stream.
+// Returns a cleanup function for useEffect.
+import axios from 'axios';
+
+export type Resource = 'athletes' | 'payments' | 'shelves';
+
+const EVENTS_URL = 'http://localhost:8000/api/events/';
+const RETRY_MIN_MS = 5000;
+const RETRY_MAX_MS = 300000;
+
+interface SubscribeOptions {
+  debounceMs?: number;
+  pollMs?: number;
+}
+
+export const subscribeToChanges = (
+  resources: Resource[],
+  onChange: () => void,
+  { debounceMs = 300, pollMs }: SubscribeOptions = {},
+) => {
+  let source: EventSource | undefined;
+  let timer: ReturnType<typeof setTimeout> | undefined;
+  let retry: ReturnType<typeof setTimeout> | undefined;
+  let poll: ReturnType<typeof setInterval> | undefined;
+  let retryMs = RETRY_MIN_MS;
+  let connectedBefore = false;
+  let closed = false;
+
+  const schedule = () => {
+    clearTimeout(timer);
+    timer = setTimeout(onChange, debounceMs);
+  };
+
+  const startPolling = () => {
+    if (pollMs && poll === undefined) poll = setInterval(onChange, pollMs);
+  };
+
+  const stopPolling = () => {
+    clearInterval(poll);
+    poll = undefined;
+  };
+
+  const retryLater = () => {
+    startPolling();
+    if (closed) return;
+    retry = setTimeout(connect, retryMs);
+    retryMs = Math.min(retryMs * 2, RETRY_MAX_MS);
+  };
+
+  const connect = async () => {
+    const token = localStorage.getItem('token');
+    if (!token || typeof EventSource === 'undefined') {
+      startPolling();
+      return;
+    }
+    // EventSource cannot send headers; trade the access token for a
+    // short-lived, single-use ticket rather than put it in the URL
+    let ticket: string;
+    try {
+      const response = await axios.post(`${EVENTS_URL}ticket/`, {}, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      ticket = response.data.ticket;
+    } catch {
+      retryLater();
+      return;
+    }
+    if (closed) return;
+
+    const params = new URLSearchParams({ resources: resources.join(','), ticket });
+    source = new EventSource(`${EVENTS_URL}?${params}`);
+    source.addEventListener('change', schedule);
+    source.addEventListener('resync', schedule);
+    source.onopen = () => {
+      stopPolling();
+      retryMs = RETRY_MIN_MS;
+      // Anything may have changed while the stream was down
+      if (connectedBefore) schedule();
+      connectedBefore = true;
+    };
+    source.onerror = () => {
+      // The ticket is spent, so EventSource's own reconnect would be refused
+      source?.close();
+      source = undefined;
+      retryLater();
+    };
+  };
+
+  connect();
+
+  return () => {
+    closed = true;
+    clearTimeout(timer);
+    clearTimeout(retry);
+    stopPolling();
+    source?.close();
+  };
+};